@@ -1,6 +1,7 @@
+import base64
+import time
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
 
 # --- Configurações da Página ---
 st.set_page_config(
@@ -11,135 +12,28 @@ st.set_page_config(
 # Altere para False para desabilitar a edição das tabelas de preços
 ENABLE_PRICE_EDITING = True
 
-# --- Dados do Cliente TotalPass ---
-TOTALPASS_DATA = {
-    "volume_leads_mes": 5000,
-    "leads_abandonados_pct": 0.85,
-    "ticket_medio": 566.50,
-    "ltv_dias": 173,
-    "taxa_conversao_atual": 0.166,
-    "num_vendedores": 10,
-    "comp_total_medio": 9000.0,  # Salário base + comissão média
-    "multiplicador_encargos": 1.6,
-    "comissao_min": 0.03,
-    "comissao_max": 0.05,
-}
-
-# --- Funções de Cálculo ---
-
-
-def calculate_tiered_cost(quantity, tiers_df):
-    """
-    Calcula o custo total com base em uma tabela de preços escalonada (por faixas).
-    A tabela deve ter as colunas 'Mínimo', 'Máximo', 'Valor'.
-    """
-    if quantity == 0:
-        return 0
-
-    # Garante que os tipos de dados estão corretos
-    tiers_df["Mínimo"] = tiers_df["Mínimo"].astype(float)
-    tiers_df["Máximo"] = tiers_df["Máximo"].astype(float)
-    tiers_df["Valor"] = tiers_df["Valor"].astype(float)
-
-    tiers_df = tiers_df.sort_values(by="Mínimo").reset_index(drop=True)
-
-    total_cost = 0
-
-    for _, row in tiers_df.iterrows():
-        min_val, max_val, price = row["Mínimo"], row["Máximo"], row["Valor"]
-
-        if quantity > min_val:
-            # Calcula a quantidade dentro desta faixa
-            items_in_tier = min(quantity, max_val) - min_val
-            cost_in_tier = items_in_tier * price
-            total_cost += cost_in_tier
-
-    return total_cost
-
+# --- Memória por Sessão ---
+# Acima deste limite, as varreduras guardadas em cache pela sessão são descartadas
+SESSION_MEMORY_CAP_MB = 64
 
-def run_simulation(
-    total_leads,
-    rates,
-    pricing_tables,
-    minimum_billing=0.0,
-    ticket_medio=0.0,
-    taxa_conversao_vendas=0.0,
-    comissao_vendas=0.0,
-):
-    """
-    Executa uma simulação completa para um dado cenário.
-    """
-    # 1. Calcular a quantidade de eventos em cada etapa do funil
-    num_replies = total_leads * rates["response"]
-    num_no_replies = total_leads - num_replies
-    num_qualified = num_replies * rates["qualification"]
-    num_booked = num_qualified * rates["booking"]
-
-    # 2. Calcular o custo de cada componente
-    # Custo base: leads que não responderam
-    cost_no_reply = num_no_replies * pricing_tables["no_reply"].iloc[0]["Valor"]
-
-    # Custo dos leads que responderam (substitui o custo de R$0,20)
-    cost_replies = calculate_tiered_cost(num_replies, pricing_tables["leads"])
-
-    # Custos adicionais para eventos de sucesso
-    cost_qualified = calculate_tiered_cost(num_qualified, pricing_tables["qualified"])
-    cost_booked = calculate_tiered_cost(num_booked, pricing_tables["booked"])
-
-    # 3. Calcular comissão de vendas
-    # Número de vendas = reuniões agendadas * taxa de conversão de vendas
-    num_vendas = num_booked * taxa_conversao_vendas
-    # Comissão = número de vendas * ticket médio * taxa de comissão
-    cost_comissao = num_vendas * ticket_medio * comissao_vendas
-
-    # 4. Calcular o custo total e métricas
-    calculated_cost = (
-        cost_no_reply + cost_replies + cost_qualified + cost_booked + cost_comissao
-    )
+# --- Pré-cálculo Especulativo ---
+# Segundos de CPU por rodada para pré-calcular os passos vizinhos dos sliders
+SPECULATIVE_CPU_BUDGET_S = 0.5
 
-    # Aplicar consumo mínimo
-    total_cost = max(calculated_cost, minimum_billing)
-
-    cpl = total_cost / total_leads if total_leads > 0 else 0
-    cpa = total_cost / num_booked if num_booked > 0 else 0
-
-    # Separar custos: leads processados (com resposta) e success fees puros
-    # POC: 2.000 leads processados inclusos, success fees sempre adicionais
-    cost_leads_processados = cost_replies  # Custo por lead com resposta
-    success_fees_puros = (
-        cost_qualified + cost_booked + cost_comissao
-    )  # Qualificação, avanço, comissão
-
-    return {
-        "total_leads": total_leads,
-        "num_no_replies": num_no_replies,
-        "num_replies": num_replies,
-        "num_qualified": num_qualified,
-        "num_booked": num_booked,
-        "num_vendas": num_vendas,
-        "cost_no_reply": cost_no_reply,
-        "cost_replies": cost_replies,
-        "cost_leads_processados": cost_leads_processados,
-        "success_fees_puros": success_fees_puros,
-        "cost_qualified": cost_qualified,
-        "cost_booked": cost_booked,
-        "cost_comissao": cost_comissao,
-        "calculated_cost": calculated_cost,
-        "total_cost": total_cost,
-        "cpl": cpl,
-        "cpa": cpa,
-    }
+# --- Volume de Leads ---
+# Slider e varreduras padrão vão até SWEEP_MAX_LEADS; o modo enterprise aceita até
+# ENTERPRISE_MAX_LEADS, com varreduras log-espaçadas (mais os pontos de quebra)
+SWEEP_MAX_LEADS = 5000
+ENTERPRISE_MAX_LEADS = 50_000_000
+ENTERPRISE_SWEEP_POINTS = 400
 
+# --- Cenários Salvos ---
+# Arquivo local com os cenários nomeados (relativo à pasta de execução, como o logo)
+SCENARIOS_PATH = "cenarios.json"
 
-# --- Paleta de Cores ---
-BRAND_COLOR = "#39B5FF"  # Cor principal da marca
-LIGHT_BLUE_1 = "#A8DAFF"  # Azul claro 1
-LIGHT_BLUE_2 = "#70C7FF"  # Azul claro 2
-LIGHT_BLUE_3 = "#D4EDFF"  # Azul muito claro
-GRAY_1 = "#9E9E9E"  # Cinza médio
-GRAY_2 = "#BDBDBD"  # Cinza claro
-GRAY_3 = "#E0E0E0"  # Cinza muito claro
-GRAY_4 = "#424242"  # Cinza escuro
+# --- Dados do Cliente TotalPass ---
+# Em pricing/clients/totalpass.json (TOTALPASS_DATA), com as tabelas de preços em
+# pricing/plans/totalpass.json: edições nos arquivos valem na próxima execução
 
 # --- Interface do Usuário (UI) ---
 
@@ -179,20 +73,7 @@ with hero_col2:
         unsafe_allow_html=True,
     )
 
-with hero_col3:
-    custo_vendedor = (
-        TOTALPASS_DATA["comp_total_medio"] * TOTALPASS_DATA["multiplicador_encargos"]
-    )
-    custo_time = custo_vendedor * TOTALPASS_DATA["num_vendedores"]
-    st.markdown(
-        f"""
-        <div style="background: linear-gradient(135deg, #26de81 0%, #20bf6b 100%); padding: 20px; border-radius: 12px; text-align: center; color: white;">
-            <h1 style="margin: 0; font-size: 2.5rem;">R$ {custo_time / 1000:.0f}k</h1>
-            <p style="margin: 5px 0 0 0; opacity: 0.9;">custo mensal do time de vendas (10 pessoas)</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+# hero_col3 (custo do time) é preenchida depois dos imports, com os dados do cliente
 
 st.markdown("")
 
@@ -345,14 +226,200 @@ with st.expander(
         | **Total** | **500 leads** | - | **2.300** |
         
         *Quanto mais volume, mais leads entram nas faixas com menor preço!*
+        
+        No modo **Volume (todas as unidades)**, configurável na barra lateral, todo o volume paga o preço
+        da faixa atingida: 500 leads × 4,00 = **2.000**. Cada etapa também aceita teto e piso de custo.
         """
     )
 
 st.divider()
 
+# --- Imports Adiados ---
+# O hero acima é enviado ao navegador antes destes imports. Plotly e os módulos de
+# varredura (comparação, ajuste de tabelas) só são importados nas seções que os
+# usam, abaixo das métricas principais. Meça com `python tools/startup_benchmark.py`.
+import numpy as np
+import pandas as pd
+
+from pricing import compile_pricing, run_simulation, simulate_batch
+from pricing.cache import (
+    ResultCache,
+    footprint,
+    normalize_inputs,
+    simulation_key,
+)
+from pricing.defaults import current_defaults
+from pricing.engine import funnel_volumes, lead_breakpoints, volume_grid
+from pricing.charts import (
+    BRAND_COLOR,
+    COST_COLORS,
+    GRAY_1,
+    GRAY_2,
+    GRAY_3,
+    GRAY_4,
+    LIGHT_BLUE_1,
+    LIGHT_BLUE_2,
+    LIGHT_BLUE_3,
+    SCENARIO_COLORS,
+    build_allocation_figure,
+    build_compare_volume_figure,
+    build_cost_pie,
+    build_delta_heatmap,
+    build_frontier_figure,
+    build_projection_figure,
+    build_volume_delta_figure,
+    build_volume_figure,
+)
+from pricing.figures import as_figure, cached_figure
+from pricing.speculative import (
+    Prefetcher,
+    neighbor_moves,
+    speculative_jobs,
+    track_sliders,
+)
+from pricing.plan import plan_for
+from pricing.projection import breakeven_month, payback_months, project_months
+from pricing.schedules import schedule_to_frame
+
+# Tabelas padrão e dados do cliente vigiados no disco: um arquivo alterado é relido
+# (só as etapas que mudaram são recompiladas) e vale a partir desta execução
+defaults = current_defaults()
+DEFAULT_TABLES = defaults.tables
+DEFAULT_PRICING = defaults.pricing
+TOTALPASS_DATA = defaults.client
+
+with hero_col3:
+    custo_vendedor = (
+        TOTALPASS_DATA["comp_total_medio"] * TOTALPASS_DATA["multiplicador_encargos"]
+    )
+    custo_time = custo_vendedor * TOTALPASS_DATA["num_vendedores"]
+    st.markdown(
+        f"""
+        <div style="background: linear-gradient(135deg, #26de81 0%, #20bf6b 100%); padding: 20px; border-radius: 12px; text-align: center; color: white;">
+            <h1 style="margin: 0; font-size: 2.5rem;">R$ {custo_time / 1000:.0f}k</h1>
+            <p style="margin: 5px 0 0 0; opacity: 0.9;">custo mensal do time de vendas ({TOTALPASS_DATA["num_vendedores"]} pessoas)</p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
 # --- Barra Lateral de Configurações ---
-st.sidebar.image("LOGO-COR.png", width=200)
+# Logo como data URL da versão já em 200px do LOGO-COR.png: o Streamlit repassa
+# URLs direto ao navegador, sem abrir/redimensionar o PNG com PIL a cada execução
+with open("LOGO-COR-200.png", "rb") as logo_file:
+    logo_url = "data:image/png;base64," + base64.b64encode(logo_file.read()).decode()
+st.sidebar.image(logo_url, width=200)
 st.sidebar.header("⚙️ Configure a Simulação")
+for reload_error in defaults.errors:
+    st.sidebar.error(f"Arquivo rejeitado, versão anterior mantida: {reload_error}")
+
+# Calibração com eventos reais: as taxas medidas viram os valores iniciais dos sliders
+eventos_calibrados = None
+segmento_calibrado = None
+calibracao = None
+with st.sidebar.expander("📥 Calibrar com Dados Reais", expanded=False):
+    st.caption(
+        "Exportação de eventos do CRM/WhatsApp (CSV ou Parquet) com colunas de "
+        "evento (send/reply/qualified/booked/sold), data e, opcionalmente, segmento. "
+        "O arquivo é lido em blocos, com memória limitada."
+    )
+    events_file = st.file_uploader(
+        "Eventos de leads", type=["csv", "parquet"], key="events_file"
+    )
+    if events_file is not None:
+        from pricing.ingest import ALL_SEGMENTS, ingest_events
+
+        # Lido uma vez por arquivo; as execuções seguintes reaproveitam as contagens
+        ingestion = st.session_state.get("event_ingestion")
+        if ingestion is None or ingestion[0] != events_file.file_id:
+            events_file.seek(0)
+            try:
+                with st.spinner("Lendo eventos..."):
+                    ingestion = (events_file.file_id, ingest_events(events_file))
+            except (ValueError, ImportError) as exc:
+                st.error(f"Exportação inválida: {exc}")
+                ingestion = None
+            st.session_state["event_ingestion"] = ingestion
+        if ingestion is not None:
+            eventos_calibrados = ingestion[1]
+            segmento_calibrado = st.selectbox(
+                "Segmento",
+                [ALL_SEGMENTS, *eventos_calibrados.segments],
+                key="events_segment",
+            )
+            calibracao = eventos_calibrados.calibrated_rates(segmento_calibrado)
+            st.caption(
+                f"{eventos_calibrados.rows:,} eventos em {eventos_calibrados.seconds:.1f} s "
+                f"({eventos_calibrados.rows_per_second:,.0f} linhas/s) | "
+                f"{calibracao['sends']:,} disparos | resposta {calibracao['response']:.1%} | "
+                f"qualificação {calibracao['qualification']:.1%} | "
+                f"avanço {calibracao['booking']:.1%}"
+            )
+            funil_mensal = eventos_calibrados.funnel(segment=segmento_calibrado)
+            st.dataframe(
+                funil_mensal[["mes", "segmento", "send", "response", "qualification", "booking"]]
+                .rename(
+                    columns={
+                        "mes": "Mês",
+                        "segmento": "Segmento",
+                        "send": "Disparos",
+                        "response": "Resposta",
+                        "qualification": "Qualificação",
+                        "booking": "Avanço",
+                    }
+                )
+                .style.format(
+                    {"Resposta": "{:.1%}", "Qualificação": "{:.1%}", "Avanço": "{:.1%}"}
+                ),
+                hide_index=True,
+            )
+
+
+def calibrated_percent(rate, default):
+    """Taxa calibrada (%) para o valor inicial de um slider, ou o padrão"""
+    if calibracao is None or not np.isfinite(calibracao[rate]):
+        return default
+    return round(calibracao[rate] * 100, 1)
+
+
+# Valores iniciais dos widgets com chave (cenários salvos são carregados por ela).
+# Um widget com chave ignora um `value=` novo: com uma calibração nova (arquivo e
+# segmento) os sliders das taxas recebem os valores calibrados, e dados do cliente
+# recarregados do disco substituem os anteriores, direto no session_state
+CALIBRATED_SLIDERS = {
+    "response": "response_rate",
+    "qualification": "qualification_rate",
+    "booking": "booking_rate",
+    "sales": "sales_rate",
+}
+sidebar_defaults = {
+    "response_rate": calibrated_percent("response", 45.0),
+    "qualification_rate": calibrated_percent("qualification", 25.0),
+    "booking_rate": calibrated_percent("booking", 30.0),
+    "sales_rate": calibrated_percent(
+        "sales", float(TOTALPASS_DATA["taxa_conversao_atual"] * 100)
+    ),
+    "ticket_medio_mensal": float(TOTALPASS_DATA["ticket_medio"]),
+    "ltv_dias": int(TOTALPASS_DATA["ltv_dias"]),
+}
+calibration_id = (
+    None
+    if calibracao is None
+    else (st.session_state["event_ingestion"][0], segmento_calibrado)
+)
+applied_defaults = st.session_state.get("applied_defaults")
+if applied_defaults is not None:
+    recalibrated = applied_defaults["calibration"] != calibration_id
+    for widget_key, default in sidebar_defaults.items():
+        changed = applied_defaults["values"][widget_key] != default
+        if changed or (recalibrated and widget_key in CALIBRATED_SLIDERS.values()):
+            st.session_state[widget_key] = default
+st.session_state["applied_defaults"] = {
+    "calibration": calibration_id,
+    "values": sidebar_defaults,
+}
+
 
 st.sidebar.subheader("🎯 Cenário de Simulação")
 
@@ -362,14 +429,31 @@ st.sidebar.caption(
     f"~{int(TOTALPASS_DATA['volume_leads_mes'] * TOTALPASS_DATA['leads_abandonados_pct']):,} abandonados"
 )
 
-target_total_leads = st.sidebar.slider(
-    "Quantidade de Leads a serem processados",
-    min_value=0,
-    max_value=5000,
-    value=2000,
-    step=100,
-    help="Recomendamos iniciar com 1.000-2.000 leads para a POC",
+enterprise_mode = st.sidebar.toggle(
+    "🏢 Modo enterprise",
+    key="enterprise_mode",
+    help=f"Volumes até {ENTERPRISE_MAX_LEADS:,} leads; varreduras em escala log com os pontos de quebra exatos das faixas",
 )
+if enterprise_mode:
+    target_total_leads = st.sidebar.number_input(
+        "Quantidade de Leads a serem processados",
+        min_value=0,
+        max_value=ENTERPRISE_MAX_LEADS,
+        value=100_000,
+        step=10_000,
+        help="Contas grandes: o custo é calculado por faixa, qualquer que seja o volume",
+        key="total_leads_enterprise",
+    )
+else:
+    target_total_leads = st.sidebar.slider(
+        "Quantidade de Leads a serem processados",
+        min_value=0,
+        max_value=SWEEP_MAX_LEADS,
+        value=2000,
+        step=100,
+        help="Recomendamos iniciar com 1.000-2.000 leads para a POC",
+        key="total_leads",
+    )
 
 # Colunas para organizar as taxas de conversão
 col1, col2 = st.sidebar.columns(2)
@@ -378,10 +462,11 @@ target_response_rate = (
         "Taxa de Resposta (%)",
         min_value=0.0,
         max_value=100.0,
-        value=45.0,
+        value=sidebar_defaults["response_rate"],
         step=0.5,
         format="%.1f%%",
         help="Expectativa conservadora para WhatsApp",
+        key="response_rate",
     )
     / 100.0
 )
@@ -391,10 +476,11 @@ target_qualification_rate = (
         "Taxa de Qualificação (% de Respostas)",
         min_value=0.0,
         max_value=100.0,
-        value=25.0,
+        value=sidebar_defaults["qualification_rate"],
         step=0.5,
         format="%.1f%%",
         help="Leads que avançam para qualificação",
+        key="qualification_rate",
     )
     / 100.0
 )
@@ -404,10 +490,11 @@ target_booking_rate = (
         "Taxa de Avanço/Agendamento (%)",
         min_value=0.0,
         max_value=100.0,
-        value=30.0,
+        value=sidebar_defaults["booking_rate"],
         step=0.5,
         format="%.1f%%",
         help="SMB: avanço para cotação | +20 vidas: agendamento de reunião",
+        key="booking_rate",
     )
     / 100.0
 )
@@ -421,6 +508,7 @@ minimum_billing = st.sidebar.number_input(
     value=2997.0,
     step=100.0,
     help="Valor mínimo mensal garantido para manter a operação",
+    key="minimum_billing",
 )
 
 # Comissão de Vendas
@@ -431,18 +519,20 @@ ticket_medio_mensal = st.sidebar.number_input(
     "Ticket Médio Mensal (R$)",
     min_value=0.0,
     max_value=10000.0,
-    value=TOTALPASS_DATA["ticket_medio"],
+    value=sidebar_defaults["ticket_medio_mensal"],
     step=50.0,
     help="Valor médio mensal de cada venda TotalPass (SMB 5-20 vidas)",
+    key="ticket_medio_mensal",
 )
 
 ltv_dias = st.sidebar.number_input(
     "LTV (dias)",
     min_value=30,
     max_value=730,
-    value=int(TOTALPASS_DATA["ltv_dias"]),
+    value=sidebar_defaults["ltv_dias"],
     step=10,
     help="Lifetime Value médio do cliente em dias",
+    key="ltv_dias",
 )
 
 # Calcular LTV em valor monetário
@@ -460,10 +550,11 @@ taxa_conversao_vendas = (
         "Taxa de Conversão de Vendas (%)",
         min_value=0.0,
         max_value=100.0,
-        value=float(TOTALPASS_DATA["taxa_conversao_atual"] * 100),
+        value=sidebar_defaults["sales_rate"],
         step=1.0,
         format="%.0f%%",
         help=f"Taxa atual TotalPass: {TOTALPASS_DATA['taxa_conversao_atual'] * 100:.1f}%",
+        key="sales_rate",
     )
     / 100.0
 )
@@ -477,6 +568,7 @@ comissao_vendas = (
         step=5.0,
         format="%.0f%%",
         help="Porcentagem da primeira mensalidade por venda fechada",
+        key="comissao_vendas",
     )
     / 100.0
 )
@@ -515,7 +607,7 @@ def format_price_table(df, show_ranges=True):
         df_display = df.copy()
         faixas = []
         for _, row in df_display.iterrows():
-            if row["Máximo"] >= 99999:
+            if pd.isna(row["Máximo"]):
                 faixa = f"{int(row['Mínimo']):,}+"
             else:
                 faixa = f"{int(row['Mínimo']):,} - {int(row['Máximo']):,}"
@@ -531,15 +623,55 @@ def format_price_table(df, show_ranges=True):
         return df_display
 
 
+# --- Modo de cobrança, teto e piso de cada tabela ---
+PRICING_MODE_LABELS = {
+    "graduated": "Escalonado (por faixa)",
+    "all_units": "Volume (todas as unidades)",
+}
+
+
+def pricing_rules_inputs(stage):
+    """Widgets de modo de cobrança, teto e piso de uma etapa; {} se tudo no padrão"""
+    mode = st.selectbox(
+        "Modo de cobrança",
+        options=list(PRICING_MODE_LABELS),
+        format_func=PRICING_MODE_LABELS.get,
+        key=f"{stage}_mode",
+        help="Escalonado: cada unidade paga o preço da sua faixa. Volume: todas as unidades pagam o preço da faixa atingida pelo total.",
+    )
+    cap_col, floor_col = st.columns(2)
+    cap = cap_col.number_input(
+        "Teto (R$)",
+        min_value=0.0,
+        value=0.0,
+        step=100.0,
+        key=f"{stage}_cap",
+        help="Custo máximo da etapa no mês (0 = sem teto)",
+    )
+    floor = floor_col.number_input(
+        "Piso (R$)",
+        min_value=0.0,
+        value=0.0,
+        step=100.0,
+        key=f"{stage}_floor",
+        help="Custo mínimo da etapa no mês (0 = sem piso)",
+    )
+    if mode == "graduated" and not cap and not floor:
+        return {}
+    return {"mode": mode, "cap": cap, "floor": floor}
+
+
 # --- Tabelas de Preços Configuráveis ---
 st.sidebar.subheader("💰 Tabelas de Preços")
+# Tabelas carregadas pelo ajuste automático substituem as padrão
+pricing_overrides = st.session_state.setdefault("pricing_overrides", {})
 st.sidebar.caption("Configure as faixas de preço por volume (preços escalonados)")
 
 with st.sidebar.expander("📧 Custo por Disparo (pós-POC)", expanded=False):
     st.caption(
         "Custo fixo por lead contactado sem resposta (não aplicável durante POC)"
     )
-    df_no_reply = pd.DataFrame([{"Valor": 0.20}])
+    df_no_reply = DEFAULT_TABLES["no_reply"]
     df_no_reply_display = format_price_table(df_no_reply, show_ranges=False)
     st.dataframe(
         df_no_reply_display,
@@ -553,19 +685,7 @@ with st.sidebar.expander("📧 Custo por Disparo (pós-POC)", expanded=False):
 
 with st.sidebar.expander("💬 Custo por Lead Processado", expanded=False):
     st.caption("5,00 → 2,50 reais (POC: 2.000 total inclusos no setup)")
-    df_leads = pd.DataFrame(
-        [
-            {"Mínimo": 0, "Máximo": 300, "Valor": 5.00},
-            {"Mínimo": 300, "Máximo": 800, "Valor": 4.00},
-            {"Mínimo": 800, "Máximo": 1500, "Valor": 3.50},
-            {"Mínimo": 1500, "Máximo": 2500, "Valor": 3.00},
-            {
-                "Mínimo": 2500,
-                "Máximo": 99999,
-                "Valor": 2.50,
-            },  # Máximo alto para pegar todos os excedentes
-        ]
-    )
+    df_leads = pricing_overrides.get("leads", DEFAULT_TABLES["leads"])
     if ENABLE_PRICE_EDITING:
         edited_df_leads = st.data_editor(
             df_leads,
@@ -584,6 +704,7 @@ with st.sidebar.expander("💬 Custo por Lead Processado", expanded=False):
             },
             hide_index=True,
         )
+        leads_rules = pricing_rules_inputs("leads")
     else:
         df_leads_display = format_price_table(df_leads, show_ranges=True)
         st.dataframe(
@@ -596,17 +717,11 @@ with st.sidebar.expander("💬 Custo por Lead Processado", expanded=False):
             },
         )
         edited_df_leads = df_leads
+        leads_rules = {}
 
 with st.sidebar.expander("✅ Custo por Lead Qualificado", expanded=False):
     st.caption("15 → 5 reais (quanto mais qualificados, menor o custo)")
-    df_qualified = pd.DataFrame(
-        [
-            {"Mínimo": 0, "Máximo": 75, "Valor": 15.00},
-            {"Mínimo": 75, "Máximo": 150, "Valor": 12.00},
-            {"Mínimo": 150, "Máximo": 300, "Valor": 8.00},
-            {"Mínimo": 300, "Máximo": 99999, "Valor": 5.00},
-        ]
-    )
+    df_qualified = pricing_overrides.get("qualified", DEFAULT_TABLES["qualified"])
     if ENABLE_PRICE_EDITING:
         edited_df_qualified = st.data_editor(
             df_qualified,
@@ -625,6 +740,7 @@ with st.sidebar.expander("✅ Custo por Lead Qualificado", expanded=False):
             },
             hide_index=True,
         )
+        qualified_rules = pricing_rules_inputs("qualified")
     else:
         df_qualified_display = format_price_table(df_qualified, show_ranges=True)
         st.dataframe(
@@ -637,17 +753,11 @@ with st.sidebar.expander("✅ Custo por Lead Qualificado", expanded=False):
             },
         )
         edited_df_qualified = df_qualified
+        qualified_rules = {}
 
 with st.sidebar.expander("📈 Custo por Lead Avançado", expanded=False):
     st.caption("80 → 40 reais (quanto mais avanços, menor o custo)")
-    df_booked = pd.DataFrame(
-        [
-            {"Mínimo": 0, "Máximo": 30, "Valor": 80.00},
-            {"Mínimo": 30, "Máximo": 60, "Valor": 60.00},
-            {"Mínimo": 60, "Máximo": 100, "Valor": 50.00},
-            {"Mínimo": 100, "Máximo": 99999, "Valor": 40.00},
-        ]
-    )
+    df_booked = pricing_overrides.get("booked", DEFAULT_TABLES["booked"])
     if ENABLE_PRICE_EDITING:
         edited_df_booked = st.data_editor(
             df_booked,
@@ -666,6 +776,7 @@ with st.sidebar.expander("📈 Custo por Lead Avançado", expanded=False):
             },
             hide_index=True,
         )
+        booked_rules = pricing_rules_inputs("booked")
     else:
         df_booked_display = format_price_table(df_booked, show_ranges=True)
         st.dataframe(
@@ -680,6 +791,7 @@ with st.sidebar.expander("📈 Custo por Lead Avançado", expanded=False):
             },
         )
         edited_df_booked = df_booked
+        booked_rules = {}
 
 
 # --- Coleta dos dados para a simulação ---
@@ -694,6 +806,307 @@ pricing_tables = {
     "qualified": edited_df_qualified,
     "booked": edited_df_booked,
 }
+# Modo de cobrança, teto e piso das etapas que saem do padrão (escalonado, sem limites)
+pricing_rules = {
+    stage: rules
+    for stage, rules in (
+        ("leads", leads_rules),
+        ("qualified", qualified_rules),
+        ("booked", booked_rules),
+    )
+    if rules
+}
+if pricing_rules:
+    pricing_tables["rules"] = pricing_rules
+# Tabelas compiladas uma vez por execução e reutilizadas por todas as simulações;
+# com o mesmo conteúdo das padrão (o data_editor sempre devolve uma cópia), as
+# tabelas padrão já compiladas e compartilhadas entre sessões são usadas
+compiled_pricing = compile_pricing(pricing_tables)
+if compiled_pricing.fingerprint == DEFAULT_PRICING.fingerprint:
+    compiled_pricing = DEFAULT_PRICING
+
+# Itens acima do 'Máximo' da última faixa não são cobrados: avisa se o target passa dele
+# (deixe o 'Máximo' da última faixa vazio para uma faixa aberta)
+target_replies, _, target_qualified, target_booked = funnel_volumes(
+    target_total_leads, target_response_rate, target_qualification_rate, target_booking_rate
+)
+for stage_label, schedule, quantity in (
+    ("Lead Processado", compiled_pricing.leads, target_replies),
+    ("Lead Qualificado", compiled_pricing.qualified, target_qualified),
+    ("Lead Avançado", compiled_pricing.booked, target_booked),
+):
+    last_max = schedule.maxs.max() if schedule.maxs.size else np.inf
+    if quantity > last_max:
+        st.sidebar.warning(
+            f"{stage_label}: {float(quantity - last_max):,.0f} itens acima da última faixa "
+            f"({last_max:,.0f}) não são cobrados"
+        )
+
+
+def sweep_volumes(step=100, rate_sets=None):
+    """
+    Volumes das varreduras: de 0 a SWEEP_MAX_LEADS em passos de `step` ou, no
+    modo enterprise, log-espaçados até ENTERPRISE_MAX_LEADS mais os volumes em
+    que as tabelas mudam de faixa com as taxas de `rate_sets` (padrão: target)
+    """
+    if not enterprise_mode:
+        return volume_grid(SWEEP_MAX_LEADS, step)
+    if rate_sets is None:
+        rate_sets = [(target_response_rate, target_qualification_rate, target_booking_rate)]
+    breakpoints = np.concatenate(
+        [lead_breakpoints(compiled_pricing, *rate_set) for rate_set in rate_sets]
+    )
+    return volume_grid(
+        ENTERPRISE_MAX_LEADS, log_points=ENTERPRISE_SWEEP_POINTS, breakpoints=breakpoints
+    )
+
+
+# Varreduras da sessão, reaproveitadas entre execuções enquanto as entradas não mudam
+result_cache = st.session_state.setdefault(
+    "result_cache", ResultCache(SESSION_MEMORY_CAP_MB * 1e6)
+)
+# Fingerprint do plano com as tabelas: muda com qualquer tabela ou regra de cobrança
+pricing_fingerprint = plan_for(compiled_pricing).fingerprint
+# Nova versão dos arquivos: descarta só o que foi calculado com as tabelas anteriores
+seen_version = st.session_state.setdefault("defaults_version", defaults.version)
+if seen_version != defaults.version:
+    previous_fingerprint = st.session_state.get("pricing_fingerprint")
+    if previous_fingerprint != pricing_fingerprint:
+        result_cache.discard_fingerprint(previous_fingerprint)
+    if defaults.recompiled:
+        st.toast(f"Tabelas de preços atualizadas: {', '.join(defaults.recompiled)}")
+    st.session_state["defaults_version"] = defaults.version
+st.session_state["pricing_fingerprint"] = pricing_fingerprint
+prefetcher = st.session_state.setdefault(
+    "prefetcher", Prefetcher(result_cache, SPECULATIVE_CPU_BUDGET_S)
+)
+# Esta execução tem prioridade sobre o pré-cálculo agendado pela anterior
+prefetcher.cancel()
+simulation_params = (
+    minimum_billing,
+    ticket_medio,
+    taxa_conversao_vendas,
+    comissao_vendas,
+)
+# Chamadas desta execução, repetidas em segundo plano para os passos vizinhos
+simulation_calls = []
+
+
+def cached_simulation(
+    total_leads, response, qualification, booking, with_gradients=False
+):
+    """`simulate_batch` com as tabelas e parâmetros atuais, via cache da sessão"""
+    inputs = normalize_inputs((total_leads, response, qualification, booking))
+    simulation_calls.append((inputs, with_gradients))
+    key = simulation_key(pricing_fingerprint, inputs, simulation_params, with_gradients)
+    return result_cache.get_or_compute(
+        key,
+        lambda: simulate_batch(
+            *inputs,
+            compiled_pricing,
+            *simulation_params,
+            with_gradients=with_gradients,
+        ),
+    )
+
+
+# --- Figuras (dicionários no formato JSON do Plotly, com cache por conteúdo) ---
+def show_figure(build, *args, log_x=False, **kwargs):
+    """
+    Exibe a figura de `build(*args, **kwargs)`, remontada só quando os argumentos
+    mudam; `log_x` põe o eixo x em escala log (varreduras do modo enterprise)
+    """
+    st.plotly_chart(
+        as_figure(
+            cached_figure(result_cache, build, *args, **kwargs),
+            xaxis_type="log" if log_x else None,
+        ),
+        use_container_width=True,
+    )
+
+
+def marginal_curves(sweeps):
+    """Só as colunas usadas no gráfico de custo marginal (chave de cache menor)"""
+    return {
+        name: {
+            "marginal_cost": sweep["marginal_cost"],
+            "average_cost": sweep["average_cost"],
+        }
+        for name, sweep in sweeps.items()
+    }
+
+
+# --- Gráfico de custo marginal vs custo médio ---
+def build_marginal_average_figure(lead_volumes, curves, legend_title):
+    """Custo marginal (próximo lead) e custo médio por lead ao longo do volume"""
+    data = []
+    for idx, (scenario_name, curve) in enumerate(curves.items()):
+        is_target = "Target" in scenario_name
+        color = SCENARIO_COLORS[idx] if idx < len(SCENARIO_COLORS) else BRAND_COLOR
+        data.append(
+            line_trace(
+                lead_volumes,
+                curve["marginal_cost"],
+                mode="lines",
+                name=f"Marginal {scenario_name}",
+                line=dict(
+                    shape="hv",
+                    width=3 if is_target else 1.5,
+                    dash="solid" if is_target else "dot",
+                    color=color,
+                ),
+            )
+        )
+        if is_target:
+            data.append(
+                line_trace(
+                    lead_volumes,
+                    curve["average_cost"],
+                    mode="lines",
+                    name=f"Médio {scenario_name}",
+                    line=dict(width=3, dash="dash", color=GRAY_4),
+                )
+            )
+
+    return dict(
+        data=data,
+        layout=dict(
+            title=dict(text="Custo Marginal vs Custo Médio por Lead"),
+            xaxis=dict(title=dict(text="Quantidade de Leads Processados")),
+            yaxis=dict(title=dict(text="Custo por Lead (R$)")),
+            legend=dict(title=dict(text=legend_title)),
+            hovermode="x unified",
+        ),
+    )
+
+
+def build_price_preview_figure(lead_volumes, current, previews, target_leads, target_cost):
+    """Custo total por volume com as tabelas atuais e com as edições em prévia"""
+    data = [
+        line_trace(
+            lead_volumes,
+            current,
+            mode="lines",
+            name="Tabelas Atuais",
+            line=dict(width=4, color=BRAND_COLOR),
+        )
+    ]
+    for idx, (name, costs) in enumerate(previews.items()):
+        data.append(
+            line_trace(
+                lead_volumes,
+                costs,
+                mode="lines",
+                name=name,
+                line=dict(width=2.5, dash="dot", color=SCENARIO_COLORS[idx]),
+            )
+        )
+    data.append(
+        dict(
+            type="scatter",
+            x=[target_leads],
+            y=[target_cost],
+            mode="markers",
+            marker=dict(size=12, color="red", symbol="star"),
+            name="Seu Cenário Atual",
+        )
+    )
+    return dict(
+        data=data,
+        layout=dict(
+            title=dict(text="Prévia: Custo Total por Volume"),
+            xaxis=dict(title=dict(text="Quantidade de Leads Processados")),
+            yaxis=dict(title=dict(text="Custo Total (R$)")),
+            hovermode="x unified",
+        ),
+    )
+
+
+def build_scenarios_figure(lead_volumes, names, curves, target_leads, target_values, y_title):
+    """Uma curva por cenário salvo (taxas e tabelas próprias), com o ponto de cada cenário"""
+    palette = [BRAND_COLOR, GRAY_1, LIGHT_BLUE_2, GRAY_4, LIGHT_BLUE_1, GRAY_2]
+    data = []
+    for idx, name in enumerate(names):
+        color = palette[idx % len(palette)]
+        is_current = idx == 0
+        data.append(
+            line_trace(
+                lead_volumes,
+                curves[idx],
+                mode="lines",
+                name=name,
+                legendgroup=name,
+                line=dict(
+                    width=4 if is_current else 2.5,
+                    dash="solid" if is_current else "dot",
+                    color=color,
+                ),
+            )
+        )
+        data.append(
+            dict(
+                type="scatter",
+                x=[target_leads[idx]],
+                y=[target_values[idx]],
+                mode="markers",
+                marker=dict(size=11, color=color, symbol="star"),
+                name=name,
+                legendgroup=name,
+                showlegend=False,
+            )
+        )
+    return dict(
+        data=data,
+        layout=dict(
+            xaxis=dict(title=dict(text="Quantidade de Leads Processados")),
+            yaxis=dict(title=dict(text=y_title)),
+            legend=dict(title=dict(text="Cenário")),
+            hovermode="x unified",
+        ),
+    )
+
+
+def build_matrix_figure(
+    z, text_values, text_format, colorscale, colorbar_title, hover, title, x, y, target
+):
+    """Heatmap da matriz de sensibilidade com o cenário target marcado"""
+    fig = heatmap_figure(
+        z,
+        x,
+        y,
+        colorscale,
+        colorbar_title,
+        f"Qualificação: %{{y:.2~f}}%<br>Agendamento: %{{x:.2~f}}%<br>{hover}",
+        text=[[text_format(val) for val in row] for row in text_values],
+    )
+    # Marcador do cenário target
+    fig["data"].append(
+        dict(
+            type="scatter",
+            x=[target[0]],
+            y=[target[1]],
+            mode="markers",
+            marker=dict(
+                size=20,
+                color=GRAY_4,
+                symbol="star",
+                line=dict(color="white", width=2),
+            ),
+            name="Seu Target",
+            showlegend=True,
+        )
+    )
+    layout = fig["layout"]
+    layout.update(title=dict(text=title), height=600)
+    for axis, axis_title in (
+        ("xaxis", "Taxa de Agendamento (% de Qualificados)"),
+        ("yaxis", "Taxa de Qualificação (% de Respostas)"),
+    ):
+        layout.setdefault(axis, {}).update(
+            title=dict(text=axis_title), ticksuffix="%"
+        )
+    return fig
+
 
 # --- Execução e Exibição dos Resultados ---
 if target_total_leads > 0:
@@ -701,7 +1114,7 @@ if target_total_leads > 0:
     target_results = run_simulation(
         target_total_leads,
         rates,
-        pricing_tables,
+        compiled_pricing,
         minimum_billing,
         ticket_medio,
         taxa_conversao_vendas,
@@ -804,10 +1217,96 @@ if target_total_leads > 0:
             help="Retorno considerando o valor total que os clientes trarão ao longo do tempo",
         )
 
-    # Projeção 12 meses - Receita Acumulada vs Custo Sailer
+    # Gráficos só a partir daqui: plotly fica fora do caminho até as métricas
+    from pricing.rendering import heatmap_figure, line_trace
+
+    # Série mensal prevista (sazonalidade): substitui o volume fixo na projeção
     st.divider()
 
-    st.subheader("📈 Projeção 12 Meses: Receita Acumulada vs Investimento")
+    from pricing.forecast import empty_forecast, forecast_inputs, read_forecast_csv
+
+    serie_mensal = None
+    with st.expander("📅 **Previsão Mensal de Volume (sazonalidade)**"):
+        st.markdown(
+            """
+            Informe o volume de leads de cada mês (e, se quiser, as taxas e a
+            cobrança mínima do mês) para a projeção abaixo usar a série em vez do
+            mesmo volume todo mês. Células vazias seguem a barra lateral.
+            O CSV precisa de uma coluna `Leads`; `Mês` (número ou rótulo, como
+            `2025-01`), `Resposta (%)`, `Qualificação (%)`, `Avanço (%)` e
+            `Cobrança Mínima (R$)` são opcionais. No formato automático, CSV com
+            `;` usa vírgula decimal (1.234,5) e com `,` usa ponto (1,234.5).
+            """
+        )
+        usar_serie = st.toggle("Usar a série mensal na projeção", key="use_forecast")
+        forecast_file = st.file_uploader(
+            "Série mensal (CSV)", type=["csv"], key="forecast_csv"
+        )
+        FORECAST_DECIMALS = {"Automático": None, "1.234,5": ",", "1,234.5": "."}
+        forecast_format = st.radio(
+            "Formato dos números do CSV",
+            list(FORECAST_DECIMALS),
+            horizontal=True,
+            key="forecast_decimal",
+        )
+        if eventos_calibrados is not None:
+            # Série medida nos eventos importados na barra lateral
+            serie_base = eventos_calibrados.forecast_frame(segmento_calibrado)
+            forecast_source = f"eventos_{segmento_calibrado}"
+        else:
+            serie_base = empty_forecast(target_total_leads)
+            forecast_source = "padrao"
+        if forecast_file is not None:
+            forecast_source = f"{forecast_file.file_id}_{FORECAST_DECIMALS[forecast_format]}"
+            try:
+                serie_base = read_forecast_csv(
+                    forecast_file, decimal=FORECAST_DECIMALS[forecast_format]
+                )
+            except ValueError as exc:
+                st.error(f"CSV inválido: {exc}")
+        # Editor novo a cada arquivo: edições de um CSV não vazam para o outro
+        serie_df = st.data_editor(
+            serie_base,
+            key=f"forecast_editor_{forecast_source}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                # Meses numerados ou rótulos do CSV ("2025-01", "jan/25")
+                "Mês": (
+                    st.column_config.NumberColumn(format="%d")
+                    if pd.api.types.is_numeric_dtype(serie_base["Mês"])
+                    else st.column_config.TextColumn()
+                ),
+                "Leads": st.column_config.NumberColumn(min_value=0, format="%d"),
+                "Cobrança Mínima (R$)": st.column_config.NumberColumn(
+                    min_value=0.0, format="R$ %.2f"
+                ),
+            },
+        )
+        if usar_serie:
+            try:
+                serie_mensal = forecast_inputs(
+                    serie_df,
+                    target_response_rate,
+                    target_qualification_rate,
+                    target_booking_rate,
+                    minimum_billing,
+                )
+            except ValueError as exc:
+                st.error(f"Série mensal inválida: {exc}")
+        if serie_mensal is not None:
+            st.caption(
+                f"{len(serie_mensal['mes'])} meses | "
+                f"{serie_mensal['total_leads'].sum():,.0f} leads no total | "
+                f"pico de {serie_mensal['total_leads'].max():,.0f} leads no mês "
+                f"{int(serie_mensal['total_leads'].argmax()) + 1}"
+            )
+
+    horizonte = 12 if serie_mensal is None else len(serie_mensal["mes"])
+
+    # Projeção mensal - Receita Acumulada vs Custo Sailer
+    st.subheader(f"📈 Projeção {horizonte} Meses: Receita Acumulada vs Investimento")
     st.markdown(
         """
         Estes leads **seriam perdidos sem a Tamires**. A receita gerada é **100% incremental**.
@@ -816,133 +1315,73 @@ if target_total_leads > 0:
     )
 
     # Calcular projeção mês a mês
-    # Cada mês gera novas vendas que pagam mensalidades durante o LTV
-    vendas_por_mes = target_results["num_vendas"]
-    meses_ltv = int(ltv_meses)
-
-    projecao_data = []
-    clientes_ativos = 0
-    receita_acumulada = 0
-    custo_sailer_acumulado = setup_fee  # Começa com o setup
-
-    # Custos separados para POC vs Pós-POC
-    cost_leads_processados = target_results["cost_leads_processados"]
-    success_fees_puros = target_results["success_fees_puros"]
-    num_leads_processados = target_results["num_replies"]
-
-    # Custo unitário por lead processado
-    custo_unitario_lead = (
-        cost_leads_processados / num_leads_processados
-        if num_leads_processados > 0
-        else 0
-    )
-
-    # Controle de leads inclusos no POC (2.000 total para todo o POC)
-    leads_poc_restantes = poc_leads_inclusos
-
-    for mes in range(1, 13):
-        # Novos clientes entram
-        clientes_ativos += vendas_por_mes
-
-        # Clientes saem após o LTV (simplificado)
-        if mes > meses_ltv:
-            clientes_ativos -= vendas_por_mes
-
-        # Limita ao máximo de clientes ativos baseado no LTV
-        clientes_ativos = min(clientes_ativos, vendas_por_mes * meses_ltv)
-
-        # Receita do mês = clientes ativos × ticket mensal
-        receita_mes = clientes_ativos * ticket_medio_mensal
-        receita_acumulada += receita_mes
-
-        # Custo Sailer: POC (meses 1-3) tem 2.000 leads processados inclusos NO TOTAL
-        if mes <= poc_meses:
-            # POC: usa os leads restantes do pacote incluso
-            leads_cobertos = min(num_leads_processados, leads_poc_restantes)
-            leads_excedentes = max(0, num_leads_processados - leads_cobertos)
-            leads_poc_restantes = max(0, leads_poc_restantes - num_leads_processados)
-
-            # Só paga pelos excedentes + success fees
-            custo_leads_excedentes = leads_excedentes * custo_unitario_lead
-            custo_mes = success_fees_puros + custo_leads_excedentes
-            fase = "POC"
-        else:
-            # Pós-POC: custo completo (leads processados + success fees) + mínimo
-            custo_mes = max(
-                cost_leads_processados + success_fees_puros, minimum_billing
-            )
-            fase = "Pós-POC"
-
-        custo_sailer_acumulado += custo_mes
-
-        projecao_data.append(
-            {
-                "Mês": mes,
-                "Fase": fase,
-                "Clientes Ativos": clientes_ativos,
-                "Receita Mensal": receita_mes,
-                "Custo Mensal": custo_mes,
-                "Receita Acumulada": receita_acumulada,
-                "Custo Sailer Acumulado": custo_sailer_acumulado,
-                "Lucro Acumulado": receita_acumulada - custo_sailer_acumulado,
-            }
+    # Cada mês gera novas vendas que pagam mensalidades durante o LTV; no POC
+    # (meses 1-3) os 2.000 leads processados inclusos valem para o POC TOTAL
+    if serie_mensal is None:
+        projecao = project_months(
+            target_results,
+            ticket_medio_mensal,
+            ltv_meses,
+            setup_fee,
+            poc_meses,
+            poc_leads_inclusos,
+            minimum_billing,
+            pricing=compiled_pricing,
+            comissao_vendas=comissao_vendas,
         )
-
-    projecao_df = pd.DataFrame(projecao_data)
-
-    # Gráfico de linha comparando receita acumulada vs custo Sailer
-    fig_projecao = go.Figure()
-
-    fig_projecao.add_trace(
-        go.Scatter(
-            x=projecao_df["Mês"],
-            y=projecao_df["Receita Acumulada"],
-            mode="lines+markers",
-            name="Receita Acumulada",
-            line=dict(color="#26de81", width=3),
-            fill="tozeroy",
-            fillcolor="rgba(38, 222, 129, 0.1)",
+    else:
+        # Um cenário por mês, simulado numa chamada só (eixo 0 = mês)
+        serie_results = simulate_batch(
+            serie_mensal["total_leads"],
+            serie_mensal["response"],
+            serie_mensal["qualification"],
+            serie_mensal["booking"],
+            compiled_pricing,
+            serie_mensal["minimum_billing"],
+            ticket_medio,
+            taxa_conversao_vendas,
+            comissao_vendas,
         )
-    )
-
-    fig_projecao.add_trace(
-        go.Scatter(
-            x=projecao_df["Mês"],
-            y=projecao_df["Custo Sailer Acumulado"],
-            mode="lines+markers",
-            name="Investimento Sailer",
-            line=dict(color="#39B5FF", width=3),
+        projecao = project_months(
+            serie_results,
+            ticket_medio_mensal,
+            ltv_meses,
+            setup_fee,
+            poc_meses,
+            poc_leads_inclusos,
+            serie_mensal["minimum_billing"],
+            pricing=compiled_pricing,
+            comissao_vendas=comissao_vendas,
+            monthly=True,
         )
+    projecao_df = pd.DataFrame(
+        {
+            "Mês": projecao["mes"],
+            "Fase": np.where(projecao["mes"] <= poc_meses, "POC", "Pós-POC"),
+            "Clientes Ativos": projecao["clientes_ativos"],
+            "Receita Mensal": projecao["receita_mensal"],
+            "Custo Mensal": projecao["custo_mensal"],
+            "Receita Acumulada": projecao["receita_acumulada"],
+            "Custo Sailer Acumulado": projecao["custo_acumulado"],
+            "Lucro Acumulado": projecao["lucro_acumulado"],
+        }
     )
 
     # Encontrar ponto de break-even
-    breakeven_mes = None
-    for _, row in projecao_df.iterrows():
-        if float(row["Lucro Acumulado"]) > 0:
-            breakeven_mes = int(row["Mês"])
-            break
-
-    if breakeven_mes is not None:
-        fig_projecao.add_vline(
-            x=breakeven_mes,
-            line_dash="dash",
-            line_color="gray",
-            annotation_text=f"Break-even: Mês {breakeven_mes}",
-            annotation_position="top",
-        )
-
-    fig_projecao.update_layout(
-        title="Receita Acumulada vs Investimento Sailer (12 meses)",
-        xaxis_title="Mês",
-        yaxis_title="Valor (R$)",
-        hovermode="x unified",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    )
+    breakeven_mes = breakeven_month(projecao["lucro_acumulado"])
+    breakeven_mes = None if np.isnan(breakeven_mes) else int(breakeven_mes)
 
     proj_col1, proj_col2 = st.columns([0.65, 0.35])
 
     with proj_col1:
-        st.plotly_chart(fig_projecao, use_container_width=True)
+        # Gráfico de linha comparando receita acumulada vs custo Sailer
+        show_figure(
+            build_projection_figure,
+            projecao["mes"],
+            projecao["receita_acumulada"],
+            projecao["custo_acumulado"],
+            breakeven_mes,
+        )
 
     with proj_col2:
         lucro_12_meses = projecao_df.iloc[-1]["Lucro Acumulado"]
@@ -955,7 +1394,7 @@ if target_total_leads > 0:
         st.markdown(
             f"""
             <div style="background: linear-gradient(135deg, #26de81 0%, #20bf6b 100%); padding: 20px; border-radius: 12px; text-align: center; color: white; margin-bottom: 15px;">
-                <p style="margin: 0; opacity: 0.9; font-size: 0.9rem;">Lucro Acumulado em 12 meses</p>
+                <p style="margin: 0; opacity: 0.9; font-size: 0.9rem;">Lucro Acumulado em {horizonte} meses</p>
                 <h2 style="margin: 10px 0;">R$ {lucro_12_meses:,.2f}</h2>
                 <p style="margin: 0; opacity: 0.8; font-size: 0.8rem;">ROI: {roi_12_meses:.0f}%</p>
             </div>
@@ -966,7 +1405,7 @@ if target_total_leads > 0:
         breakeven_text = f"Mês {breakeven_mes}" if breakeven_mes is not None else "N/A"
         st.markdown(
             f"""
-            **Resumo 12 meses:**
+            **Resumo {horizonte} meses:**
             - 📈 Receita total: **{receita_12_meses:,.2f} reais**
             - 💳 Investimento Sailer: **{custo_12_meses:,.2f} reais**
             - 🎯 Break-even: **{breakeven_text}**
@@ -1011,21 +1450,21 @@ if target_total_leads > 0:
             label="💳 Taxa de Setup",
             value=f"R$ {setup_fee:,.2f}",
         )
-        # Payback em meses baseado na receita mensal real (não LTV)
-        if receita_mensal > final_cost and receita_mensal > 0:
-            lucro_mensal = receita_mensal - final_cost
-            payback_meses = (
-                setup_fee / lucro_mensal if lucro_mensal > 0 else float("inf")
-            )
-            if payback_meses < 36:
-                st.metric(
-                    label="⏱️ Payback do Setup",
-                    value=f"{payback_meses:.1f} meses",
-                    delta=f"Lucro mensal: R$ {lucro_mensal:,.0f}",
-                    delta_color="off",
-                )
-        elif receita_mensal > 0:
-            st.caption(f"💡 Receita mensal: R$ {receita_mensal:,.2f}")
+        # Payback em meses baseado na receita mensal real (não LTV); sempre
+        # exibido, com "> 36 meses" além do horizonte e "N/A" sem lucro mensal
+        payback_meses = float(payback_months(receita_mensal, final_cost, setup_fee))
+        if np.isinf(payback_meses):
+            payback_label = "N/A"
+        elif payback_meses > 36:
+            payback_label = "> 36 meses"
+        else:
+            payback_label = f"{payback_meses:.1f} meses"
+        st.metric(
+            label="⏱️ Payback do Setup",
+            value=payback_label,
+            delta=f"Lucro mensal: R$ {receita_mensal - final_cost:,.0f}",
+            delta_color="off",
+        )
 
     # Separador visual
     st.divider()
@@ -1157,332 +1596,489 @@ if target_total_leads > 0:
         st.dataframe(formatted_cost_df, use_container_width=True)
 
     with col_pie:
-        # Cores do gráfico de pizza (incluindo cor para comissão e consumo mínimo se aplicável)
-        pie_colors = [
-            GRAY_3,
-            LIGHT_BLUE_3,
-            LIGHT_BLUE_2,
-            BRAND_COLOR,
-            "#FFB347",
-        ]  # Laranja para comissão
-        if has_minimum_charge:
-            pie_colors.append(GRAY_1)  # Cor para ajuste de consumo mínimo
-
-        fig_pie = go.Figure(
-            data=[
-                go.Pie(
-                    labels=cost_df["Componente"],
-                    values=cost_df["Custo (R$)"],
-                    hole=0.3,
-                    textinfo="label+percent",
-                    marker_colors=pie_colors,
-                )
-            ]
-        )
-        fig_pie.update_layout(
-            title_text="Distribuição do Custo Total",
-            margin=dict(t=40, b=10, l=10, r=10),
-            showlegend=False,
+        # Cores do gráfico de pizza (a do ajuste de consumo mínimo só se aplicável)
+        show_figure(
+            build_cost_pie,
+            cost_df["Componente"].tolist(),
+            cost_df["Custo (R$)"].to_numpy(dtype=float),
+            COST_COLORS[: len(cost_df)],
         )
-        st.plotly_chart(fig_pie, use_container_width=True)
 
     # Separador visual
     st.divider()
 
     # --- Gráficos de Simulação e Variação ---
     st.header("📈 Análise de Sensibilidade por Volume")
+    sweep_max_leads = ENTERPRISE_MAX_LEADS if enterprise_mode else SWEEP_MAX_LEADS
     st.markdown(
-        "Explore como diferentes taxas de conversão impactam os custos em diversos volumes de leads (0 a 5.000)."
+        "Explore como diferentes taxas de conversão impactam os custos em diversos volumes de leads "
+        f"(0 a {sweep_max_leads:,})."
     )
 
-    # Criar abas para os três gráficos de volume
-    tab_resp, tab_qual, tab_book = st.tabs(
-        ["Taxa de Resposta", "Taxa de Qualificação", "Taxa de Avanço"]
+    # Custo marginal e derivadas exatas do cenário target
+    target_gradients = cached_simulation(
+        target_total_leads,
+        target_response_rate,
+        target_qualification_rate,
+        target_booking_rate,
+        with_gradients=True,
+    )
+    marg_col1, marg_col2, marg_col3, marg_col4, marg_col5 = st.columns(5)
+    marg_col1.metric(
+        "Custo Marginal por Lead",
+        f"R$ {float(target_gradients['marginal_cost']):,.2f}",
+        help="Custo exato do próximo lead disparado, dado o cenário atual",
+    )
+    # No modo volume o custo salta nos pontos de quebra: a derivada não mostra o salto
+    volume_stages = [
+        stage for stage in ("leads", "qualified", "booked")
+        if getattr(compiled_pricing, stage).all_units
+    ]
+    if volume_stages:
+        st.caption(
+            f"Modo volume em {len(volume_stages)} etapa(s): o custo salta nos pontos de quebra. "
+            f"Disparar +1 lead agora muda o custo total em "
+            f"R$ {float(target_gradients['next_lead_cost']):+,.2f}."
+        )
+    marg_col2.metric(
+        "Custo Médio por Lead",
+        f"R$ {float(target_gradients['average_cost']):,.2f}",
+    )
+    # Derivadas por ponto percentual (taxas em 0-1, daí o / 100)
+    marg_col3.metric(
+        "+1pp Resposta",
+        f"R$ {float(target_gradients['d_cost_d_response']) / 100:,.2f}",
+        delta=f"CPA {float(target_gradients['d_cpa_d_response']) / 100:+,.2f}",
+        delta_color="inverse",
+    )
+    marg_col4.metric(
+        "+1pp Qualificação",
+        f"R$ {float(target_gradients['d_cost_d_qualification']) / 100:,.2f}",
+        delta=f"CPA {float(target_gradients['d_cpa_d_qualification']) / 100:+,.2f}",
+        delta_color="inverse",
+    )
+    marg_col5.metric(
+        "+1pp Avanço",
+        f"R$ {float(target_gradients['d_cost_d_booking']) / 100:,.2f}",
+        delta=f"CPA {float(target_gradients['d_cpa_d_booking']) / 100:+,.2f}",
+        delta_color="inverse",
     )
 
-    # Gráfico 1: Custo Total vs. Quantidade de Leads (Variando Taxa de Resposta)
-    with tab_resp:
-        lead_volumes = list(range(0, 5001, 100))
-
-        # Variações de taxa de resposta baseadas no target
-        response_step = 0.10  # 10 pontos percentuais
-        response_rate_variations = {}
-
-        # Duas abaixo do target
-        if target_response_rate - 2 * response_step >= 0:
-            response_rate_variations[
-                f"-20pp ({(target_response_rate - 2 * response_step) * 100:.1f}%)"
-            ] = target_response_rate - 2 * response_step
-        if target_response_rate - response_step >= 0:
-            response_rate_variations[
-                f"-10pp ({(target_response_rate - response_step) * 100:.1f}%)"
-            ] = target_response_rate - response_step
-
-        # Target
-        response_rate_variations[f"Target ({target_response_rate * 100:.1f}%)"] = (
-            target_response_rate
-        )
-
-        # Duas acima do target
-        if target_response_rate + response_step <= 1.0:
-            response_rate_variations[
-                f"+10pp ({(target_response_rate + response_step) * 100:.1f}%)"
-            ] = target_response_rate + response_step
-        if target_response_rate + 2 * response_step <= 1.0:
-            response_rate_variations[
-                f"+20pp ({(target_response_rate + 2 * response_step) * 100:.1f}%)"
-            ] = target_response_rate + 2 * response_step
-
-        fig_volume_response = go.Figure()
-
-        # Define colors for each scenario
-        scenario_colors = {
-            0: GRAY_2,  # -10pp
-            1: GRAY_1,  # -5pp
-            2: BRAND_COLOR,  # Target
-            3: LIGHT_BLUE_2,  # +5pp
-            4: LIGHT_BLUE_1,  # +10pp
-        }
-
-        for idx, (scenario_name, response_rate) in enumerate(
-            response_rate_variations.items()
-        ):
-            costs = []
-            scenario_rates = rates.copy()
-            scenario_rates["response"] = response_rate
-            for volume in lead_volumes:
-                sim_result = run_simulation(
-                    volume,
-                    scenario_rates,
-                    pricing_tables,
-                    minimum_billing,
-                    ticket_medio,
-                    taxa_conversao_vendas,
-                    comissao_vendas,
-                )
-                costs.append(sim_result["total_cost"])
-
-            is_target = "Target" in scenario_name
-            fig_volume_response.add_trace(
-                go.Scatter(
-                    x=lead_volumes,
-                    y=costs,
-                    mode="lines",
-                    name=scenario_name,
-                    line=dict(
-                        width=4 if is_target else 2.5,
-                        dash="solid" if is_target else "dot",
-                        color=scenario_colors.get(idx, BRAND_COLOR),
-                    ),
-                )
+    @st.fragment
+    def volume_sensitivity():
+        """Varreduras por volume; mudar o passo ou a aba reexecuta só este trecho"""
+        # Passo das varreduras de volume; curvas densas são decimadas no desenho (WebGL)
+        if enterprise_mode:
+            # Escala log até ENTERPRISE_MAX_LEADS, com os pontos de quebra de
+            # todas as curvas das abas (±10pp e ±20pp em cada taxa)
+            def around(rate):
+                variations = rate + np.array([-0.2, -0.1, 0.0, 0.1, 0.2])
+                return variations[(variations >= 0) & (variations <= 1)]
+
+            lead_volumes = sweep_volumes(
+                rate_sets=[
+                    (around(target_response_rate), target_qualification_rate, target_booking_rate),
+                    (target_response_rate, around(target_qualification_rate), target_booking_rate),
+                    (target_response_rate, target_qualification_rate, around(target_booking_rate)),
+                ]
             )
-
-        # Adicionar ponto do cenário target
-        fig_volume_response.add_trace(
-            go.Scatter(
-                x=[target_total_leads],
-                y=[target_results["total_cost"]],
-                mode="markers",
-                marker=dict(size=12, color="red", symbol="star"),
-                name="Seu Cenário Atual",
+            st.caption(
+                f"🏢 Modo enterprise: {len(lead_volumes):,} volumes de 0 a "
+                f"{ENTERPRISE_MAX_LEADS:,} leads (escala log, com cada ponto de quebra)"
             )
+        else:
+            volume_step = st.select_slider(
+                "Passo das varreduras de volume (leads)",
+                options=[100, 50, 25, 10, 5, 1],
+                value=100,
+                help="Passos menores mostram cada degrau das faixas; acima de mil pontos por curva o gráfico usa WebGL com decimação mín/máx",
+            )
+            lead_volumes = sweep_volumes(volume_step)
+
+        # Criar abas para os três gráficos de volume; só a aba aberta calcula
+        # as varreduras (voltar a uma aba já vista sai do cache da sessão)
+        tab_resp, tab_qual, tab_book = st.tabs(
+            ["Taxa de Resposta", "Taxa de Qualificação", "Taxa de Avanço"],
+            key="volume_tab",
+            on_change="rerun",
         )
 
-        fig_volume_response.update_layout(
-            xaxis_title="Quantidade de Leads Processados",
-            yaxis_title="Custo Total (R$)",
-            legend_title="Taxa de Resposta",
-            hovermode="x unified",
-        )
-        st.plotly_chart(fig_volume_response, use_container_width=True)
-
-    # Gráfico 2: Custo Total vs. Quantidade de Leads (Variando Taxa de Qualificação)
-    with tab_qual:
-        # Variações de taxa de qualificação baseadas no target
-        qualification_step = 0.10  # 10 pontos percentuais
-        qualification_rate_variations = {}
-
-        # Duas abaixo do target
-        if target_qualification_rate - 2 * qualification_step >= 0:
-            qualification_rate_variations[
-                f"-20pp ({(target_qualification_rate - 2 * qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate - 2 * qualification_step
-        if target_qualification_rate - qualification_step >= 0:
-            qualification_rate_variations[
-                f"-10pp ({(target_qualification_rate - qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate - qualification_step
-
-        # Target
-        qualification_rate_variations[
-            f"Target ({target_qualification_rate * 100:.1f}%)"
-        ] = target_qualification_rate
-
-        # Duas acima do target
-        if target_qualification_rate + qualification_step <= 1.0:
-            qualification_rate_variations[
-                f"+10pp ({(target_qualification_rate + qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate + qualification_step
-        if target_qualification_rate + 2 * qualification_step <= 1.0:
-            qualification_rate_variations[
-                f"+20pp ({(target_qualification_rate + 2 * qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate + 2 * qualification_step
-
-        fig_volume_qualification = go.Figure()
-
-        # Define colors for each scenario
-        scenario_colors_qual = {
-            0: GRAY_2,  # -20pp
-            1: GRAY_1,  # -10pp
-            2: BRAND_COLOR,  # Target
-            3: LIGHT_BLUE_2,  # +10pp
-            4: LIGHT_BLUE_1,  # +20pp
-        }
-
-        for idx, (scenario_name, qual_rate) in enumerate(
-            qualification_rate_variations.items()
-        ):
-            costs = []
-            scenario_rates = rates.copy()
-            scenario_rates["qualification"] = qual_rate
-            for volume in lead_volumes:
-                sim_result = run_simulation(
-                    volume,
-                    scenario_rates,
-                    pricing_tables,
-                    minimum_billing,
-                    ticket_medio,
-                    taxa_conversao_vendas,
-                    comissao_vendas,
+        # Gráfico 1: Custo Total vs. Quantidade de Leads (Variando Taxa de Resposta)
+        if tab_resp.open:
+            with tab_resp:
+                # Variações de taxa de resposta baseadas no target
+                response_step = 0.10  # 10 pontos percentuais
+                response_rate_variations = {}
+
+                # Duas abaixo do target
+                if target_response_rate - 2 * response_step >= 0:
+                    response_rate_variations[
+                        f"-20pp ({(target_response_rate - 2 * response_step) * 100:.1f}%)"
+                    ] = target_response_rate - 2 * response_step
+                if target_response_rate - response_step >= 0:
+                    response_rate_variations[
+                        f"-10pp ({(target_response_rate - response_step) * 100:.1f}%)"
+                    ] = target_response_rate - response_step
+
+                # Target
+                response_rate_variations[f"Target ({target_response_rate * 100:.1f}%)"] = (
+                    target_response_rate
                 )
-                costs.append(sim_result["total_cost"])
 
-            is_target = "Target" in scenario_name
-            fig_volume_qualification.add_trace(
-                go.Scatter(
-                    x=lead_volumes,
-                    y=costs,
-                    mode="lines",
-                    name=scenario_name,
-                    line=dict(
-                        width=4 if is_target else 2.5,
-                        dash="solid" if is_target else "dot",
-                        color=scenario_colors_qual.get(idx, BRAND_COLOR),
-                    ),
+                # Duas acima do target
+                if target_response_rate + response_step <= 1.0:
+                    response_rate_variations[
+                        f"+10pp ({(target_response_rate + response_step) * 100:.1f}%)"
+                    ] = target_response_rate + response_step
+                if target_response_rate + 2 * response_step <= 1.0:
+                    response_rate_variations[
+                        f"+20pp ({(target_response_rate + 2 * response_step) * 100:.1f}%)"
+                    ] = target_response_rate + 2 * response_step
+
+                sweeps = {}
+                for scenario_name, response_rate in response_rate_variations.items():
+                    scenario_rates = rates.copy()
+                    scenario_rates["response"] = response_rate
+                    sweeps[scenario_name] = cached_simulation(
+                        lead_volumes,
+                        scenario_rates["response"],
+                        scenario_rates["qualification"],
+                        scenario_rates["booking"],
+                        with_gradients=True,
+                    )
+
+                show_figure(
+                    build_volume_figure,
+                    lead_volumes,
+                    {name: sweep["total_cost"] for name, sweep in sweeps.items()},
+                    "Taxa de Resposta",
+                    target_total_leads,
+                    target_results["total_cost"],
+                    log_x=enterprise_mode,
+                )
+                show_figure(
+                    build_marginal_average_figure,
+                    lead_volumes,
+                    marginal_curves(sweeps),
+                    "Taxa de Resposta",
+                    log_x=enterprise_mode,
                 )
-            )
 
-        # Adicionar ponto do cenário target
-        fig_volume_qualification.add_trace(
-            go.Scatter(
-                x=[target_total_leads],
-                y=[target_results["total_cost"]],
-                mode="markers",
-                marker=dict(size=12, color="red", symbol="star"),
-                name="Seu Cenário Atual",
-            )
-        )
-
-        fig_volume_qualification.update_layout(
-            xaxis_title="Quantidade de Leads Processados",
-            yaxis_title="Custo Total (R$)",
-            legend_title="Taxa de Qualificação",
-            hovermode="x unified",
-        )
-        st.plotly_chart(fig_volume_qualification, use_container_width=True)
-
-    # Gráfico 3: Custo Total vs. Quantidade de Leads (Variando Taxa de Avanço)
-    with tab_book:
-        # Variações de taxa de agendamento baseadas no target
-        booking_step = 0.15  # 15 pontos percentuais
-        booking_rate_variations = {}
-
-        # Duas abaixo do target
-        if target_booking_rate - 2 * booking_step >= 0:
-            booking_rate_variations[
-                f"-30pp ({(target_booking_rate - 2 * booking_step) * 100:.1f}%)"
-            ] = target_booking_rate - 2 * booking_step
-        if target_booking_rate - booking_step >= 0:
-            booking_rate_variations[
-                f"-15pp ({(target_booking_rate - booking_step) * 100:.1f}%)"
-            ] = target_booking_rate - booking_step
-
-        # Target
-        booking_rate_variations[f"Target ({target_booking_rate * 100:.1f}%)"] = (
-            target_booking_rate
-        )
-
-        # Duas acima do target
-        if target_booking_rate + booking_step <= 1.0:
-            booking_rate_variations[
-                f"+15pp ({(target_booking_rate + booking_step) * 100:.1f}%)"
-            ] = target_booking_rate + booking_step
-        if target_booking_rate + 2 * booking_step <= 1.0:
-            booking_rate_variations[
-                f"+30pp ({(target_booking_rate + 2 * booking_step) * 100:.1f}%)"
-            ] = target_booking_rate + 2 * booking_step
-
-        fig_volume_booking = go.Figure()
-
-        # Define colors for each scenario
-        scenario_colors_booking = {
-            0: GRAY_2,  # -30pp
-            1: GRAY_1,  # -15pp
-            2: BRAND_COLOR,  # Target
-            3: LIGHT_BLUE_2,  # +15pp
-            4: LIGHT_BLUE_1,  # +30pp
-        }
+        # Gráfico 2: Custo Total vs. Quantidade de Leads (Variando Taxa de Qualificação)
+        if tab_qual.open:
+            with tab_qual:
+                # Variações de taxa de qualificação baseadas no target
+                qualification_step = 0.10  # 10 pontos percentuais
+                qualification_rate_variations = {}
+
+                # Duas abaixo do target
+                if target_qualification_rate - 2 * qualification_step >= 0:
+                    qualification_rate_variations[
+                        f"-20pp ({(target_qualification_rate - 2 * qualification_step) * 100:.1f}%)"
+                    ] = target_qualification_rate - 2 * qualification_step
+                if target_qualification_rate - qualification_step >= 0:
+                    qualification_rate_variations[
+                        f"-10pp ({(target_qualification_rate - qualification_step) * 100:.1f}%)"
+                    ] = target_qualification_rate - qualification_step
+
+                # Target
+                qualification_rate_variations[
+                    f"Target ({target_qualification_rate * 100:.1f}%)"
+                ] = target_qualification_rate
+
+                # Duas acima do target
+                if target_qualification_rate + qualification_step <= 1.0:
+                    qualification_rate_variations[
+                        f"+10pp ({(target_qualification_rate + qualification_step) * 100:.1f}%)"
+                    ] = target_qualification_rate + qualification_step
+                if target_qualification_rate + 2 * qualification_step <= 1.0:
+                    qualification_rate_variations[
+                        f"+20pp ({(target_qualification_rate + 2 * qualification_step) * 100:.1f}%)"
+                    ] = target_qualification_rate + 2 * qualification_step
+
+                sweeps = {}
+                for scenario_name, qual_rate in qualification_rate_variations.items():
+                    scenario_rates = rates.copy()
+                    scenario_rates["qualification"] = qual_rate
+                    sweeps[scenario_name] = cached_simulation(
+                        lead_volumes,
+                        scenario_rates["response"],
+                        scenario_rates["qualification"],
+                        scenario_rates["booking"],
+                        with_gradients=True,
+                    )
+
+                show_figure(
+                    build_volume_figure,
+                    lead_volumes,
+                    {name: sweep["total_cost"] for name, sweep in sweeps.items()},
+                    "Taxa de Qualificação",
+                    target_total_leads,
+                    target_results["total_cost"],
+                    log_x=enterprise_mode,
+                )
+                show_figure(
+                    build_marginal_average_figure,
+                    lead_volumes,
+                    marginal_curves(sweeps),
+                    "Taxa de Qualificação",
+                    log_x=enterprise_mode,
+                )
 
-        for idx, (scenario_name, book_rate) in enumerate(
-            booking_rate_variations.items()
-        ):
-            costs = []
-            scenario_rates = rates.copy()
-            scenario_rates["booking"] = book_rate
-            for volume in lead_volumes:
-                sim_result = run_simulation(
-                    volume,
-                    scenario_rates,
-                    pricing_tables,
-                    minimum_billing,
-                    ticket_medio,
-                    taxa_conversao_vendas,
-                    comissao_vendas,
+        # Gráfico 3: Custo Total vs. Quantidade de Leads (Variando Taxa de Avanço)
+        if tab_book.open:
+            with tab_book:
+                # Variações de taxa de agendamento baseadas no target
+                booking_step = 0.15  # 15 pontos percentuais
+                booking_rate_variations = {}
+
+                # Duas abaixo do target
+                if target_booking_rate - 2 * booking_step >= 0:
+                    booking_rate_variations[
+                        f"-30pp ({(target_booking_rate - 2 * booking_step) * 100:.1f}%)"
+                    ] = target_booking_rate - 2 * booking_step
+                if target_booking_rate - booking_step >= 0:
+                    booking_rate_variations[
+                        f"-15pp ({(target_booking_rate - booking_step) * 100:.1f}%)"
+                    ] = target_booking_rate - booking_step
+
+                # Target
+                booking_rate_variations[f"Target ({target_booking_rate * 100:.1f}%)"] = (
+                    target_booking_rate
                 )
-                costs.append(sim_result["total_cost"])
 
-            is_target = "Target" in scenario_name
-            fig_volume_booking.add_trace(
-                go.Scatter(
-                    x=lead_volumes,
-                    y=costs,
-                    mode="lines",
-                    name=scenario_name,
-                    line=dict(
-                        width=4 if is_target else 2.5,
-                        dash="solid" if is_target else "dot",
-                        color=scenario_colors_booking.get(idx, BRAND_COLOR),
-                    ),
+                # Duas acima do target
+                if target_booking_rate + booking_step <= 1.0:
+                    booking_rate_variations[
+                        f"+15pp ({(target_booking_rate + booking_step) * 100:.1f}%)"
+                    ] = target_booking_rate + booking_step
+                if target_booking_rate + 2 * booking_step <= 1.0:
+                    booking_rate_variations[
+                        f"+30pp ({(target_booking_rate + 2 * booking_step) * 100:.1f}%)"
+                    ] = target_booking_rate + 2 * booking_step
+
+                sweeps = {}
+                for scenario_name, book_rate in booking_rate_variations.items():
+                    scenario_rates = rates.copy()
+                    scenario_rates["booking"] = book_rate
+                    sweeps[scenario_name] = cached_simulation(
+                        lead_volumes,
+                        scenario_rates["response"],
+                        scenario_rates["qualification"],
+                        scenario_rates["booking"],
+                        with_gradients=True,
+                    )
+
+                show_figure(
+                    build_volume_figure,
+                    lead_volumes,
+                    {name: sweep["total_cost"] for name, sweep in sweeps.items()},
+                    "Taxa de Avanço",
+                    target_total_leads,
+                    target_results["total_cost"],
+                    log_x=enterprise_mode,
+                )
+                show_figure(
+                    build_marginal_average_figure,
+                    lead_volumes,
+                    marginal_curves(sweeps),
+                    "Taxa de Avanço",
+                    log_x=enterprise_mode,
                 )
-            )
 
-        # Adicionar ponto do cenário target
-        fig_volume_booking.add_trace(
-            go.Scatter(
-                x=[target_total_leads],
-                y=[target_results["total_cost"]],
-                mode="markers",
-                marker=dict(size=12, color="red", symbol="star"),
-                name="Seu Cenário Atual",
+    volume_sensitivity()
+
+    # Separador visual
+    st.divider()
+
+    # --- Elasticidade de Preço por Faixa ---
+    st.header("🧮 Elasticidade de Preço por Faixa")
+    st.markdown(
+        """
+        O custo total é **linear no preço de cada faixa**: o coeficiente é o número de itens na faixa.
+        Edite a coluna **Novo Preço** ou mova um ponto de quebra para ver o custo exato do cenário
+        target e de toda a varredura de volume, sem recalcular a simulação.
+        """
+    )
+    from pricing.elasticity import NO_REPLY, price_sensitivity
+
+    ELASTICITY_STAGE_LABELS = {
+        NO_REPLY: "Disparo sem Resposta",
+        "leads": "Lead Processado",
+        "qualified": "Lead Qualificado",
+        "booked": "Lead Avançado",
+    }
+
+    def format_tier(low, high):
+        if np.isinf(high):
+            return f"{low:,.0f}+"
+        return f"{low:,.0f} - {high:,.0f}"
+
+    @st.fragment
+    def price_elasticity():
+        """Prévia exata de preços e pontos de quebra; editar reexecuta só este trecho"""
+        elasticity_volumes = sweep_volumes()
+        # Mesma varredura da curva target das abas de volume (sai do cache)
+        elasticity_sweep = cached_simulation(
+            elasticity_volumes,
+            target_response_rate,
+            target_qualification_rate,
+            target_booking_rate,
+            with_gradients=True,
+        )
+        try:
+            target_sensitivity = price_sensitivity(
+                target_gradients, compiled_pricing, minimum_billing
             )
+        except ValueError as exc:
+            st.warning(f"Prévia indisponível para este plano: {exc}")
+            return
+        sweep_sensitivity = price_sensitivity(
+            elasticity_sweep, compiled_pricing, minimum_billing
         )
 
-        fig_volume_booking.update_layout(
-            xaxis_title="Quantidade de Leads Processados",
-            yaxis_title="Custo Total (R$)",
-            legend_title="Taxa de Avanço",
-            hovermode="x unified",
+        # Uma linha por faixa: preço atual, itens cobrados e R$ por +R$ 1,00
+        tier_rows = []
+        for stage, label in ELASTICITY_STAGE_LABELS.items():
+            d_price = target_sensitivity.d_total_d_price(stage)
+            coefficients = target_sensitivity.price_coefficients[stage]
+            if stage == NO_REPLY:
+                tiers = [("Todos", compiled_pricing.no_reply_price)]
+            else:
+                schedule = getattr(compiled_pricing, stage)
+                tiers = [
+                    (format_tier(low, high), price)
+                    for low, high, price in zip(
+                        schedule.mins, schedule.maxs, schedule.prices
+                    )
+                ]
+            for tier, (faixa, price) in enumerate(tiers):
+                tier_rows.append(
+                    {
+                        "Etapa": label,
+                        "Faixa": faixa,
+                        "Preço Atual (R$)": float(price),
+                        "Itens a este Preço": float(coefficients[tier]),
+                        "Δ Custo por +R$ 1,00": float(d_price[tier]),
+                        "Novo Preço (R$)": float(price),
+                    }
+                )
+        tier_df = pd.DataFrame(tier_rows)
+        # Editor novo quando as tabelas mudam: os preços atuais voltam a ser o ponto de partida
+        edited_df = st.data_editor(
+            tier_df,
+            key=f"elasticity_editor_{compiled_pricing.fingerprint}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=[column for column in tier_df.columns if column != "Novo Preço (R$)"],
+            column_config={
+                "Preço Atual (R$)": st.column_config.NumberColumn(format="R$ %.2f"),
+                "Itens a este Preço": st.column_config.NumberColumn(format="%.1f"),
+                "Δ Custo por +R$ 1,00": st.column_config.NumberColumn(format="R$ %.2f"),
+                "Novo Preço (R$)": st.column_config.NumberColumn(
+                    min_value=0.0, step=0.05, format="R$ %.2f"
+                ),
+            },
         )
-        st.plotly_chart(fig_volume_booking, use_container_width=True)
+        new_prices = {}
+        for stage, label in ELASTICITY_STAGE_LABELS.items():
+            stage_prices = edited_df.loc[edited_df["Etapa"] == label, "Novo Preço (R$)"]
+            current_prices = tier_df.loc[tier_df["Etapa"] == label, "Preço Atual (R$)"]
+            stage_prices = stage_prices.fillna(current_prices).to_numpy(dtype=float)
+            if not np.array_equal(stage_prices, current_prices.to_numpy()):
+                new_prices[stage] = stage_prices
+
+        # Pontos de quebra entre faixas contíguas das tabelas escalonadas
+        boundary_options = [
+            (stage, int(boundary))
+            for stage in ("leads", "qualified", "booked")
+            for boundary in getattr(compiled_pricing, stage).boundaries
+        ]
+
+        def format_boundary(option):
+            stage, boundary = option
+            schedule = getattr(compiled_pricing, stage)
+            return (
+                f"{ELASTICITY_STAGE_LABELS[stage]}: {schedule.maxs[boundary]:,.0f} "
+                f"(R$ {schedule.prices[boundary]:,.2f} → R$ {schedule.prices[boundary + 1]:,.2f})"
+            )
+
+        point_col1, point_col2, point_col3 = st.columns([0.45, 0.25, 0.3])
+        boundary_option = point_col1.selectbox(
+            "Ponto de quebra",
+            boundary_options,
+            format_func=format_boundary,
+            key="elasticity_boundary",
+        )
+        new_point = None
+        if boundary_option is not None:
+            stage, boundary = boundary_option
+            schedule = getattr(compiled_pricing, stage)
+            point = float(schedule.maxs[boundary])
+            new_point = point_col2.number_input(
+                "Novo ponto de quebra",
+                min_value=float(schedule.mins[boundary]) + 1,
+                max_value=(
+                    None
+                    if np.isinf(schedule.maxs[boundary + 1])
+                    else float(schedule.maxs[boundary + 1]) - 1
+                ),
+                value=point,
+                step=10.0,
+                format="%.0f",
+                key=f"elasticity_point_{stage}_{boundary}_{compiled_pricing.fingerprint}",
+            )
+            d_point = float(target_sensitivity.d_total_d_boundary(stage, boundary))
+            point_col3.metric(
+                "Δ Custo por +1 Item no Ponto",
+                f"R$ {d_point:+,.2f}",
+                help="Itens acima do ponto passam a pagar o preço da faixa de baixo. "
+                "No modo volume o custo só salta no ponto (derivada zero); a prévia mostra o salto.",
+            )
+            if new_point == point:
+                new_point = None
+
+        # Custo exato das edições: só as linhas das etapas editadas mudam
+        current_total = float(target_results["total_cost"])
+        preview_col1, preview_col2, preview_col3 = st.columns(3)
+        preview_col1.metric("Custo Target Atual", f"R$ {current_total:,.2f}")
+        preview_curves = {}
+        if new_prices:
+            price_total = float(target_sensitivity.preview_prices(new_prices))
+            preview_col2.metric(
+                "Com os Novos Preços",
+                f"R$ {price_total:,.2f}",
+                delta=f"R$ {price_total - current_total:+,.2f}",
+                delta_color="inverse",
+            )
+            preview_curves["Novos Preços"] = sweep_sensitivity.preview_prices(new_prices)
+        if new_point is not None:
+            point_total = float(
+                target_sensitivity.preview_boundary(stage, boundary, new_point)
+            )
+            preview_col3.metric(
+                f"Com o Ponto em {new_point:,.0f}",
+                f"R$ {point_total:,.2f}",
+                delta=f"R$ {point_total - current_total:+,.2f}",
+                delta_color="inverse",
+            )
+            preview_curves["Novo Ponto de Quebra"] = sweep_sensitivity.preview_boundary(
+                stage, boundary, new_point
+            )
+        if preview_curves:
+            show_figure(
+                build_price_preview_figure,
+                elasticity_volumes,
+                elasticity_sweep["total_cost"],
+                preview_curves,
+                target_total_leads,
+                current_total,
+                log_x=enterprise_mode,
+            )
+        else:
+            st.caption("Edite um preço ou um ponto de quebra para ver a prévia.")
+
+    price_elasticity()
 
     # Separador visual
     st.divider()
@@ -1505,209 +2101,1166 @@ if target_total_leads > 0:
         i / 100.0 for i in range(0, 51, 5)
     ]  # De 0% a 50%, passo 5%
 
-    # Matriz para armazenar os custos
-    cost_matrix = []
-    cpa_matrix = []
-    meetings_matrix = []
-
-    for qual_rate in qual_rates_heatmap:
-        cost_row = []
-        cpa_row = []
-        meetings_row = []
-        for book_rate in booking_rates_heatmap:
-            temp_rates = rates.copy()
-            temp_rates["qualification"] = qual_rate
-            temp_rates["booking"] = book_rate
-            sim_result = run_simulation(
-                target_total_leads,
-                temp_rates,
-                pricing_tables,
+    @st.fragment
+    def sensitivity_matrix():
+        """Matriz qualificação × avanço e insights; o passo e as abas reexecutam só este trecho"""
+        # Resolução da matriz: passos finos são desenhados como imagem no servidor
+        matrix_step = st.select_slider(
+            "Passo da matriz (p.p.)",
+            options=[5.0, 2.5, 1.0, 0.5],
+            value=5.0,
+            format_func=lambda step: f"{step:g} p.p.",
+            help="Grades com mais de mil células são enviadas como imagem; o hover usa uma grade amostrada",
+        )
+        qual_rates_grid = np.linspace(0, 35, int(round(35 / matrix_step)) + 1) / 100
+        booking_rates_grid = np.linspace(0, 50, int(round(50 / matrix_step)) + 1) / 100
+
+        # Grade qualificação × avanço avaliada num único lote (colunas contíguas)
+        heatmap_batch = cached_simulation(
+            target_total_leads,
+            target_response_rate,
+            qual_rates_grid[:, None],
+            booking_rates_grid[None, :],
+        )
+        cost_matrix = heatmap_batch["total_cost"]
+        cpa_matrix = heatmap_batch["cpa"]
+        meetings_matrix = heatmap_batch["num_booked"]
+
+        # Criar abas para diferentes visualizações
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+            [
+                "Custo Total",
+                "Custo por Reunião (CPA)",
+                "Reuniões Agendadas",
+                "Payback do Setup",
+                "Break-even",
+                "Lucro 12 Meses",
+            ],
+            key="matrix_tab",
+            on_change="rerun",
+        )
+
+        # Custom colorscale para os heatmaps
+        custom_colorscale = [
+            [0.0, BRAND_COLOR],  # Menor custo = azul da marca
+            [0.5, LIGHT_BLUE_3],  # Médio = azul claro
+            [1.0, GRAY_2],  # Maior custo = cinza
+        ]
+
+        # Colorscale invertido para reuniões (mais = melhor)
+        meetings_colorscale = [
+            [0.0, GRAY_3],  # Menos reuniões = cinza claro
+            [0.5, LIGHT_BLUE_2],  # Médio = azul claro
+            [1.0, BRAND_COLOR],  # Mais reuniões = azul da marca
+        ]
+
+        # Meses além do horizonte aparecem como "> 36" e com a cor do limite
+        HORIZONTE_MESES = 36
+
+        def format_months(val):
+            return f"{val:.1f}" if val <= HORIZONTE_MESES else f"> {HORIZONTE_MESES}"
+
+        def format_breakeven(val):
+            return f"Mês {val:.0f}" if val == val else f"> {HORIZONTE_MESES}"
+
+        def format_money(val):
+            return f"R$ {val:,.0f}"
+
+        def format_count(val):
+            return f"{int(val)}"
+
+        matrix_heatmaps = [
+            (
+                tab1,
+                cost_matrix,
+                cost_matrix,
+                format_money,
+                custom_colorscale,
+                "Custo Total (R$)",
+                "Custo: R$ %{z:,.2f}",
+                "Custo Total por Combinação de Taxas",
+            ),
+            (
+                tab2,
+                cpa_matrix,
+                cpa_matrix,
+                format_money,
+                custom_colorscale,
+                "CPA (R$)",
+                "CPA: R$ %{z:,.2f}",
+                "Custo por Reunião (CPA) por Combinação de Taxas",
+            ),
+            (
+                tab3,
+                meetings_matrix,
+                meetings_matrix,
+                format_count,
+                meetings_colorscale,
+                "Reuniões",
+                "Reuniões: %{z:.0f}",
+                "Reuniões Agendadas por Combinação de Taxas",
+            ),
+        ]
+        if tab4.open or tab5.open or tab6.open:
+            # Payback, break-even e lucro em 12 meses para toda a grade (sem laço por
+            # célula); a projeção de 36 meses só roda com uma aba financeira aberta
+            projecao_grade = project_months(
+                heatmap_batch,
+                ticket_medio_mensal,
+                ltv_meses,
+                setup_fee,
+                poc_meses,
+                poc_leads_inclusos,
                 minimum_billing,
-                ticket_medio,
-                taxa_conversao_vendas,
-                comissao_vendas,
+                months=HORIZONTE_MESES,
+                pricing=compiled_pricing,
+                comissao_vendas=comissao_vendas,
             )
-            cost_row.append(sim_result["total_cost"])
-            cpa_row.append(sim_result["cpa"] if sim_result["cpa"] > 0 else 0)
-            meetings_row.append(sim_result["num_booked"])
-        cost_matrix.append(cost_row)
-        cpa_matrix.append(cpa_row)
-        meetings_matrix.append(meetings_row)
-
-    # Criar abas para diferentes visualizações
-    tab1, tab2, tab3 = st.tabs(
-        ["Custo Total", "Custo por Reunião (CPA)", "Reuniões Agendadas"]
-    )
+            payback_matrix = payback_months(
+                heatmap_batch["num_vendas"] * ticket_medio_mensal, cost_matrix, setup_fee
+            )
+            breakeven_matrix = breakeven_month(projecao_grade["lucro_acumulado"])
+            lucro_12_matrix = projecao_grade["lucro_acumulado"][11]
+            matrix_heatmaps += [
+                (
+                    tab4,
+                    np.minimum(payback_matrix, HORIZONTE_MESES),
+                    payback_matrix,
+                    format_months,
+                    custom_colorscale,
+                    "Meses",
+                    "Payback: %{text} meses",
+                    "Meses para o Lucro Mensal Pagar o Setup",
+                ),
+                (
+                    tab5,
+                    np.nan_to_num(breakeven_matrix, nan=HORIZONTE_MESES + 1),
+                    breakeven_matrix,
+                    format_breakeven,
+                    custom_colorscale,
+                    "Mês",
+                    "Break-even: %{text}",
+                    "Mês de Break-even do Lucro Acumulado (com Setup)",
+                ),
+                (
+                    tab6,
+                    lucro_12_matrix,
+                    lucro_12_matrix,
+                    format_money,
+                    meetings_colorscale,
+                    "Lucro (R$)",
+                    "Lucro 12 meses: R$ %{z:,.2f}",
+                    "Lucro Acumulado em 12 Meses",
+                ),
+            ]
+        for tab, *matrix_args in matrix_heatmaps:
+            if tab.open:
+                with tab:
+                    show_figure(
+                        build_matrix_figure,
+                        *matrix_args,
+                        booking_rates_grid * 100,
+                        qual_rates_grid * 100,
+                        (target_booking_rate * 100, target_qualification_rate * 100),
+                    )
+
+        # Insights adicionais
+        st.subheader("💡 Insights da Matriz de Sensibilidade")
+        col_ins1, col_ins2, col_ins3 = st.columns(3)
+
+        # Encontrar o melhor e pior cenário
+        flat_costs = [cost for row in cost_matrix for cost in row]
+        flat_cpas = [cpa for row in cpa_matrix for cpa in row if cpa > 0]
+        flat_meetings = [meeting for row in meetings_matrix for meeting in row]
+
+        col_ins1.metric(
+            "Custo Mínimo Possível",
+            f"R$ {min(flat_costs):,.2f}",
+            delta=f"{((min(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
+            delta_color="inverse",
+        )
 
-    # Custom colorscale para os heatmaps
-    custom_colorscale = [
-        [0.0, BRAND_COLOR],  # Menor custo = azul da marca
-        [0.5, LIGHT_BLUE_3],  # Médio = azul claro
-        [1.0, GRAY_2],  # Maior custo = cinza
-    ]
+        col_ins2.metric(
+            "Custo Máximo Possível",
+            f"R$ {max(flat_costs):,.2f}",
+            delta=f"{((max(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
+            delta_color="inverse",
+        )
+
+        col_ins3.metric(
+            "Máximo de Reuniões Possível",
+            f"{int(max(flat_meetings))}",
+            delta=f"{int(max(flat_meetings) - target_results['num_booked'])} vs Target",
+        )
+
+    sensitivity_matrix()
+
+    # --- Fronteira Eficiente ---
+    frontier_section = st.expander(
+        "🎯 **Fronteira Eficiente: Custo vs Resultado**", key="frontier_section", on_change="rerun"
+    )
+    with frontier_section:
+        st.markdown(
+            """
+            Cada ponto da fronteira é um cenário (volume × qualificação × avanço) para o qual **nenhum outro**
+            entrega o mesmo resultado por um custo menor. Cenários acima da curva pagam mais do que o necessário.
+            """
+        )
+        # Só varre a grade com a seção aberta
+        if frontier_section.open:
+            from pricing.pareto import pareto_scan
+
+            frontier_col1, frontier_col2 = st.columns([0.6, 0.4])
+            frontier_benefit = frontier_col1.radio(
+                "Resultado",
+                options=["num_booked", "num_vendas"],
+                format_func={"num_booked": "Reuniões", "num_vendas": "Vendas"}.get,
+                horizontal=True,
+                key="frontier_benefit",
+            )
+            frontier_with_roi = frontier_col2.checkbox(
+                "Maximizar também o ROI sobre LTV",
+                help="Mantém na fronteira cenários mais caros que compensam com ROI maior",
+                key="frontier_with_roi",
+            )
+            frontier_axes = {
+                "total_leads": np.union1d(sweep_volumes(), [target_total_leads]),
+                "response": target_response_rate,
+                "qualification": np.union1d(np.arange(0, 36) / 100, [target_qualification_rate]),
+                "booking": np.union1d(np.arange(0, 51) / 100, [target_booking_rate]),
+            }
+            # A varredura só é refeita quando tabelas, eixos ou parâmetros mudam
+            frontier_key = (
+                pricing_fingerprint,
+                "fronteira",
+                tuple((x.shape, x.tobytes()) for x in normalize_inputs(frontier_axes.values())),
+                frontier_benefit,
+                frontier_with_roi,
+                simulation_params,
+                ltv_valor,
+            )
+            frontier = result_cache.get_or_compute(
+                frontier_key,
+                lambda: pareto_scan(
+                    frontier_axes,
+                    compiled_pricing,
+                    benefit=frontier_benefit,
+                    with_roi=frontier_with_roi,
+                    minimum_billing=minimum_billing,
+                    ticket_medio=ticket_medio,
+                    taxa_conversao_vendas=taxa_conversao_vendas,
+                    comissao_vendas=comissao_vendas,
+                    ltv_valor=ltv_valor,
+                ),
+            )
+            frontier_label = "Reuniões" if frontier_benefit == "num_booked" else "Vendas"
+            target_benefit = target_results[frontier_benefit]
+            cheapest_same = frontier.cheapest_for(target_benefit)
+            best_same_cost = frontier.best_within(target_results["total_cost"])
+
+            front_col1, front_col2, front_col3 = st.columns(3)
+            front_col1.metric(
+                "Cenários na Fronteira",
+                f"{len(frontier):,}",
+                delta=f"de {frontier.evaluated:,} avaliados",
+                delta_color="off",
+            )
+            if cheapest_same is not None:
+                front_col2.metric(
+                    f"Custo Mínimo p/ {target_benefit:,.1f} {frontier_label}",
+                    f"R$ {cheapest_same:,.2f}",
+                    delta=f"R$ {cheapest_same - target_results['total_cost']:,.2f} vs Target",
+                    delta_color="inverse",
+                )
+            if best_same_cost is not None:
+                front_col3.metric(
+                    f"Máx. {frontier_label} pelo Custo do Target",
+                    f"{best_same_cost:,.1f}",
+                    delta=f"{best_same_cost - target_benefit:+,.1f} vs Target",
+                )
 
-    with tab1:
-        fig_heatmap_cost = go.Figure(
-            data=go.Heatmap(
-                z=cost_matrix,
-                x=[f"{r * 100:.0f}%" for r in booking_rates_heatmap],
-                y=[f"{q * 100:.0f}%" for q in qual_rates_heatmap],
-                colorscale=custom_colorscale,
-                text=[[f"R$ {val:,.0f}" for val in row] for row in cost_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 9},
-                colorbar=dict(title="Custo Total (R$)"),
-                hovertemplate="Qualificação: %{y}<br>Agendamento: %{x}<br>Custo: R$ %{z:,.2f}<extra></extra>",
+            show_figure(
+                build_frontier_figure,
+                frontier.points,
+                frontier_benefit,
+                frontier_label,
+                target_results["total_cost"],
+                target_benefit,
+                frontier_with_roi,
             )
+
+    # --- Comparação de Tabelas de Preços ---
+    st.divider()
+    st.header("⚖️ Comparação de Tabelas de Preços")
+    st.markdown(
+        """
+        Salve conjuntos de tabelas (ex.: a tabela vigente antes de editar) e compare-os com a proposta atual
+        em **todas** as combinações de volume e taxas — não apenas no cenário target.
+        """
+    )
+
+    from pricing.compare import delta_summary, evaluate_pricings
+
+    compare_sets = st.session_state.setdefault("compare_sets", {})
+    save_col1, save_col2 = st.columns([0.7, 0.3])
+    compare_set_name = save_col1.text_input(
+        "Nome do conjunto de tabelas",
+        value=f"Tabela {len(compare_sets) + 1}",
+        key="compare_set_name",
+    )
+    save_col2.markdown("")
+    if save_col2.button("💾 Salvar tabelas atuais", use_container_width=True):
+        # "Atual" são sempre as tabelas da barra lateral
+        if compare_set_name.strip() == "Atual":
+            st.warning('O nome "Atual" é reservado para as tabelas da barra lateral; escolha outro.')
+        else:
+            compare_sets[compare_set_name] = compiled_pricing
+
+    all_pricings = {"Atual": compiled_pricing, **compare_sets}
+    if len(all_pricings) < 2:
+        st.info(
+            "Salve as tabelas atuais, edite a barra lateral e volte aqui para comparar."
+        )
+    else:
+        set_names = list(all_pricings)
+        sel_col1, sel_col2 = st.columns(2)
+        reference_name = sel_col1.selectbox(
+            "Referência", set_names, index=len(set_names) - 1
+        )
+        proposal_name = sel_col2.selectbox(
+            "Proposta (heatmaps)",
+            [name for name in set_names if name != reference_name],
         )
 
-        # Adicionar marcador para o cenário target
-        target_qual_idx = min(
-            range(len(qual_rates_heatmap)),
-            key=lambda i: abs(qual_rates_heatmap[i] - target_qualification_rate),
+        # Grade compartilhada: volumes × qualificação × avanço, incluindo o target
+        compare_volumes = np.union1d(sweep_volumes(), [target_total_leads])
+        compare_quals = np.union1d(qual_rates_heatmap, [target_qualification_rate])
+        compare_books = np.union1d(booking_rates_heatmap, [target_booking_rate])
+        compare_results = evaluate_pricings(
+            list(all_pricings.values()),
+            compare_volumes[:, None, None],
+            target_response_rate,
+            compare_quals[None, :, None],
+            compare_books[None, None, :],
+            minimum_billing,
+            ticket_medio,
+            taxa_conversao_vendas,
+            comissao_vendas,
+        )
+        ref_idx = set_names.index(reference_name)
+        prop_idx = set_names.index(proposal_name)
+        delta_cost = (
+            compare_results["total_cost"] - compare_results["total_cost"][ref_idx]
         )
-        target_book_idx = min(
-            range(len(booking_rates_heatmap)),
-            key=lambda i: abs(booking_rates_heatmap[i] - target_booking_rate),
+        delta_cpa = compare_results["cpa"] - compare_results["cpa"][ref_idx]
+
+        vol_idx = int(np.searchsorted(compare_volumes, target_total_leads))
+        heat_q_idx = np.searchsorted(compare_quals, qual_rates_heatmap)
+        heat_b_idx = np.searchsorted(compare_books, booking_rates_heatmap)
+        curve_q_idx = int(np.searchsorted(compare_quals, target_qualification_rate))
+        curve_b_idx = int(np.searchsorted(compare_books, target_booking_rate))
+
+        grid_summary = delta_summary(delta_cost[prop_idx])
+        sum_col1, sum_col2, sum_col3, sum_col4 = st.columns(4)
+        sum_col1.metric(
+            "Cenários mais baratos", f"{grid_summary['cheaper_pct']:.0f}%"
+        )
+        sum_col2.metric("Cenários mais caros", f"{grid_summary['pricier_pct']:.0f}%")
+        sum_col3.metric("Maior economia", f"R$ {grid_summary['max_saving']:,.2f}")
+        sum_col4.metric("Maior aumento", f"R$ {grid_summary['max_increase']:,.2f}")
+        st.caption(
+            f"💡 {proposal_name} vs {reference_name} em {delta_cost[prop_idx].size:,} combinações "
+            f"de volume × qualificação × avanço (resposta fixa em {target_response_rate * 100:.1f}%)"
         )
 
-        fig_heatmap_cost.add_trace(
-            go.Scatter(
-                x=[f"{booking_rates_heatmap[target_book_idx] * 100:.0f}%"],
-                y=[f"{qual_rates_heatmap[target_qual_idx] * 100:.0f}%"],
-                mode="markers",
-                marker=dict(
-                    size=20,
-                    color=GRAY_4,
-                    symbol="star",
-                    line=dict(color="white", width=2),
+        # Só a aba aberta monta o gráfico
+        tab_delta_cost, tab_delta_cpa, tab_delta_volume = st.tabs(
+            ["Δ Custo Total", "Δ CPA", "Curvas por Volume"],
+            key="compare_tab",
+            on_change="rerun",
+        )
+
+        for delta_tab, delta_matrix, delta_title in [
+            (tab_delta_cost, delta_cost, "Δ Custo Total"),
+            (tab_delta_cpa, delta_cpa, "Δ CPA"),
+        ]:
+            if not delta_tab.open:
+                continue
+            with delta_tab:
+                show_figure(
+                    build_delta_heatmap,
+                    delta_matrix[prop_idx, vol_idx][np.ix_(heat_q_idx, heat_b_idx)],
+                    np.asarray(booking_rates_heatmap) * 100,
+                    np.asarray(qual_rates_heatmap) * 100,
+                    f"{delta_title}: {proposal_name} − {reference_name} "
+                    f"({target_total_leads:,} leads)",
+                    f"{delta_title} (R$)",
+                )
+
+        if tab_delta_volume.open:
+            with tab_delta_volume:
+                show_figure(
+                    build_compare_volume_figure,
+                    compare_volumes,
+                    {
+                        name: compare_results["total_cost"][idx, :, curve_q_idx, curve_b_idx]
+                        for idx, name in enumerate(set_names)
+                    },
+                    reference_name,
+                    log_x=enterprise_mode,
+                )
+
+                # Diferença da proposta, separando regiões mais baratas e mais caras
+                show_figure(
+                    build_volume_delta_figure,
+                    compare_volumes,
+                    delta_cost[prop_idx, :, curve_q_idx, curve_b_idx],
+                    f"Δ Custo Total: {proposal_name} − {reference_name}",
+                    log_x=enterprise_mode,
+                )
+
+else:
+    st.info("Ajuste a quantidade de leads na barra lateral para iniciar a simulação.")
+
+
+# --- Cenários Salvos ---
+from pricing.scenarios import (
+    Scenario,
+    evaluate_scenarios,
+    load_scenarios,
+    tables_from_pricing,
+    save_scenarios,
+)
+
+
+def current_scenario(name):
+    """Cenário com as entradas atuais da barra lateral e as tabelas compiladas"""
+    return Scenario(
+        name=name,
+        total_leads=float(target_total_leads),
+        response=target_response_rate,
+        qualification=target_qualification_rate,
+        booking=target_booking_rate,
+        minimum_billing=minimum_billing,
+        ticket_medio=ticket_medio_mensal,
+        ltv_dias=float(ltv_dias),
+        taxa_conversao_vendas=taxa_conversao_vendas,
+        comissao_vendas=comissao_vendas,
+        tables=tables_from_pricing(compiled_pricing),
+    )
+
+
+def load_scenario(scenario):
+    """Carrega um cenário salvo na barra lateral (sliders, tabelas e regras de cobrança)"""
+    # Volumes acima do slider padrão ligam o modo enterprise
+    enterprise = st.session_state.get("enterprise_mode", False) or (
+        scenario.total_leads > SWEEP_MAX_LEADS
+    )
+    st.session_state.update(
+        {
+            "enterprise_mode": enterprise,
+            "total_leads_enterprise" if enterprise else "total_leads": int(scenario.total_leads),
+            "response_rate": round(scenario.response * 100, 2),
+            "qualification_rate": round(scenario.qualification * 100, 2),
+            "booking_rate": round(scenario.booking * 100, 2),
+            "minimum_billing": float(scenario.minimum_billing),
+            "ticket_medio_mensal": float(scenario.ticket_medio),
+            "ltv_dias": int(scenario.ltv_dias),
+            "sales_rate": round(scenario.taxa_conversao_vendas * 100, 2),
+            "comissao_vendas": round(scenario.comissao_vendas * 100, 2),
+        }
+    )
+    for stage in ("leads", "qualified", "booked"):
+        spec = scenario.tables[stage]
+        mins, maxs, prices = zip(*spec["tiers"])
+        st.session_state["pricing_overrides"][stage] = schedule_to_frame(
+            mins, [np.inf if high is None else high for high in maxs], prices
+        )
+        # Descarta edições manuais para o editor exibir a tabela do cenário
+        st.session_state.pop(f"{stage}_editor", None)
+        st.session_state[f"{stage}_mode"] = spec["mode"]
+        st.session_state[f"{stage}_cap"] = spec["cap"] or 0.0
+        st.session_state[f"{stage}_floor"] = spec["floor"] or 0.0
+
+
+st.divider()
+st.header("🗂️ Cenários Salvos")
+st.markdown(
+    """
+    Salve o cenário atual (barra lateral + tabelas de preços) com um nome, como *conservador*, *POC* ou
+    *agressivo*. Os cenários ficam na sessão e no arquivo local `cenarios.json`, e **todos** são avaliados
+    juntos numa única chamada vetorizada: comparar 20 cenários custa praticamente o mesmo que comparar um.
+    """
+)
+
+if "scenarios" not in st.session_state:
+    try:
+        st.session_state["scenarios"] = load_scenarios(SCENARIOS_PATH)
+    except (OSError, ValueError, TypeError) as exc:
+        st.warning(f"Não foi possível ler {SCENARIOS_PATH}: {exc}")
+        st.session_state["scenarios"] = {}
+saved_scenarios = st.session_state["scenarios"]
+
+scenario_col1, scenario_col2 = st.columns([0.7, 0.3])
+scenario_name = scenario_col1.text_input(
+    "Nome do cenário",
+    value=f"Cenário {len(saved_scenarios) + 1}",
+    key="scenario_name",
+)
+scenario_col2.markdown("")
+scenario_changed = False
+if scenario_col2.button("💾 Salvar cenário atual", use_container_width=True):
+    # "Atual" é sempre o cenário da barra lateral
+    if scenario_name.strip() == "Atual":
+        st.warning('O nome "Atual" é reservado para o cenário da barra lateral; escolha outro.')
+    else:
+        saved_scenarios[scenario_name] = current_scenario(scenario_name)
+        scenario_changed = True
+
+if saved_scenarios:
+    manage_col1, manage_col2, manage_col3 = st.columns([0.5, 0.25, 0.25])
+    selected_scenario = manage_col1.selectbox(
+        "Cenário", list(saved_scenarios), key="selected_scenario"
+    )
+    manage_col2.markdown("")
+    manage_col2.button(
+        "📂 Carregar na barra lateral",
+        on_click=load_scenario,
+        args=(saved_scenarios[selected_scenario],),
+        use_container_width=True,
+    )
+    manage_col3.markdown("")
+    if manage_col3.button("🗑️ Excluir", use_container_width=True):
+        del saved_scenarios[selected_scenario]
+        scenario_changed = True
+
+if scenario_changed:
+    try:
+        save_scenarios(SCENARIOS_PATH, saved_scenarios)
+    except OSError as exc:
+        st.warning(f"Cenários mantidos só nesta sessão: {exc}")
+
+if saved_scenarios:
+    # Cenário atual + salvos, avaliados juntos (target e varredura de volume)
+    workspace = {"Atual": current_scenario("Atual"), **saved_scenarios}
+    workspace_volumes = sweep_volumes()
+    workspace_results = evaluate_scenarios(workspace.values(), workspace_volumes)
+
+    scenario_df = pd.DataFrame(
+        {
+            "Cenário": list(workspace),
+            "Leads": workspace_results["total_leads"],
+            "Resposta": workspace_results["response"],
+            "Qualificação": workspace_results["qualification"],
+            "Avanço": workspace_results["booking"],
+            "Reuniões": workspace_results["num_booked"],
+            "Vendas": workspace_results["num_vendas"],
+            "Custo Mensal": workspace_results["total_cost"],
+            "CPA": workspace_results["cpa"],
+            "Custo por Venda": workspace_results["custo_por_venda"],
+            "Receita Mensal": workspace_results["receita_mensal"],
+            "ROI sobre LTV": workspace_results["roi_ltv"],
+        }
+    )
+    st.dataframe(
+        scenario_df.style.format(
+            {
+                "Leads": "{:,.0f}",
+                "Resposta": "{:.1%}",
+                "Qualificação": "{:.1%}",
+                "Avanço": "{:.1%}",
+                "Reuniões": "{:,.1f}",
+                "Vendas": "{:,.1f}",
+                "Custo Mensal": "R$ {:,.2f}",
+                "CPA": "R$ {:,.2f}",
+                "Custo por Venda": "R$ {:,.2f}",
+                "Receita Mensal": "R$ {:,.2f}",
+                "ROI sobre LTV": "{:.1f}%",
+            }
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    tab_scenario_cost, tab_scenario_cpa = st.tabs(
+        ["Custo por Volume", "CPA por Volume"], key="scenario_tab", on_change="rerun"
+    )
+    for tab, column, target_column, y_title in (
+        (tab_scenario_cost, "sweep_cost", "total_cost", "Custo Total (R$)"),
+        (tab_scenario_cpa, "sweep_cpa", "cpa", "CPA (R$)"),
+    ):
+        if tab.open:
+            with tab:
+                show_figure(
+                    build_scenarios_figure,
+                    workspace_volumes,
+                    list(workspace),
+                    workspace_results[column],
+                    workspace_results["total_leads"],
+                    workspace_results[target_column],
+                    y_title,
+                    log_x=enterprise_mode,
+                )
+
+
+# --- Ajuste Automático de Tabelas a partir de Metas ---
+FIT_STAGE_LABELS = {
+    "leads": "Lead Processado",
+    "qualified": "Lead Qualificado",
+    "booked": "Lead Avançado",
+}
+
+
+def load_fitted_tables(tables):
+    """Carrega as tabelas ajustadas nos editores da barra lateral"""
+    st.session_state["pricing_overrides"].update(tables)
+    # Descarta edições manuais anteriores para o editor exibir a nova tabela
+    for stage in tables:
+        st.session_state.pop(f"{stage}_editor", None)
+
+
+if ENABLE_PRICE_EDITING:
+    st.divider()
+    with st.expander("🛠️ **Desenhar Tabelas de Preços a partir de Metas**"):
+        st.markdown(
+            """
+            Defina metas de negociação (CPA máximo, receita mensal mínima/máxima em volumes específicos)
+            e o otimizador busca faixas e preços que as atendem, usando as taxas de conversão configuradas.
+            """
+        )
+        with st.form("tier_fit_form"):
+            fit_col1, fit_col2, fit_col3 = st.columns(3)
+            fit_n_tiers = fit_col1.number_input(
+                "Número de faixas", min_value=2, max_value=8, value=4, step=1
+            )
+            fit_stages = fit_col2.multiselect(
+                "Tabelas a ajustar",
+                options=["leads", "qualified", "booked"],
+                default=["leads", "qualified", "booked"],
+                format_func=FIT_STAGE_LABELS.get,
+            )
+            fit_monotonic = fit_col3.checkbox(
+                "Preço nunca sobe com o volume", value=True
+            )
+            fit_targets_df = st.data_editor(
+                pd.DataFrame(
+                    [
+                        {
+                            "Leads": 1000,
+                            "CPA Máximo": 250.0,
+                            "Receita Mínima": None,
+                            "Receita Máxima": None,
+                        },
+                        {
+                            "Leads": 3000,
+                            "CPA Máximo": None,
+                            "Receita Mínima": 15000.0,
+                            "Receita Máxima": None,
+                        },
+                    ]
                 ),
-                name="Seu Target",
-                showlegend=True,
+                key="fit_targets_editor",
+                num_rows="dynamic",
+                hide_index=True,
+                column_config={
+                    "Leads": st.column_config.NumberColumn("Leads", format="%d"),
+                    "CPA Máximo": st.column_config.NumberColumn(
+                        "CPA Máximo (R$)", format="%.2f"
+                    ),
+                    "Receita Mínima": st.column_config.NumberColumn(
+                        "Receita Mínima (R$/mês)", format="%.2f"
+                    ),
+                    "Receita Máxima": st.column_config.NumberColumn(
+                        "Receita Máxima (R$/mês)", format="%.2f"
+                    ),
+                },
             )
-        )
+            fit_submitted = st.form_submit_button("🎯 Otimizar Tabelas")
+
+        if fit_submitted and fit_stages:
+            from pricing.fitting import PriceTarget, fit_tier_tables
 
-        fig_heatmap_cost.update_layout(
-            title="Custo Total por Combinação de Taxas",
-            xaxis_title="Taxa de Agendamento (% de Qualificados)",
-            yaxis_title="Taxa de Qualificação (% de Respostas)",
-            height=600,
-        )
-        st.plotly_chart(fig_heatmap_cost, use_container_width=True)
-
-    with tab2:
-        fig_heatmap_cpa = go.Figure(
-            data=go.Heatmap(
-                z=cpa_matrix,
-                x=[f"{r * 100:.0f}%" for r in booking_rates_heatmap],
-                y=[f"{q * 100:.0f}%" for q in qual_rates_heatmap],
-                colorscale=custom_colorscale,
-                text=[[f"R$ {val:,.0f}" for val in row] for row in cpa_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 9},
-                colorbar=dict(title="CPA (R$)"),
-                hovertemplate="Qualificação: %{y}<br>Agendamento: %{x}<br>CPA: R$ %{z:,.2f}<extra></extra>",
+            fit_targets = [
+                PriceTarget(
+                    total_leads=row["Leads"],
+                    max_cpa=None if pd.isna(row["CPA Máximo"]) else row["CPA Máximo"],
+                    min_cost=(
+                        None if pd.isna(row["Receita Mínima"]) else row["Receita Mínima"]
+                    ),
+                    max_cost=(
+                        None if pd.isna(row["Receita Máxima"]) else row["Receita Máxima"]
+                    ),
+                )
+                for _, row in fit_targets_df.dropna(subset=["Leads"]).iterrows()
+            ]
+            if fit_targets:
+                with st.spinner("Avaliando tabelas candidatas..."):
+                    st.session_state["tier_fit"] = fit_tier_tables(
+                        fit_targets,
+                        compiled_pricing,
+                        rates,
+                        stages=tuple(fit_stages),
+                        n_tiers=int(fit_n_tiers),
+                        monotonic=fit_monotonic,
+                        minimum_billing=minimum_billing,
+                        ticket_medio=ticket_medio,
+                        taxa_conversao_vendas=taxa_conversao_vendas,
+                        comissao_vendas=comissao_vendas,
+                    )
+
+        tier_fit = st.session_state.get("tier_fit")
+        if tier_fit is not None:
+            if tier_fit.feasible:
+                st.success(
+                    f"Todas as metas atendidas ({tier_fit.evaluated:,} tabelas avaliadas)."
+                )
+            else:
+                st.warning(
+                    f"Nenhuma tabela atende todas as metas; exibindo a mais próxima ({tier_fit.evaluated:,} tabelas avaliadas)."
+                )
+            st.dataframe(
+                tier_fit.report.style.format(
+                    {
+                        "Alvo (R$)": "R$ {:,.2f}",
+                        "Atual (R$)": "R$ {:,.2f}",
+                        "Ajustado (R$)": "R$ {:,.2f}",
+                    }
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+            fit_table_cols = st.columns(len(tier_fit.tables))
+            for fit_col, (stage, table) in zip(fit_table_cols, tier_fit.tables.items()):
+                fit_col.caption(FIT_STAGE_LABELS[stage])
+                fit_col.dataframe(table, hide_index=True, use_container_width=True)
+            load_col1, load_col2 = st.columns(2)
+            load_col1.button(
+                "📥 Carregar nas Tabelas de Preços",
+                on_click=load_fitted_tables,
+                args=(tier_fit.tables,),
+            )
+            load_col2.button(
+                "⚖️ Enviar para Comparação",
+                on_click=lambda: st.session_state.setdefault("compare_sets", {}).update(
+                    {"Tabela Ajustada": tier_fit.pricing}
+                ),
             )
-        )
 
-        fig_heatmap_cpa.add_trace(
-            go.Scatter(
-                x=[f"{booking_rates_heatmap[target_book_idx] * 100:.0f}%"],
-                y=[f"{qual_rates_heatmap[target_qual_idx] * 100:.0f}%"],
-                mode="markers",
-                marker=dict(
-                    size=20,
-                    color=GRAY_4,
-                    symbol="star",
-                    line=dict(color="white", width=2),
+
+# --- Explorador do Espaço de Cenários ---
+EXPLORER_OBJECTIVES = {
+    "roi_ltv": "Maior ROI sobre LTV",
+    "num_vendas": "Mais vendas",
+    "num_booked": "Mais reuniões",
+    "cpa": "Menor CPA",
+}
+
+st.divider()
+with st.expander("🔭 **Explorador de Cenários**"):
+    st.markdown(
+        """
+        Percorre **todas** as combinações de volume e taxas de conversão dentro das faixas abaixo
+        e lista os melhores cenários que respeitam o orçamento mensal, usando as tabelas de preços atuais.
+        """
+    )
+    with st.form("explorer_form"):
+        exp_col1, exp_col2 = st.columns(2)
+        if enterprise_mode:
+            # Faixa de volumes até o limite enterprise, com volumes log-espaçados
+            exp_min_col, exp_max_col = exp_col1.columns(2)
+            exp_leads = (
+                exp_min_col.number_input(
+                    "Volume mínimo de leads",
+                    min_value=0,
+                    max_value=ENTERPRISE_MAX_LEADS,
+                    value=10_000,
+                    step=10_000,
                 ),
-                name="Seu Target",
-                showlegend=True,
+                exp_max_col.number_input(
+                    "Volume máximo de leads",
+                    min_value=1,
+                    max_value=ENTERPRISE_MAX_LEADS,
+                    value=1_000_000,
+                    step=10_000,
+                ),
+            )
+            exp_leads_points = exp_col2.number_input(
+                "Volumes na faixa (escala log)",
+                min_value=2,
+                max_value=ENTERPRISE_SWEEP_POINTS,
+                value=50,
+                step=10,
+            )
+        else:
+            exp_leads = exp_col1.slider(
+                "Volume de leads", min_value=0, max_value=10000, value=(500, 5000), step=100
             )
+            exp_leads_step = exp_col2.number_input(
+                "Passo de volume", min_value=10, max_value=1000, value=100, step=10
+            )
+        exp_response = exp_col1.slider(
+            "Taxa de resposta (%)", min_value=0, max_value=100, value=(20, 80)
         )
-
-        fig_heatmap_cpa.update_layout(
-            title="Custo por Reunião (CPA) por Combinação de Taxas",
-            xaxis_title="Taxa de Agendamento (% de Qualificados)",
-            yaxis_title="Taxa de Qualificação (% de Respostas)",
-            height=600,
+        exp_qualification = exp_col2.slider(
+            "Taxa de qualificação (%)", min_value=0, max_value=100, value=(10, 40)
+        )
+        exp_booking = exp_col1.slider(
+            "Taxa de avanço (%)", min_value=0, max_value=100, value=(10, 50)
+        )
+        exp_rate_step = exp_col2.number_input(
+            "Passo das taxas (p.p.)", min_value=0.5, max_value=10.0, value=1.0, step=0.5
         )
-        st.plotly_chart(fig_heatmap_cpa, use_container_width=True)
+        exp_col3, exp_col4, exp_col5 = st.columns(3)
+        exp_budget = exp_col3.number_input(
+            "Orçamento mensal máximo (R$)", min_value=0.0, value=10000.0, step=500.0
+        )
+        exp_objective = exp_col4.selectbox(
+            "Objetivo",
+            options=list(EXPLORER_OBJECTIVES),
+            format_func=EXPLORER_OBJECTIVES.get,
+        )
+        exp_k = exp_col5.number_input(
+            "Cenários no ranking", min_value=5, max_value=500, value=50, step=5
+        )
+        exp_submitted = st.form_submit_button("🔭 Explorar")
 
-    # Colorscale invertido para reuniões (mais = melhor)
-    meetings_colorscale = [
-        [0.0, GRAY_3],  # Menos reuniões = cinza claro
-        [0.5, LIGHT_BLUE_2],  # Médio = azul claro
-        [1.0, BRAND_COLOR],  # Mais reuniões = azul da marca
-    ]
+    if exp_submitted:
+        from pricing.explorer import explore
+
+        def rate_axis(bounds):
+            return np.arange(bounds[0], bounds[1] + exp_rate_step / 2, exp_rate_step) / 100
 
-    with tab3:
-        fig_heatmap_meetings = go.Figure(
-            data=go.Heatmap(
-                z=meetings_matrix,
-                x=[f"{r * 100:.0f}%" for r in booking_rates_heatmap],
-                y=[f"{q * 100:.0f}%" for q in qual_rates_heatmap],
-                colorscale=meetings_colorscale,
-                text=[[f"{int(val)}" for val in row] for row in meetings_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 9},
-                colorbar=dict(title="Reuniões"),
-                hovertemplate="Qualificação: %{y}<br>Agendamento: %{x}<br>Reuniões: %{z:.0f}<extra></extra>",
+        if enterprise_mode:
+            exp_low, exp_high = sorted(exp_leads)
+            exp_volumes = np.unique(
+                np.round(np.geomspace(max(exp_low, 1), max(exp_high, 1), int(exp_leads_points)))
+            )
+            if exp_low == 0:
+                exp_volumes = np.concatenate([[0.0], exp_volumes])
+        else:
+            exp_volumes = np.arange(exp_leads[0], exp_leads[1] + 1, exp_leads_step, dtype=float)
+        exp_axes = {
+            "total_leads": exp_volumes,
+            "response": rate_axis(exp_response),
+            "qualification": rate_axis(exp_qualification),
+            "booking": rate_axis(exp_booking),
+        }
+        with st.spinner("Avaliando cenários..."):
+            st.session_state["explorer_result"] = explore(
+                exp_axes,
+                compiled_pricing,
+                objective=exp_objective,
+                k=int(exp_k),
+                max_cost=exp_budget,
+                minimum_billing=minimum_billing,
+                ticket_medio=ticket_medio,
+                taxa_conversao_vendas=taxa_conversao_vendas,
+                comissao_vendas=comissao_vendas,
+                ltv_valor=ltv_valor,
             )
-        )
 
-        fig_heatmap_meetings.add_trace(
-            go.Scatter(
-                x=[f"{booking_rates_heatmap[target_book_idx] * 100:.0f}%"],
-                y=[f"{qual_rates_heatmap[target_qual_idx] * 100:.0f}%"],
-                mode="markers",
-                marker=dict(
-                    size=20,
-                    color=GRAY_4,
-                    symbol="star",
-                    line=dict(color="white", width=2),
+    exploration = st.session_state.get("explorer_result")
+    if exploration is not None:
+        stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+        stat_col1.metric(
+            "Cenários Avaliados",
+            f"{exploration.evaluated:,}",
+            delta=f"{exploration.scenarios_per_second:,.0f} cenários/s",
+            delta_color="off",
+        )
+        stat_col2.metric(
+            "Dentro do Orçamento",
+            f"{exploration.feasible:,}",
+            delta=f"{exploration.feasible / max(exploration.evaluated, 1) * 100:.1f}% do espaço",
+            delta_color="off",
+        )
+        if exploration.feasible:
+            stat_col3.metric(
+                "Custo Médio (viáveis)",
+                f"R$ {exploration.cost_stats.mean:,.2f}",
+                delta=f"R$ {exploration.cost_stats.minimum:,.0f} – R$ {exploration.cost_stats.maximum:,.0f}",
+                delta_color="off",
+            )
+            stat_col4.metric(
+                "Melhor Cenário",
+                f"R$ {exploration.top[0]['total_cost']:,.2f}",
+                delta=f"{exploration.top[0]['num_booked']:.0f} reuniões · {exploration.top[0]['num_vendas']:.1f} vendas",
+                delta_color="off",
+            )
+            top_df = exploration.to_frame()
+            for rate_col in ("response", "qualification", "booking"):
+                top_df[rate_col] = top_df[rate_col] * 100
+            # O objetivo só é exibido quando não repete uma coluna (ROI sobre LTV)
+            if exploration.objective == "roi_ltv":
+                top_df = top_df.rename(columns={"score": "ROI sobre LTV (%)"})
+            else:
+                top_df = top_df.drop(columns="score")
+            top_df = top_df.rename(
+                columns={
+                    "total_leads": "Leads",
+                    "response": "Resposta (%)",
+                    "qualification": "Qualificação (%)",
+                    "booking": "Avanço (%)",
+                    "total_cost": "Custo Total (R$)",
+                    "num_booked": "Reuniões",
+                    "num_vendas": "Vendas",
+                    "cpa": "CPA (R$)",
+                }
+            )
+            st.dataframe(
+                top_df.style.format(
+                    {
+                        "Leads": "{:,.0f}",
+                        "Resposta (%)": "{:.1f}",
+                        "Qualificação (%)": "{:.1f}",
+                        "Avanço (%)": "{:.1f}",
+                        "Custo Total (R$)": "R$ {:,.2f}",
+                        "Reuniões": "{:,.1f}",
+                        "Vendas": "{:,.1f}",
+                        "CPA (R$)": "R$ {:,.2f}",
+                        "ROI sobre LTV (%)": "{:,.1f}%",
+                    }
                 ),
-                name="Seu Target",
-                showlegend=True,
+                hide_index=True,
+                use_container_width=True,
             )
+        else:
+            st.warning("Nenhum cenário cabe no orçamento informado.")
+
+
+# --- Alocação de Orçamento entre Segmentos e Meses ---
+ALLOCATION_SEGMENTS = ("SMB", "Mid-Market")
+# Leads disponíveis padrão: abandonados do TotalPass, divididos entre os segmentos
+ALLOCATION_SHARES = {"SMB": 0.7, "Mid-Market": 0.3}
+
+st.divider()
+allocation_section = st.expander(
+    "🎯 **Alocação de Orçamento entre Segmentos**", key="allocation_section", on_change="rerun"
+)
+with allocation_section:
+    st.markdown(
+        """
+        Divide um orçamento fixo entre os fluxos **SMB** (5–20 vidas) e **Mid-Market** (+20 vidas) e entre os
+        meses, maximizando vendas, receita do LTV ou reuniões. Cada segmento tem taxas, tabelas de preços e leads
+        disponíveis próprios, e as faixas recomeçam a cada mês. Com preços decrescentes o custo é côncavo e ajustar
+        os sliders aos poucos não encontra o ótimo: o otimizador percorre os pontos de quebra das tabelas.
+        O consumo mínimo da barra lateral é cobrado da conta em todos os meses, inclusive nos sem leads.
+        """
+    )
+    # Só calcula com a seção aberta
+    if allocation_section.open:
+        from pricing.allocation import OBJECTIVES as ALLOCATION_OBJECTIVES
+        from pricing.allocation import Segment, optimize_allocation
+
+        alloc_col1, alloc_col2 = st.columns(2)
+        allocation_budget = alloc_col1.number_input(
+            "Orçamento total do horizonte (R$)",
+            min_value=0.0,
+            value=150000.0,
+            step=5000.0,
+            key="allocation_budget",
+        )
+        allocation_objective = alloc_col2.radio(
+            "Maximizar",
+            options=list(ALLOCATION_OBJECTIVES),
+            format_func=ALLOCATION_OBJECTIVES.get,
+            horizontal=True,
+            key="allocation_objective",
         )
 
-        fig_heatmap_meetings.update_layout(
-            title="Reuniões Agendadas por Combinação de Taxas",
-            xaxis_title="Taxa de Agendamento (% de Qualificados)",
-            yaxis_title="Taxa de Qualificação (% de Respostas)",
-            height=600,
+        st.caption(
+            "Tabelas: as atuais da barra lateral ou as de um cenário salvo. "
+            "O Mid-Market começa com ticket 4× maior; ajuste às taxas reais de cada fluxo."
+        )
+        segments_df = st.data_editor(
+            pd.DataFrame(
+                {
+                    "Segmento": list(ALLOCATION_SEGMENTS),
+                    "Tabelas": ["Atual"] * len(ALLOCATION_SEGMENTS),
+                    "Resposta (%)": [target_response_rate * 100] * len(ALLOCATION_SEGMENTS),
+                    "Qualificação (%)": [target_qualification_rate * 100] * len(ALLOCATION_SEGMENTS),
+                    "Avanço (%)": [target_booking_rate * 100] * len(ALLOCATION_SEGMENTS),
+                    "Conversão em Vendas (%)": [taxa_conversao_vendas * 100]
+                    * len(ALLOCATION_SEGMENTS),
+                    "Ticket Mensal (R$)": [ticket_medio_mensal, ticket_medio_mensal * 4],
+                    "LTV (dias)": [float(ltv_dias)] * len(ALLOCATION_SEGMENTS),
+                }
+            ),
+            key="allocation_segments",
+            disabled=["Segmento"],
+            column_config={
+                "Tabelas": st.column_config.SelectboxColumn(
+                    "Tabelas", options=["Atual", *saved_scenarios], required=True
+                ),
+                **{
+                    column: st.column_config.NumberColumn(
+                        column, min_value=0.0, max_value=100.0, format="%.1f"
+                    )
+                    for column in (
+                        "Resposta (%)",
+                        "Qualificação (%)",
+                        "Avanço (%)",
+                        "Conversão em Vendas (%)",
+                    )
+                },
+                "Ticket Mensal (R$)": st.column_config.NumberColumn(min_value=0.0, format="%.2f"),
+                "LTV (dias)": st.column_config.NumberColumn(min_value=0.0, format="%d"),
+            },
+            hide_index=True,
+            use_container_width=True,
         )
-        st.plotly_chart(fig_heatmap_meetings, use_container_width=True)
 
-    # Insights adicionais
-    st.subheader("💡 Insights da Matriz de Sensibilidade")
-    col_ins1, col_ins2, col_ins3 = st.columns(3)
+        st.caption("Leads disponíveis por mês (uma linha por mês do horizonte)")
+        abandoned_leads = TOTALPASS_DATA["volume_leads_mes"] * TOTALPASS_DATA["leads_abandonados_pct"]
+        capacity_df = st.data_editor(
+            pd.DataFrame(
+                {
+                    "Mês": np.arange(1, 13),
+                    **{
+                        name: np.full(12, round(abandoned_leads * ALLOCATION_SHARES[name]))
+                        for name in ALLOCATION_SEGMENTS
+                    },
+                }
+            ),
+            key="allocation_capacity",
+            num_rows="dynamic",
+            column_config={
+                name: st.column_config.NumberColumn(name, min_value=0, format="%d")
+                for name in ALLOCATION_SEGMENTS
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
 
-    # Encontrar o melhor e pior cenário
-    flat_costs = [cost for row in cost_matrix for cost in row]
-    flat_cpas = [cpa for row in cpa_matrix for cpa in row if cpa > 0]
-    flat_meetings = [meeting for row in meetings_matrix for meeting in row]
+        def allocation_segment(row):
+            """Segmento do otimizador a partir de uma linha da tabela de segmentos"""
+            tables = row["Tabelas"]
+            return Segment(
+                name=row["Segmento"],
+                pricing=(
+                    saved_scenarios[tables].pricing() if tables in saved_scenarios else compiled_pricing
+                ),
+                response=float(np.nan_to_num(row["Resposta (%)"])) / 100,
+                qualification=float(np.nan_to_num(row["Qualificação (%)"])) / 100,
+                booking=float(np.nan_to_num(row["Avanço (%)"])) / 100,
+                capacity=capacity_df[row["Segmento"]].fillna(0).to_numpy(dtype=float),
+                ticket_medio=float(np.nan_to_num(row["Ticket Mensal (R$)"])),
+                ltv_dias=float(np.nan_to_num(row["LTV (dias)"])),
+                taxa_conversao_vendas=float(np.nan_to_num(row["Conversão em Vendas (%)"])) / 100,
+                comissao_vendas=comissao_vendas,
+            )
 
-    col_ins1.metric(
-        "Custo Mínimo Possível",
-        f"R$ {min(flat_costs):,.2f}",
-        delta=f"{((min(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
-        delta_color="inverse",
-    )
+        allocation_start = time.perf_counter()
+        allocation = optimize_allocation(
+            [allocation_segment(row) for _, row in segments_df.iterrows()],
+            allocation_budget,
+            objective=allocation_objective,
+            minimum_billing=minimum_billing,
+        )
+        allocation_ms = (time.perf_counter() - allocation_start) * 1000
+
+        if allocation is None:
+            st.warning(
+                f"Nem a alocação vazia cabe no orçamento: {len(capacity_df)} meses de consumo "
+                f"mínimo somam R$ {len(capacity_df) * minimum_billing:,.2f} (mais os pisos das tabelas)."
+            )
+        else:
+            objective_label = ALLOCATION_OBJECTIVES[allocation.objective]
+            value_format = "R$ {:,.2f}" if allocation.objective == "receita_ltv" else "{:,.1f}"
+            result_col1, result_col2, result_col3, result_col4 = st.columns(4)
+            result_col1.metric(objective_label, value_format.format(allocation.total_value))
+            result_col2.metric("Custo Total", f"R$ {allocation.total_cost:,.2f}")
+            result_col3.metric("Sobra do Orçamento", f"R$ {allocation.leftover:,.2f}")
+            result_col4.metric("Leads Alocados", f"{allocation.leads.sum():,.0f}")
+            if allocation.exact:
+                st.caption(
+                    f"✅ Ótimo garantido (custo mensal côncavo em todos os segmentos, com o consumo "
+                    f"mínimo de R$ {minimum_billing:,.2f} por mês) · "
+                    f"⚡ {allocation_ms:,.0f} ms, {allocation.candidates:,} candidatos avaliados"
+                )
+            else:
+                st.info(
+                    "Alguma tabela usa cobrança por volume, preços crescentes ou piso, ou o consumo "
+                    "mínimo mensal pesa na divisão entre os segmentos: esta é a melhor alocação entre "
+                    "os candidatos avaliados, sem garantia de ótimo."
+                )
+
+            allocation_df = pd.DataFrame({"Mês": capacity_df["Mês"].to_numpy()})
+            for idx, name in enumerate(allocation.segments):
+                allocation_df[f"Leads {name}"] = allocation.leads[idx]
+                allocation_df[f"Custo {name}"] = allocation.cost[idx]
+            # Meses abaixo do mínimo pagam a diferença, inclusive os sem leads
+            allocation_df["Complemento do Mínimo"] = allocation.billed - allocation.cost.sum(axis=0)
+            allocation_df[objective_label] = allocation.value.sum(axis=0)
+            st.dataframe(
+                allocation_df.style.format(
+                    {
+                        **{f"Leads {name}": "{:,.0f}" for name in allocation.segments},
+                        **{f"Custo {name}": "R$ {:,.2f}" for name in allocation.segments},
+                        "Complemento do Mínimo": "R$ {:,.2f}",
+                        objective_label: value_format,
+                    }
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+            show_figure(
+                build_allocation_figure,
+                allocation_df["Mês"].to_numpy(),
+                dict(zip(allocation.segments, allocation.leads)),
+            )
 
-    col_ins2.metric(
-        "Custo Máximo Possível",
-        f"R$ {max(flat_costs):,.2f}",
-        delta=f"{((max(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
-        delta_color="inverse",
-    )
 
-    col_ins3.metric(
-        "Máximo de Reuniões Possível",
-        f"{int(max(flat_meetings))}",
-        delta=f"{int(max(flat_meetings) - target_results['num_booked'])} vs Target",
+# --- Pré-cálculo Especulativo ---
+# Passo e limites dos sliders do funil, nas unidades da simulação
+SLIDER_STEPS = {
+    "total_leads": 10_000 if enterprise_mode else 100,
+    "response": 0.005,
+    "qualification": 0.005,
+    "booking": 0.005,
+}
+SLIDER_BOUNDS = {
+    "total_leads": (0, ENTERPRISE_MAX_LEADS if enterprise_mode else SWEEP_MAX_LEADS),
+    "response": (0.0, 1.0),
+    "qualification": (0.0, 1.0),
+    "booking": (0.0, 1.0),
+}
+slider_history = st.session_state.setdefault("slider_history", {})
+recent_sliders = track_sliders(
+    slider_history,
+    {
+        "total_leads": target_total_leads,
+        "response": target_response_rate,
+        "qualification": target_qualification_rate,
+        "booking": target_booking_rate,
+    },
+)
+# Os dois sliders tocados por último; o pré-cálculo roda depois da página pronta
+prefetcher.schedule(
+    speculative_jobs(
+        simulation_calls,
+        neighbor_moves(
+            recent_sliders[:2], SLIDER_STEPS, SLIDER_BOUNDS, slider_history["values"]
+        ),
+        compiled_pricing,
+        simulation_params,
     )
+)
 
-else:
-    st.info("Ajuste a quantidade de leads na barra lateral para iniciar a simulação.")
+# --- Memória da Sessão ---
+# Mede tudo o que a sessão guarda entre execuções; acima do limite, descarta as
+# varreduras menos usadas do cache (o restante do estado não é descartável)
+session_cap_bytes = SESSION_MEMORY_CAP_MB * 1e6
+session_bytes = footprint(st.session_state.to_dict())
+if session_bytes > session_cap_bytes:
+    result_cache.evict_to(
+        max(0.0, result_cache.nbytes - (session_bytes - session_cap_bytes))
+    )
+    session_bytes = footprint(st.session_state.to_dict())
+st.caption(
+    f"🧠 Memória desta sessão: {session_bytes / 1e6:,.2f} MB "
+    f"(cache: {len(result_cache)} resultados, {result_cache.nbytes / 1e6:,.2f} MB; "
+    f"limite {SESSION_MEMORY_CAP_MB} MB) · ⚡ {prefetcher.computed} pré-calculados, "
+    f"{result_cache.hits} reaproveitados"
+)
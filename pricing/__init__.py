@@ -0,0 +1,27 @@
+"""
+Motor de precificação do simulador TotalPass | Sailer AI.
+
+Funções de cálculo usadas pelo `app.py`, sem dependência do Streamlit.
+"""
+
+from pricing.engine import run_simulation, simulate_batch
+from pricing.results import SimulationBatch, SimulationResult
+from pricing.schedules import (
+    CompiledPricing,
+    TierSchedule,
+    calculate_tiered_cost,
+    compile_pricing,
+    compile_schedule,
+)
+
+__all__ = [
+    "CompiledPricing",
+    "SimulationBatch",
+    "SimulationResult",
+    "TierSchedule",
+    "calculate_tiered_cost",
+    "compile_pricing",
+    "compile_schedule",
+    "run_simulation",
+    "simulate_batch",
+]
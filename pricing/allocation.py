@@ -0,0 +1,312 @@
+"""
+Alocação de leads entre segmentos e meses com orçamento fixo.
+
+Cada segmento (ex.: SMB e Mid-Market) tem taxas do funil, tabelas de preços e
+leads disponíveis por mês próprios, e as faixas recomeçam a cada mês. O custo
+de um segmento no mês é linear entre os pontos de quebra das tabelas levados
+ao espaço de leads (`lead_breakpoints`), e o resultado (reuniões, vendas ou
+receita do LTV) é proporcional aos leads.
+
+`optimize_allocation` usa essa estrutura em duas etapas:
+
+1. Por segmento, o custo mínimo de T leads no horizonte. Com preços
+   decrescentes o custo do mês é côncavo, e encher primeiro os meses com mais
+   leads disponíveis é ótimo: essa divisão majoriza qualquer outra. A curva
+   F(T) resultante é linear entre pontos de quebra conhecidos.
+2. Entre segmentos, maximizar Σ resultado por lead × T com Σ F(T) <= orçamento.
+   Fixado o trecho de cada curva, é um programa linear com uma restrição, e a
+   solução ótima tem no máximo um segmento fora de um ponto de quebra. Basta
+   enumerar os pontos de quebra dos demais e dar ao segmento livre o maior T
+   que cabe no orçamento restante.
+
+O consumo mínimo é cobrado por mês da conta, sobre a soma dos segmentos, e
+também nos meses sem leads. Até o mínimo o uso do mês já está pago: além dos
+candidatos acima (que ignoram o mínimo), cada segmento por vez recebe em todos
+os meses os leads que cabem no mínimo, e o resto do orçamento, já descontados
+os mínimos, segue as mesmas duas etapas.
+
+Os candidatos são avaliados com `simulate_batch` e o melhor dentro do
+orçamento é escolhido. A alocação é ótima (`exact=True`) quando o custo do mês
+de todos os segmentos é côncavo e contínuo (modo escalonado, preços não
+crescentes, sem piso) e o mínimo não muda a resposta: sem mínimo, com um
+segmento só, ou quando o ótimo sem o mínimo já o atinge em todos os meses. Nos
+demais casos é a melhor entre os candidatos. Os candidatos crescem com o
+produto dos pontos de quebra dos segmentos além do livre: para dois
+segmentos, alguns milhares.
+"""
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from pricing.engine import funnel_volumes, lead_breakpoints, simulate_batch
+from pricing.schedules import STAGES, compile_pricing
+
+# Resultado maximizado -> rótulo
+OBJECTIVES = {
+    "num_vendas": "Vendas",
+    "receita_ltv": "Receita do LTV",
+    "num_booked": "Reuniões",
+}
+
+
+@dataclass
+class Segment:
+    """
+    Fluxo de leads de um segmento: taxas (0-1), tabelas de preços e leads
+    disponíveis em cada mês do horizonte (`capacity`).
+    """
+
+    name: str
+    pricing: object
+    response: float
+    qualification: float
+    booking: float
+    capacity: object
+    ticket_medio: float = 0.0
+    ltv_dias: float = 0.0
+    taxa_conversao_vendas: float = 0.0
+    comissao_vendas: float = 0.0
+
+    def value_per_lead(self, objective):
+        """Resultado (`OBJECTIVES`) por lead disparado."""
+        booked = float(funnel_volumes(1.0, self.response, self.qualification, self.booking)[3])
+        if objective == "num_booked":
+            return booked
+        vendas = booked * self.taxa_conversao_vendas
+        if objective == "num_vendas":
+            return vendas
+        return vendas * self.ticket_medio * self.ltv_dias / 30
+
+    def monthly_cost(self, leads):
+        """Custo de cada mês com `leads` leads disparados (sem consumo mínimo)."""
+        return simulate_batch(
+            leads,
+            self.response,
+            self.qualification,
+            self.booking,
+            self.pricing,
+            0.0,
+            self.ticket_medio,
+            self.taxa_conversao_vendas,
+            self.comissao_vendas,
+        )["total_cost"]
+
+    def is_concave(self):
+        """Custo do mês côncavo e contínuo até o maior mês disponível."""
+        if any(getattr(self.pricing, stage).all_units for stage in STAGES):
+            return False
+        largest = float(np.max(self.capacity, initial=0.0))
+        kinks = lead_breakpoints(self.pricing, self.response, self.qualification, self.booking)
+        points = np.unique(np.concatenate([[0.0], kinks[kinks < largest], [largest]]))
+        if len(points) < 3:
+            return True
+        slopes = np.diff(self.monthly_cost(points)) / np.diff(points)
+        return bool(np.all(np.diff(slopes) <= 1e-9 * np.maximum(1.0, np.abs(slopes[1:]))))
+
+
+@dataclass
+class Allocation:
+    """
+    Alocação escolhida: leads, custo e resultado por segmento (linhas) e mês
+    (colunas) no orçamento `budget`.
+    """
+
+    segments: tuple
+    objective: str
+    budget: float
+    leads: np.ndarray
+    cost: np.ndarray
+    value: np.ndarray
+    exact: bool
+    candidates: int
+    minimum_billing: float = 0.0
+
+    @property
+    def billed(self):
+        """Fatura de cada mês: custo dos segmentos, no mínimo o consumo mínimo."""
+        return np.maximum(self.cost.sum(axis=0), self.minimum_billing)
+
+    @property
+    def total_cost(self):
+        return float(self.billed.sum())
+
+    @property
+    def total_value(self):
+        return float(self.value.sum())
+
+    @property
+    def leftover(self):
+        return self.budget - self.total_cost
+
+
+def split_months(capacity, total):
+    """
+    Leads de cada mês para `total` leads no horizonte, enchendo primeiro os
+    meses com mais leads disponíveis. `total` aceita arrays; shape (..., meses).
+    """
+    capacity = np.asarray(capacity, dtype=float)
+    order = np.argsort(-capacity, kind="stable")
+    filled_before = np.concatenate([[0.0], np.cumsum(capacity[order])[:-1]])
+    ordered = np.clip(
+        np.asarray(total, dtype=float)[..., None] - filled_before, 0.0, capacity[order]
+    )
+    leads = np.empty_like(ordered)
+    leads[..., order] = ordered
+    return leads
+
+
+def _free_leads(segment, allowance):
+    """Leads de cada mês cujo custo cabe em `allowance` (o consumo mínimo já pago)."""
+    capacity = np.asarray(segment.capacity, dtype=float)
+    if allowance <= 0:
+        return np.zeros_like(capacity)
+    largest = float(np.max(capacity, initial=0.0))
+    kinks = lead_breakpoints(
+        segment.pricing, segment.response, segment.qualification, segment.booking
+    )
+    points = np.unique(np.concatenate([[0.0], kinks[kinks < largest], [largest]]))
+    covered = _max_within(points, segment.monthly_cost(points), allowance)
+    return np.minimum(capacity, max(float(covered), 0.0))
+
+
+def _split(segment, totals, free):
+    """Primeiro os leads `free` de cada mês; o resto enche os meses com mais sobra."""
+    free_total = free.sum()
+    totals = np.asarray(totals, dtype=float)
+    return split_months(free, np.minimum(totals, free_total)) + split_months(
+        segment.capacity - free, np.maximum(totals - free_total, 0.0)
+    )
+
+
+def _curve(segment, free, allowance):
+    """
+    Pontos de quebra da curva F(T) (custo mínimo de T leads no horizonte, além
+    de `allowance` por mês quando `free` > 0) e F neles.
+    """
+    kinks = lead_breakpoints(
+        segment.pricing, segment.response, segment.qualification, segment.booking
+    )
+    remaining = np.asarray(segment.capacity, dtype=float) - free
+    order = np.argsort(-remaining, kind="stable")
+    filled_before = free.sum() + np.concatenate([[0.0], np.cumsum(remaining[order])[:-1]])
+    points = [[0.0], filled_before, [free.sum() + remaining.sum()]]
+    for start, size, base in zip(filled_before, remaining[order], free[order]):
+        # Quebras do mês depois dos leads já cobertos pelo mínimo
+        points.append(start + kinks[(kinks > base) & (kinks < base + size)] - base)
+    totals = np.unique(np.concatenate(points))
+    return totals, _horizon_cost(segment, totals, free, allowance)
+
+
+def _horizon_cost(segment, totals, free, allowance):
+    cost = segment.monthly_cost(_split(segment, totals, free))
+    return np.maximum(cost - allowance, 0.0).sum(axis=-1)
+
+
+def _max_within(points, costs, budget, interpolate=True):
+    """
+    Maior T com F(T) <= orçamento, para cada valor de `budget` (F linear entre
+    `points`); -inf quando nada cabe. Sem `interpolate`, só pontos de quebra.
+    """
+    budget = np.asarray(budget, dtype=float)[..., None]
+    best = np.where(costs <= budget, points, -np.inf).max(axis=-1)
+    if not interpolate or len(points) < 2:
+        return best
+    start, end = points[:-1], points[1:]
+    f_start, f_end = costs[:-1], costs[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inside = start + (budget - f_start) / (f_end - f_start) * (end - start)
+    crossing = (f_start <= budget) & (budget < f_end)
+    return np.maximum(best, np.where(crossing, inside, -np.inf).max(axis=-1))
+
+
+def _vertices(curves, budget):
+    """Totais candidatos (candidatos, segmentos): demais segmentos num ponto de quebra."""
+    candidates = []
+    for free in range(len(curves)):
+        others = [i for i in range(len(curves)) if i != free]
+        grid = np.meshgrid(*(np.arange(len(curves[i][0])) for i in others), indexing="ij")
+        totals = np.zeros((grid[0].size if others else 1, len(curves)))
+        remaining = np.full(len(totals), float(budget))
+        for i, index in zip(others, grid):
+            totals[:, i] = curves[i][0][index.ravel()]
+            remaining -= curves[i][1][index.ravel()]
+        for interpolate in (True, False):
+            chosen = totals.copy()
+            chosen[:, free] = _max_within(*curves[free], remaining, interpolate)
+            candidates.append(chosen[np.isfinite(chosen[:, free])])
+    return np.concatenate(candidates)
+
+
+def optimize_allocation(segments, budget, objective="num_vendas", minimum_billing=0.0):
+    """
+    Leads de cada segmento em cada mês que maximizam `objective` com custo
+    total até `budget`, com o consumo mínimo `minimum_billing` cobrado por mês
+    da conta; None se nem a alocação vazia cabe no orçamento.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objetivo desconhecido: {objective!r}")
+    segments = [replace(s, pricing=compile_pricing(s.pricing)) for s in segments]
+    months = {np.size(s.capacity) for s in segments}
+    if len(months) != 1:
+        raise ValueError("Todos os segmentos precisam do mesmo número de meses")
+    minimum_billing = float(minimum_billing)
+    values = np.array([s.value_per_lead(objective) for s in segments])
+    none_free = [np.zeros(np.size(s.capacity)) for s in segments]
+
+    # Sem o mínimo (orçamento inteiro ou já descontados os mínimos) e, com ele,
+    # cada segmento por vez com os leads que cabem no mínimo de cada mês
+    layouts = [(None, float(budget))]
+    if minimum_billing > 0:
+        fixed = months.pop() * minimum_billing
+        layouts.append((None, budget - fixed))
+        layouts += [(owner, budget - fixed) for owner in range(len(segments))]
+    leads, candidates = [], 0
+    for owner, available in layouts:
+        free = list(none_free)
+        if owner is not None:
+            free[owner] = _free_leads(segments[owner], minimum_billing)
+        curves = [
+            _curve(s, free[i], minimum_billing if i == owner else 0.0)
+            for i, s in enumerate(segments)
+        ]
+        totals = _vertices(curves, available)
+        candidates += len(totals)
+        leads.append(
+            np.stack(
+                [_split(s, totals[:, i], free[i]) for i, s in enumerate(segments)], axis=1
+            )
+        )
+    # Os primeiros são os candidatos sem o mínimo: o ótimo do problema sem ele
+    unconstrained = len(leads[0])
+    leads = np.concatenate(leads)
+
+    cost = np.stack([s.monthly_cost(leads[:, i]) for i, s in enumerate(segments)], axis=1)
+    usage = cost.sum(axis=1)
+    total_cost = np.maximum(usage, minimum_billing).sum(axis=-1)
+    feasible = np.flatnonzero(total_cost <= budget * (1 + 1e-9) + 1e-6)
+    if feasible.size == 0:
+        return None
+    objective_value = leads.sum(axis=-1) @ values
+    # Maior resultado; nos empates, o menor custo
+    best = feasible[np.lexsort((total_cost[feasible], -objective_value[feasible]))[0]]
+
+    # O mínimo não muda a resposta se o ótimo sem ele já o atinge em todos os meses
+    exact = all(s.is_concave() for s in segments)
+    if exact and minimum_billing > 0 and len(segments) > 1:
+        within = np.flatnonzero(usage[:unconstrained].sum(axis=-1) <= budget * (1 + 1e-9) + 1e-6)
+        reference = within[np.argmax(objective_value[within])] if within.size else None
+        exact = reference is not None and bool(
+            np.all(usage[reference] >= minimum_billing * (1 - 1e-9))
+        )
+    return Allocation(
+        segments=tuple(s.name for s in segments),
+        objective=objective,
+        budget=float(budget),
+        leads=leads[best],
+        cost=cost[best],
+        value=leads[best] * values[:, None],
+        exact=exact,
+        candidates=candidates,
+        minimum_billing=minimum_billing,
+    )
@@ -0,0 +1,154 @@
+"""
+Cache de resultados por sessão, limitado em bytes.
+
+Cada sessão do app guarda suas varreduras num `ResultCache` (LRU). O tamanho
+de cada entrada é medido com `footprint`, e o cache descarta as entradas
+menos usadas quando a memória da sessão passa do limite configurado. O cache
+pode ser preenchido por uma thread em segundo plano (ver `pricing.speculative`).
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from pricing.results import SimulationBatch, SimulationResult
+from pricing.schedules import CompiledPricing, TierSchedule
+
+
+# Casas decimais das entradas nas chaves: o mesmo cenário calculado por caminhos
+# diferentes (ex.: 0.45 + 0.005 e 45.5 / 100) cai na mesma chave
+KEY_DECIMALS = 9
+
+
+def normalize_inputs(values):
+    """Entradas da simulação como arrays float arredondados para `KEY_DECIMALS`."""
+    return [np.round(np.asarray(v, dtype=float), KEY_DECIMALS) for v in values]
+
+
+def simulation_key(fingerprint, inputs, params, with_gradients):
+    """
+    Chave de cache de uma chamada a `simulate_batch` com entradas normalizadas;
+    `fingerprint` é o do plano com as tabelas (`plan_for(pricing).fingerprint`).
+    """
+    return (
+        fingerprint,
+        tuple((x.shape, x.tobytes()) for x in inputs),
+        tuple(params),
+        with_gradients,
+    )
+
+
+def footprint(obj, _seen=None):
+    """Estimativa em bytes da memória ocupada por `obj` (arrays, lotes, tabelas, contêineres)."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        # Views não são donas da memória: contam só o cabeçalho
+        return sys.getsizeof(obj) if obj.base is not None else obj.nbytes + 112
+    if isinstance(obj, SimulationBatch):
+        return footprint(obj.data, seen) + sys.getsizeof(obj)
+    if isinstance(obj, SimulationResult):
+        return sys.getsizeof(obj) + footprint(obj.extra, seen)
+    if isinstance(obj, TierSchedule):
+        return sum(footprint(a, seen) for a in (obj.mins, obj.maxs, obj.prices))
+    if isinstance(obj, CompiledPricing):
+        return sum(footprint(s, seen) for s in (obj.leads, obj.qualified, obj.booked))
+    if isinstance(obj, ResultCache):
+        return obj.nbytes
+    if type(obj).__name__ == "DataFrame":
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            footprint(k, seen) + footprint(v, seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(footprint(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + footprint(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+class ResultCache:
+    """
+    Cache LRU com orçamento em bytes.
+
+    `get_or_compute(chave, função)` devolve o resultado guardado ou calcula e
+    guarda. Entradas maiores que o orçamento inteiro não são guardadas. Todas
+    as operações são protegidas por um lock.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # chave -> (valor, bytes)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = footprint(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            self.evict_to(self.max_bytes)
+        return value
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+        # Calcula fora do lock para não bloquear a thread de pré-cálculo
+        return self.put(key, compute())
+
+    def evict_to(self, max_bytes):
+        """Descarta as entradas menos usadas até o cache ocupar no máximo `max_bytes`."""
+        with self._lock:
+            while self._entries and self.nbytes > max_bytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self.nbytes -= size
+                self.evictions += 1
+
+    def discard_fingerprint(self, fingerprint):
+        """Remove as entradas de `simulation_key` calculadas com `fingerprint`; retorna quantas."""
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if isinstance(key, tuple) and key and key[0] == fingerprint
+            ]
+            for key in stale:
+                self.nbytes -= self._entries.pop(key)[1]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
@@ -0,0 +1,312 @@
+"""
+Construtores de figuras compartilhados pelo app e pelos relatórios estáticos.
+
+Cada construtor devolve um dicionário no formato JSON do Plotly (ver
+`pricing.figures`) e depende só dos argumentos e da paleta deste módulo, para
+que a demo (`app.py`) e as propostas em HTML (`pricing.reports`) mostrem os
+mesmos gráficos.
+"""
+
+import numpy as np
+
+from pricing.rendering import heatmap_figure, line_trace
+
+# --- Paleta de Cores ---
+BRAND_COLOR = "#39B5FF"  # Cor principal da marca
+LIGHT_BLUE_1 = "#A8DAFF"  # Azul claro 1
+LIGHT_BLUE_2 = "#70C7FF"  # Azul claro 2
+LIGHT_BLUE_3 = "#D4EDFF"  # Azul muito claro
+GRAY_1 = "#9E9E9E"  # Cinza médio
+GRAY_2 = "#BDBDBD"  # Cinza claro
+GRAY_3 = "#E0E0E0"  # Cinza muito claro
+GRAY_4 = "#424242"  # Cinza escuro
+
+SCENARIO_COLORS = [GRAY_2, GRAY_1, BRAND_COLOR, LIGHT_BLUE_2, LIGHT_BLUE_1]
+# Composição do custo: leads, qualificados, reuniões, comissão (laranja) e ajuste do mínimo
+COST_COLORS = [GRAY_3, LIGHT_BLUE_3, LIGHT_BLUE_2, BRAND_COLOR, "#FFB347", GRAY_1]
+# Comparações: verde = proposta mais barata, vermelho = mais cara
+CHEAPER_COLOR = "#20bf6b"
+PRICIER_COLOR = "#EE5A24"
+DELTA_COLORSCALE = [[0.0, CHEAPER_COLOR], [0.5, "#FFFFFF"], [1.0, PRICIER_COLOR]]
+COMPARE_COLORS = [BRAND_COLOR, GRAY_1, LIGHT_BLUE_2, GRAY_4, LIGHT_BLUE_1]
+
+
+def build_volume_figure(lead_volumes, curves, legend_title, target_leads, target_cost):
+    """Custo total por volume para cada variação de taxa, com o cenário atual"""
+    data = []
+    for idx, (scenario_name, costs) in enumerate(curves.items()):
+        is_target = "Target" in scenario_name
+        data.append(
+            line_trace(
+                lead_volumes,
+                costs,
+                mode="lines",
+                name=scenario_name,
+                line=dict(
+                    width=4 if is_target else 2.5,
+                    dash="solid" if is_target else "dot",
+                    color=SCENARIO_COLORS[idx] if idx < len(SCENARIO_COLORS) else BRAND_COLOR,
+                ),
+            )
+        )
+    data.append(
+        dict(
+            type="scatter",
+            x=[target_leads],
+            y=[target_cost],
+            mode="markers",
+            marker=dict(size=12, color="red", symbol="star"),
+            name="Seu Cenário Atual",
+        )
+    )
+    return dict(
+        data=data,
+        layout=dict(
+            xaxis=dict(title=dict(text="Quantidade de Leads Processados")),
+            yaxis=dict(title=dict(text="Custo Total (R$)")),
+            legend=dict(title=dict(text=legend_title)),
+            hovermode="x unified",
+        ),
+    )
+
+
+def build_projection_figure(meses, receita_acumulada, custo_acumulado, breakeven_mes):
+    """Receita acumulada vs investimento Sailer, com o mês de break-even"""
+    layout = dict(
+        title=dict(text=f"Receita Acumulada vs Investimento Sailer ({len(meses)} meses)"),
+        xaxis=dict(title=dict(text="Mês")),
+        yaxis=dict(title=dict(text="Valor (R$)")),
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    if breakeven_mes is not None:
+        layout["shapes"] = [
+            dict(
+                type="line",
+                x0=breakeven_mes,
+                x1=breakeven_mes,
+                xref="x",
+                y0=0,
+                y1=1,
+                yref="y domain",
+                line=dict(dash="dash", color="gray"),
+            )
+        ]
+        layout["annotations"] = [
+            dict(
+                text=f"Break-even: Mês {breakeven_mes}",
+                x=breakeven_mes,
+                xref="x",
+                y=1,
+                yref="y domain",
+                xanchor="center",
+                yanchor="bottom",
+                showarrow=False,
+            )
+        ]
+    return dict(
+        data=[
+            dict(
+                type="scatter",
+                x=meses,
+                y=receita_acumulada,
+                mode="lines+markers",
+                name="Receita Acumulada",
+                line=dict(color="#26de81", width=3),
+                fill="tozeroy",
+                fillcolor="rgba(38, 222, 129, 0.1)",
+            ),
+            dict(
+                type="scatter",
+                x=meses,
+                y=custo_acumulado,
+                mode="lines+markers",
+                name="Investimento Sailer",
+                line=dict(color="#39B5FF", width=3),
+            ),
+        ],
+        layout=layout,
+    )
+
+
+def build_cost_pie(labels, values, colors):
+    """Distribuição do custo total por componente"""
+    return dict(
+        data=[
+            dict(
+                type="pie",
+                labels=labels,
+                values=values,
+                hole=0.3,
+                textinfo="label+percent",
+                marker=dict(colors=colors),
+            )
+        ],
+        layout=dict(
+            title=dict(text="Distribuição do Custo Total"),
+            margin=dict(t=40, b=10, l=10, r=10),
+            showlegend=False,
+        ),
+    )
+
+
+def build_allocation_figure(meses, leads_by_segment):
+    """Leads alocados por mês, empilhados por segmento"""
+    palette = [BRAND_COLOR, GRAY_1, LIGHT_BLUE_2, GRAY_4]
+    return dict(
+        data=[
+            dict(
+                type="bar",
+                x=meses,
+                y=leads,
+                name=name,
+                marker=dict(color=palette[idx % len(palette)]),
+            )
+            for idx, (name, leads) in enumerate(leads_by_segment.items())
+        ],
+        layout=dict(
+            barmode="stack",
+            title=dict(text="Leads Alocados por Mês"),
+            xaxis=dict(title=dict(text="Mês")),
+            yaxis=dict(title=dict(text="Leads")),
+        ),
+    )
+
+
+def build_frontier_figure(points, benefit, benefit_label, target_cost, target_benefit, with_roi):
+    """Fronteira eficiente custo x resultado (colorida pelo ROI), com o target"""
+    hover = [
+        f"Leads: {leads:,.0f}<br>Qualificação: {qual * 100:.0f}%<br>Avanço: {book * 100:.0f}%"
+        for leads, qual, book in zip(
+            points["total_leads"], points["qualification"], points["booking"]
+        )
+    ]
+    if with_roi:
+        marker = dict(
+            size=7,
+            color=points["roi_ltv"],
+            colorscale=[[0.0, GRAY_2], [1.0, BRAND_COLOR]],
+            colorbar=dict(title=dict(text="ROI LTV (%)")),
+        )
+    else:
+        marker = dict(size=5, color=BRAND_COLOR)
+    return dict(
+        data=[
+            dict(
+                type="scatter",
+                x=points["total_cost"],
+                y=points[benefit],
+                mode="markers" if with_roi else "lines+markers",
+                line=dict(color=BRAND_COLOR, width=2, shape="hv"),
+                marker=marker,
+                text=hover,
+                name="Fronteira eficiente",
+                hovertemplate=(
+                    f"%{{text}}<br>Custo: R$ %{{x:,.2f}}<br>{benefit_label}: %{{y:,.1f}}"
+                    "<extra></extra>"
+                ),
+            ),
+            dict(
+                type="scatter",
+                x=[target_cost],
+                y=[target_benefit],
+                mode="markers",
+                marker=dict(
+                    size=18, color=GRAY_4, symbol="star", line=dict(color="white", width=2)
+                ),
+                name="Seu Target",
+                hovertemplate=(
+                    f"Target<br>Custo: R$ %{{x:,.2f}}<br>{benefit_label}: %{{y:,.1f}}"
+                    "<extra></extra>"
+                ),
+            ),
+        ],
+        layout=dict(
+            title=dict(text=f"Custo Mínimo por Nível de {benefit_label}"),
+            xaxis=dict(title=dict(text="Custo Total Mensal (R$)")),
+            yaxis=dict(title=dict(text=benefit_label)),
+            height=500,
+            hovermode="closest",
+        ),
+    )
+
+
+def build_delta_heatmap(delta, booking_rates, qual_rates, title, colorbar_title):
+    """Diferença de custo entre duas tabelas por qualificação x agendamento (em %)"""
+    fig = heatmap_figure(
+        delta,
+        booking_rates,
+        qual_rates,
+        DELTA_COLORSCALE,
+        colorbar_title,
+        "Qualificação: %{y:.2~f}%<br>Agendamento: %{x:.2~f}%<br>Diferença: R$ %{z:+,.2f}",
+        text=[[f"R$ {val:+,.0f}" for val in row] for row in delta],
+        zmid=0.0,
+    )
+    layout = fig["layout"]
+    layout.update(title=dict(text=title), height=600)
+    for axis, axis_title in (
+        ("xaxis", "Taxa de Agendamento (% de Qualificados)"),
+        ("yaxis", "Taxa de Qualificação (% de Respostas)"),
+    ):
+        layout.setdefault(axis, {}).update(title=dict(text=axis_title), ticksuffix="%")
+    return fig
+
+
+def build_compare_volume_figure(lead_volumes, curves, reference_name):
+    """Custo total por volume de cada conjunto de tabelas, com a referência destacada"""
+    data = []
+    for idx, (name, costs) in enumerate(curves.items()):
+        is_reference = name == reference_name
+        data.append(
+            line_trace(
+                lead_volumes,
+                costs,
+                mode="lines",
+                name=name,
+                line=dict(
+                    width=4 if is_reference else 2.5,
+                    dash="solid" if is_reference else "dot",
+                    color=COMPARE_COLORS[idx % len(COMPARE_COLORS)],
+                ),
+            )
+        )
+    return dict(
+        data=data,
+        layout=dict(
+            title=dict(text="Custo Total por Volume (taxas do cenário target)"),
+            xaxis=dict(title=dict(text="Quantidade de Leads Processados")),
+            yaxis=dict(title=dict(text="Custo Total (R$)")),
+            hovermode="x unified",
+        ),
+    )
+
+
+def build_volume_delta_figure(lead_volumes, delta, title):
+    """Diferença de custo por volume, separando as regiões mais baratas e mais caras"""
+    return dict(
+        data=[
+            line_trace(
+                lead_volumes,
+                np.minimum(delta, 0),
+                mode="lines",
+                fill="tozeroy",
+                name="Mais barata",
+                line=dict(color=CHEAPER_COLOR),
+            ),
+            line_trace(
+                lead_volumes,
+                np.maximum(delta, 0),
+                mode="lines",
+                fill="tozeroy",
+                name="Mais cara",
+                line=dict(color=PRICIER_COLOR),
+            ),
+        ],
+        layout=dict(
+            title=dict(text=title),
+            xaxis=dict(title=dict(text="Quantidade de Leads Processados")),
+            yaxis=dict(title=dict(text="Diferença (R$)")),
+            hovermode="x unified",
+        ),
+    )
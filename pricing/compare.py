@@ -0,0 +1,118 @@
+"""
+Comparação de vários conjuntos de tabelas de preços sobre a mesma grade.
+
+As tabelas de todos os conjuntos são empilhadas (com faixas vazias de
+preenchimento) para que custo total e CPA de N conjuntos sejam avaliados pelo
+plano padrão (`pricing.plan`) numa única chamada vetorizada, com shape
+(N, *grade).
+"""
+
+import numpy as np
+
+from pricing.engine import funnel_volumes
+from pricing.plan import default_plan
+from pricing.schedules import STAGES, CompiledPricing, ScheduleBatch, compile_pricing
+
+# Finito (e não inf) para que as faixas de preenchimento não gerem inf * 0
+_UNREACHABLE = np.finfo(float).max
+
+
+def stack_pricings(pricings, grid_ndim=0):
+    """
+    Empilha N conjuntos de tabelas num `CompiledPricing` de lotes (`ScheduleBatch`).
+
+    Conjuntos com menos faixas recebem faixas de preenchimento com 'Mínimo'
+    no maior float finito, que nunca são atingidas e não alteram o custo.
+    Modo, teto e piso de cada conjunto vão junto. O eixo dos conjuntos vem
+    seguido de `grid_ndim` eixos unitários, para broadcast contra a grade.
+    """
+    pricings = [compile_pricing(p) for p in pricings]
+    # (N, T) -> (N, 1, ..., 1, T) e (N,) -> (N, 1, ..., 1)
+    expand = (slice(None),) + (None,) * grid_ndim
+    stacked = {}
+    for stage in STAGES:
+        schedules = [getattr(p, stage) for p in pricings]
+        n_tiers = max(max(s.num_tiers for s in schedules), 1)
+        mins = np.full((len(schedules), n_tiers), _UNREACHABLE)
+        maxs = np.full((len(schedules), n_tiers), _UNREACHABLE)
+        prices = np.zeros((len(schedules), n_tiers))
+        for i, schedule in enumerate(schedules):
+            mins[i, : schedule.num_tiers] = schedule.mins
+            maxs[i, : schedule.num_tiers] = schedule.maxs
+            prices[i, : schedule.num_tiers] = schedule.prices
+        stacked[stage] = ScheduleBatch(
+            mins=mins[expand],
+            maxs=maxs[expand],
+            prices=prices[expand],
+            all_units=np.array([s.all_units for s in schedules])[expand],
+            cap=np.array([s.cap for s in schedules])[expand],
+            floor=np.array([s.floor for s in schedules])[expand],
+        )
+    return CompiledPricing(
+        no_reply_price=np.array([p.no_reply_price for p in pricings])[expand], **stacked
+    )
+
+
+def evaluate_pricings(
+    pricings,
+    total_leads,
+    response,
+    qualification,
+    booking,
+    minimum_billing=0.0,
+    ticket_medio=0.0,
+    taxa_conversao_vendas=0.0,
+    comissao_vendas=0.0,
+    paired=False,
+):
+    """
+    Avalia N conjuntos de tabelas sobre a grade formada pelas entradas (com broadcast).
+
+    Retorna um dicionário com `total_cost`, `cpa` e `num_booked`, cada um com
+    shape (N, *grade). O funil é calculado uma vez e compartilhado por todos.
+
+    Com `paired=True`, o eixo 0 das entradas já é o dos conjuntos (shape
+    (N, ...) ou (N, 1, ...)): a linha i usa o conjunto i, e o resultado tem o
+    shape da grade das entradas. Assim N cenários completos (taxas, volume e
+    parâmetros próprios) são avaliados numa única chamada.
+    """
+    num_replies, num_no_replies, num_qualified, num_booked = funnel_volumes(
+        total_leads, response, qualification, booking
+    )
+    n_sets = len(pricings)
+    if paired and (num_replies.ndim == 0 or num_replies.shape[0] not in (1, n_sets)):
+        raise ValueError(f"Entradas sem o eixo dos {n_sets} conjuntos (paired=True)")
+    grid_ndim = num_replies.ndim - 1 if paired else num_replies.ndim
+    plan = default_plan().with_pricing(stack_pricings(pricings, grid_ndim))
+    bill = plan.evaluate(
+        {
+            "num_no_replies": num_no_replies,
+            "num_replies": num_replies,
+            "num_qualified": num_qualified,
+            "num_booked": num_booked,
+            "num_vendas": num_booked * taxa_conversao_vendas,
+        },
+        {
+            "ticket_medio": ticket_medio,
+            "comissao_vendas": comissao_vendas,
+            "minimum_billing": minimum_billing,
+        },
+    )
+    total_cost = bill.total
+    booked = np.broadcast_to(num_booked, total_cost.shape)
+    cpa = np.divide(
+        total_cost, booked, out=np.zeros_like(total_cost), where=booked > 0
+    )
+    return {"total_cost": total_cost, "cpa": cpa, "num_booked": num_booked}
+
+
+def delta_summary(delta):
+    """Resumo de uma matriz de diferenças (proposta - referência)."""
+    delta = np.asarray(delta, dtype=float)
+    size = max(delta.size, 1)
+    return {
+        "cheaper_pct": float((delta < -1e-9).sum() / size * 100),
+        "pricier_pct": float((delta > 1e-9).sum() / size * 100),
+        "max_saving": float(max(0.0, -delta.min())) if delta.size else 0.0,
+        "max_increase": float(max(0.0, delta.max())) if delta.size else 0.0,
+    }
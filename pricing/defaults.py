@@ -0,0 +1,180 @@
+"""
+Tabelas de preços padrão e dados do cliente (TotalPass), compartilhados por
+todas as sessões e recarregados quando os arquivos mudam no disco.
+
+As tabelas saem do plano padrão (`pricing/plans/totalpass.json`), no formato
+dos editores do app, e os dados do cliente de `pricing/clients/totalpass.json`.
+`current_defaults()` confere a data de modificação e o tamanho dos dois
+arquivos (um `os.stat` cada) e, se algum mudou, publica uma nova versão para
+o processo inteiro: cada sessão passa a usá-la na sua próxima execução, sem
+reiniciar o servidor. Numa mudança do plano, só as etapas escalonadas cujo
+JSON mudou são recompiladas e validadas; as demais mantêm a mesma tabela, o
+mesmo `TierSchedule` e o mesmo fingerprint. Um arquivo inválido é rejeitado
+(erro em `Defaults.errors`) e a versão anterior continua valendo.
+
+Cada versão existe uma única vez no servidor, qualquer que seja o número de
+sessões, e nunca é alterada: o `st.data_editor` devolve uma nova tabela com
+as edições, e quem precisa alterar uma tabela trabalha numa cópia.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+
+import pandas as pd
+
+from pricing.plan import DEFAULT_PLAN_PATH, compile_plan, default_plan, set_default_plan
+from pricing.schedules import (
+    STAGES,
+    CompiledPricing,
+    compile_schedule,
+    schedule_to_frame,
+)
+
+CLIENT_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "clients", "totalpass.json"
+)
+# Campos dos dados do cliente; os de `CLIENT_SHARES` são frações (0-1)
+CLIENT_FIELDS = (
+    "volume_leads_mes",
+    "leads_abandonados_pct",
+    "ticket_medio",
+    "ltv_dias",
+    "taxa_conversao_atual",
+    "num_vendedores",
+    "comp_total_medio",
+    "multiplicador_encargos",
+    "comissao_min",
+    "comissao_max",
+)
+CLIENT_SHARES = ("leads_abandonados_pct", "taxa_conversao_atual", "comissao_min", "comissao_max")
+
+
+@dataclass(frozen=True, eq=False)
+class Defaults:
+    """
+    Versão publicada: plano padrão, suas tabelas (formato dos editores e
+    compiladas) e dados do cliente. `recompiled` são as etapas recompiladas
+    nesta versão; `errors`, os arquivos rejeitados na última leitura.
+    """
+
+    version: int
+    plan: object
+    tables: MappingProxyType
+    pricing: CompiledPricing
+    client: MappingProxyType
+    recompiled: tuple = ()
+    errors: tuple = ()
+
+
+def load_client_data(path=CLIENT_DATA_PATH):
+    """Lê e valida os dados do cliente (todos os `CLIENT_FIELDS`, números não negativos)."""
+    with open(path, encoding="utf-8") as client_file:
+        data = json.load(client_file)
+    missing = [name for name in CLIENT_FIELDS if name not in data]
+    if missing:
+        raise ValueError(f"Campos ausentes: {', '.join(missing)}")
+    for name in CLIENT_FIELDS:
+        value = data[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{name}: esperado um número não negativo, recebido {value!r}")
+        if name in CLIENT_SHARES and value > 1:
+            raise ValueError(f"{name}: fração entre 0 e 1, recebido {value!r}")
+    return MappingProxyType({name: data[name] for name in CLIENT_FIELDS})
+
+
+def _stage_table(schedule):
+    """Tabela 'Mínimo'/'Máximo'/'Valor' de uma etapa escalonada do plano."""
+    return schedule_to_frame(schedule.mins, schedule.maxs, schedule.prices)
+
+
+def build_defaults(plan, client, version=0, previous=None, errors=()):
+    """
+    Tabelas e tabelas compiladas do `plan`. Com `previous`, as etapas com o
+    mesmo `TierSchedule` (JSON inalterado) reaproveitam a tabela e a versão
+    compilada anteriores.
+    """
+    no_reply_price = float(plan.stage("no_reply").price)
+    if previous is not None and previous.pricing.no_reply_price == no_reply_price:
+        tables = {"no_reply": previous.tables["no_reply"]}
+    else:
+        tables = {"no_reply": pd.DataFrame([{"Valor": no_reply_price}])}
+    schedules = {}
+    recompiled = []
+    for stage in STAGES:
+        schedule = plan.stage(stage).schedule
+        if previous is not None and previous.plan.stage(stage).schedule is schedule:
+            tables[stage] = previous.tables[stage]
+            schedules[stage] = getattr(previous.pricing, stage)
+        else:
+            tables[stage] = _stage_table(schedule)
+            schedules[stage] = compile_schedule(tables[stage])
+            recompiled.append(stage)
+    return Defaults(
+        version=version,
+        plan=plan,
+        tables=MappingProxyType(tables),
+        pricing=CompiledPricing(no_reply_price=no_reply_price, **schedules),
+        client=client,
+        recompiled=tuple(recompiled),
+        errors=tuple(errors),
+    )
+
+
+_LOCK = threading.Lock()
+_CURRENT = None
+_SIGNATURES = {}
+_ERRORS = {}
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _label(path):
+    # Os dois arquivos se chamam totalpass.json: a pasta diz qual é qual
+    return os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+
+
+def _reload(previous, changed):
+    """Nova versão a partir dos arquivos em `changed`; os inválidos mantêm a anterior."""
+    plan, client = previous.plan, previous.client
+    if DEFAULT_PLAN_PATH in changed:
+        try:
+            with open(DEFAULT_PLAN_PATH, encoding="utf-8") as plan_file:
+                plan = compile_plan(json.load(plan_file), previous=previous.plan)
+            _ERRORS.pop(DEFAULT_PLAN_PATH, None)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            _ERRORS[DEFAULT_PLAN_PATH] = f"{_label(DEFAULT_PLAN_PATH)}: {exc}"
+    if CLIENT_DATA_PATH in changed:
+        try:
+            client = load_client_data()
+            _ERRORS.pop(CLIENT_DATA_PATH, None)
+        except (OSError, ValueError) as exc:
+            _ERRORS[CLIENT_DATA_PATH] = f"{_label(CLIENT_DATA_PATH)}: {exc}"
+    errors = tuple(_ERRORS.values())
+    if plan is previous.plan and client is previous.client:
+        return previous if errors == previous.errors else replace(previous, errors=errors)
+    if plan is not previous.plan:
+        set_default_plan(plan)
+    return build_defaults(plan, client, previous.version + 1, previous, errors)
+
+
+def current_defaults():
+    """Versão vigente das tabelas padrão e dos dados do cliente (relê os arquivos alterados)."""
+    global _CURRENT
+    with _LOCK:
+        signatures = {path: _signature(path) for path in (DEFAULT_PLAN_PATH, CLIENT_DATA_PATH)}
+        if _CURRENT is None:
+            _CURRENT = build_defaults(default_plan(), load_client_data())
+        elif signatures != _SIGNATURES:
+            changed = {path for path in signatures if signatures[path] != _SIGNATURES.get(path)}
+            _CURRENT = _reload(_CURRENT, changed)
+        _SIGNATURES.update(signatures)
+        return _CURRENT
@@ -0,0 +1,159 @@
+"""
+Elasticidade do custo aos preços e pontos de quebra das tabelas.
+
+Sem teto e piso, o custo de uma etapa escalonada é linear no preço de cada
+faixa, com coeficiente = itens na faixa (modo volume: a quantidade inteira na
+faixa atingida). A partir das quantidades de um lote já simulado (cenário
+target ou varredura de volume), `price_sensitivity` calcula numa passada os
+coeficientes de todas as faixas e pontos de quebra. `preview_prices` e
+`preview_boundary` dão o custo total exato com preços ou pontos novos sem
+simular de novo: só a linha das etapas editadas muda, e o teto/piso da etapa e
+o consumo mínimo são reaplicados.
+
+O lote deve vir de `simulate_batch` (sem leads inclusos abatidos da etapa de
+leads processados). Planos com etapas que a prévia não reproduz (desconto, ou
+consumo mínimo antes do fim da fatura) são recusados com `ValueError`.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from pricing.plan import plan_for
+from pricing.schedules import STAGES, CompiledPricing
+
+# Etapa -> (quantidade, linha de custo) nas colunas de `simulate_batch`
+STAGE_COLUMNS = {
+    "leads": ("num_replies", "cost_replies"),
+    "qualified": ("num_qualified", "cost_qualified"),
+    "booked": ("num_booked", "cost_booked"),
+}
+# Custo por disparo sem resposta: uma "faixa" só, de preço `no_reply_price`
+NO_REPLY = "no_reply"
+
+
+@dataclass
+class PriceSensitivity:
+    """
+    Coeficientes de um lote de cenários.
+
+    Por etapa (`STAGES` e `NO_REPLY`): quantidade, custo sem teto/piso, linha
+    da fatura e d(custo sem teto/piso)/d(preço) de cada faixa, com shape
+    (..., faixas). `boundary_coefficients[etapa][i]` é a derivada em relação
+    ao ponto de quebra entre as faixas i e i + 1.
+    """
+
+    pricing: CompiledPricing
+    quantities: dict
+    raw: dict
+    lines: dict
+    price_coefficients: dict
+    boundary_coefficients: dict
+    calculated_cost: np.ndarray
+    minimum_billing: object = 0.0
+
+    def _schedule(self, stage):
+        return None if stage == NO_REPLY else getattr(self.pricing, stage)
+
+    def active(self, stage):
+        """Onde a derivada do total é o coeficiente: teto, piso e mínimo inativos."""
+        billing_active = self.calculated_cost >= self.minimum_billing
+        schedule = self._schedule(stage)
+        if schedule is None:
+            return billing_active
+        raw = self.raw[stage]
+        return billing_active & (raw < schedule.cap) & (raw >= schedule.floor)
+
+    def d_total_d_price(self, stage):
+        """d(custo total)/d(preço) de cada faixa da etapa; shape (..., faixas)."""
+        return np.where(self.active(stage)[..., None], self.price_coefficients[stage], 0.0)
+
+    def d_total_d_boundary(self, stage, boundary):
+        """d(custo total)/d(ponto de quebra `boundary`) da etapa."""
+        return np.where(
+            self.active(stage), self.boundary_coefficients[stage][boundary], 0.0
+        )
+
+    def _total(self, new_raw):
+        calculated = self.calculated_cost
+        for stage, raw in new_raw.items():
+            schedule = self._schedule(stage)
+            line = raw if schedule is None else np.minimum(
+                np.maximum(raw, schedule.floor), schedule.cap
+            )
+            calculated = calculated + (line - self.lines[stage])
+        return np.maximum(calculated, self.minimum_billing)
+
+    def preview_prices(self, prices):
+        """
+        Custo total exato com os preços `prices` (etapa -> preços de todas as
+        faixas, ou o preço por disparo em `NO_REPLY`); etapas ausentes mantêm
+        os preços atuais.
+        """
+        new_raw = {}
+        for stage, new_prices in prices.items():
+            schedule = self._schedule(stage)
+            current = (
+                np.array([self.pricing.no_reply_price])
+                if schedule is None
+                else schedule.prices
+            )
+            change = np.asarray(new_prices, dtype=float).reshape(-1) - current
+            if change.shape != current.shape:
+                raise ValueError(
+                    f"Etapa {stage!r}: esperados {len(current)} preços, "
+                    f"recebidos {len(change)}"
+                )
+            if np.any(change):
+                new_raw[stage] = self.raw[stage] + self.price_coefficients[stage] @ change
+        return self._total(new_raw)
+
+    def preview_boundary(self, stage, boundary, value):
+        """Custo total exato com o ponto de quebra `boundary` da etapa em `value`."""
+        shift = self._schedule(stage).boundary_shift(
+            self.quantities[stage], boundary, value
+        )
+        return self._total({stage: self.raw[stage] + shift})
+
+
+def price_sensitivity(batch, pricing, minimum_billing=0.0):
+    """
+    Coeficientes de preço e de ponto de quebra de todas as etapas para o lote
+    `batch` (`SimulationBatch` de `simulate_batch` com as tabelas `pricing`).
+    """
+    # A prévia soma a variação das linhas ao subtotal e reaplica só o mínimo
+    stages = plan_for(pricing).stages
+    unmodelled = [
+        stage.name
+        for stage in stages
+        if stage.kind == "discount" or (stage.kind == "minimum" and stage is not stages[-1])
+    ]
+    if unmodelled:
+        raise ValueError(f"Etapas do plano sem prévia exata: {', '.join(unmodelled)}")
+    quantities = {NO_REPLY: batch["num_no_replies"]}
+    raw = {NO_REPLY: batch["cost_no_reply"]}
+    lines = {NO_REPLY: batch["cost_no_reply"]}
+    coefficients = {NO_REPLY: np.asarray(batch["num_no_replies"])[..., None]}
+    boundaries = {NO_REPLY: {}}
+    for stage in STAGES:
+        quantity_column, line_column = STAGE_COLUMNS[stage]
+        schedule = getattr(pricing, stage)
+        quantity = batch[quantity_column]
+        quantities[stage] = quantity
+        raw[stage] = schedule.raw_cost(quantity)
+        lines[stage] = batch[line_column]
+        coefficients[stage] = schedule.price_coefficients(quantity)
+        boundaries[stage] = {
+            int(i): schedule.boundary_coefficient(quantity, i)
+            for i in schedule.boundaries
+        }
+    return PriceSensitivity(
+        pricing=pricing,
+        quantities=quantities,
+        raw=raw,
+        lines=lines,
+        price_coefficients=coefficients,
+        boundary_coefficients=boundaries,
+        calculated_cost=batch["calculated_cost"],
+        minimum_billing=minimum_billing,
+    )
@@ -0,0 +1,242 @@
+"""
+Motor de simulação vetorizado.
+
+`simulate_batch` avalia qualquer quantidade de cenários (arrays com broadcast)
+numa única passada sobre as tabelas compiladas. Opcionalmente calcula, na mesma
+passada, o custo marginal e as derivadas parciais exatas do custo total e do CPA
+em relação ao volume e a cada taxa do funil. Fatura, derivadas e custo do
+próximo lead saem todos do plano de preços (`pricing.plan`).
+
+O custo de cada etapa é avaliado em O(faixas) por cenário, qualquer que seja o
+volume: as varreduras de volumes grandes usam `volume_grid`, com pontos
+log-espaçados mais os volumes exatos em que alguma tabela muda de faixa
+(`lead_breakpoints`), e não um ponto por lead.
+"""
+
+import numpy as np
+
+from pricing.plan import plan_for
+from pricing.results import SimulationBatch
+from pricing.schedules import STAGES, compile_pricing
+
+
+def _safe_divide(num, den):
+    num, den = np.broadcast_arrays(np.asarray(num, dtype=float), den)
+    return np.divide(num, den, out=np.zeros(num.shape), where=den > 0)
+
+
+def funnel_volumes(total_leads, response, qualification, booking):
+    """Quantidades em cada etapa do funil: respostas, sem resposta, qualificados e reuniões."""
+    leads, r, q, b = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (total_leads, response, qualification, booking))
+    )
+    num_replies = leads * r
+    num_no_replies = leads - num_replies
+    num_qualified = num_replies * q
+    num_booked = num_qualified * b
+    return num_replies, num_no_replies, num_qualified, num_booked
+
+
+def lead_breakpoints(pricing, response, qualification, booking):
+    """
+    Volumes de leads disparados em que alguma tabela escalonada muda de faixa
+    (ou passa a valer o teto ou o piso da etapa), ordenados e sem repetição: o
+    custo é linear entre dois deles. As taxas aceitam arrays (com broadcast): o
+    resultado reúne os pontos de quebra de todas as combinações.
+    """
+    pricing = compile_pricing(pricing)
+    # Itens de cada etapa por lead disparado (respostas, qualificados, reuniões)
+    per_lead = funnel_volumes(1.0, response, qualification, booking)
+    ratios = dict(zip(STAGES, (per_lead[0], per_lead[2], per_lead[3])))
+    points = [np.empty(0)]
+    for stage in STAGES:
+        ratio = np.unique(ratios[stage])
+        ratio = ratio[ratio > 0]
+        points.append((getattr(pricing, stage).cost_breakpoints[:, None] / ratio).ravel())
+    points = np.unique(np.concatenate(points))
+    # A mesma quebra vinda de duas etapas pode diferir no último bit
+    return points[np.append(True, np.diff(points) > 1e-9 * points[1:])]
+
+
+def volume_grid(max_leads, step=100, log_points=None, breakpoints=()):
+    """
+    Volumes de uma varredura até `max_leads`.
+
+    Sem `log_points`, de 0 a `max_leads` em passos de `step`. Com `log_points`,
+    0 e `log_points` volumes log-espaçados de 1 a `max_leads`, mais os
+    `breakpoints` do intervalo: o tamanho da grade não depende do volume.
+    """
+    if log_points is None:
+        return np.arange(0, max_leads + 1, step)
+    breakpoints = np.asarray(breakpoints, dtype=float)
+    inside = breakpoints[(breakpoints > 0) & (breakpoints <= max_leads)]
+    return np.unique(
+        np.concatenate([[0.0], np.geomspace(1, max(max_leads, 1), log_points), inside])
+    )
+
+
+def simulate_batch(
+    total_leads,
+    response,
+    qualification,
+    booking,
+    pricing,
+    minimum_billing=0.0,
+    ticket_medio=0.0,
+    taxa_conversao_vendas=0.0,
+    comissao_vendas=0.0,
+    with_gradients=False,
+):
+    """
+    Executa `run_simulation` para vários cenários de uma vez.
+
+    Todos os parâmetros numéricos aceitam escalares ou arrays (com broadcast).
+    Retorna um `SimulationBatch` com as mesmas colunas de `run_simulation`;
+    `batch["coluna"]` tem o shape da grade simulada. Com `with_gradients=True`
+    inclui também:
+
+    - `marginal_cost`: custo do próximo lead disparado (dCusto/dLeads)
+    - `average_cost`: custo médio por lead disparado
+    - `d_cost_d_<entrada>` e `d_cpa_d_<entrada>` para `leads`, `response`,
+      `qualification` e `booking` (derivadas por unidade de taxa, 0-1)
+    - `marginal_reply`, `marginal_qualified`, `marginal_booked`: preço do
+      próximo item em cada tabela escalonada
+    - `next_lead_cost`: variação exata do custo total com +1 lead disparado,
+      incluindo os saltos das tabelas no modo volume (que as derivadas, à
+      direita, não enxergam)
+    """
+    pricing = compile_pricing(pricing)
+    leads, r, q, b = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (total_leads, response, qualification, booking))
+    )
+
+    # 1. Quantidade de eventos em cada etapa do funil
+    num_replies, num_no_replies, num_qualified, num_booked = funnel_volumes(
+        leads, r, q, b
+    )
+    num_vendas = num_booked * taxa_conversao_vendas
+
+    # 2. Fatura pelo plano TotalPass (pricing/plans/totalpass.json) com as tabelas de `pricing`
+    plan = plan_for(pricing)
+    quantities = {
+        "num_no_replies": num_no_replies,
+        "num_replies": num_replies,
+        "num_qualified": num_qualified,
+        "num_booked": num_booked,
+        "num_vendas": num_vendas,
+    }
+    params = {
+        "ticket_medio": ticket_medio,
+        "comissao_vendas": comissao_vendas,
+        "minimum_billing": minimum_billing,
+    }
+    if with_gradients:
+        # Derivada de cada quantidade do funil em relação a cada entrada
+        d_num_booked = {
+            "leads": r * q * b,
+            "response": leads * q * b,
+            "qualification": num_replies * b,
+            "booking": num_qualified,
+        }
+        tangents = {
+            "leads": {"num_no_replies": 1.0 - r, "num_replies": r, "num_qualified": r * q},
+            "response": {
+                "num_no_replies": -leads,
+                "num_replies": leads,
+                "num_qualified": leads * q,
+            },
+            "qualification": {"num_qualified": num_replies},
+            "booking": {},
+        }
+        for name, d_booked in d_num_booked.items():
+            tangents[name]["num_booked"] = d_booked
+            tangents[name]["num_vendas"] = d_booked * taxa_conversao_vendas
+        bill, d_cost = plan.derivatives(quantities, tangents, params)
+    else:
+        bill = plan.evaluate(quantities, params)
+    cost_no_reply = bill.lines["no_reply"]
+    cost_replies = bill.lines["leads"]
+    cost_qualified = bill.lines["qualified"]
+    cost_booked = bill.lines["booked"]
+    cost_comissao = bill.lines["comissao"]
+
+    # 3. Custo total com consumo mínimo
+    calculated_cost = bill.before("minimum")
+    total_cost = bill.total
+
+    results = {
+        "total_leads": leads,
+        "num_no_replies": num_no_replies,
+        "num_replies": num_replies,
+        "num_qualified": num_qualified,
+        "num_booked": num_booked,
+        "num_vendas": num_vendas,
+        "cost_no_reply": cost_no_reply,
+        "cost_replies": cost_replies,
+        "cost_leads_processados": cost_replies,
+        "success_fees_puros": cost_qualified + cost_booked + cost_comissao,
+        "cost_qualified": cost_qualified,
+        "cost_booked": cost_booked,
+        "cost_comissao": cost_comissao,
+        "calculated_cost": calculated_cost,
+        "total_cost": total_cost,
+        "cpl": _safe_divide(total_cost, leads),
+        "cpa": _safe_divide(total_cost, num_booked),
+    }
+
+    if not with_gradients:
+        return SimulationBatch.from_arrays(results)
+
+    # 4. Derivadas exatas, etapa por etapa do plano (preços constantes por faixa)
+    for name, d_total in d_cost.items():
+        results[f"d_cost_d_{name}"] = d_total
+        # Regra do quociente: CPA = custo / reuniões
+        results[f"d_cpa_d_{name}"] = _safe_divide(
+            d_total * num_booked - total_cost * d_num_booked[name],
+            num_booked**2,
+        )
+
+    # Diferença finita de um lead: atravessa pontos de quebra, teto/piso e mínimo
+    next_quantities = dict(
+        zip(
+            ("num_replies", "num_no_replies", "num_qualified", "num_booked"),
+            funnel_volumes(leads + 1.0, r, q, b),
+        )
+    )
+    next_quantities["num_vendas"] = next_quantities["num_booked"] * taxa_conversao_vendas
+    results["next_lead_cost"] = plan.evaluate(next_quantities, params).total - total_cost
+
+    results["marginal_cost"] = results["d_cost_d_leads"]
+    results["average_cost"] = results["cpl"]
+    results["marginal_reply"] = pricing.leads.marginal(num_replies)
+    results["marginal_qualified"] = pricing.qualified.marginal(num_qualified)
+    results["marginal_booked"] = pricing.booked.marginal(num_booked)
+    return SimulationBatch.from_arrays(results)
+
+
+def run_simulation(
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    ticket_medio=0.0,
+    taxa_conversao_vendas=0.0,
+    comissao_vendas=0.0,
+):
+    """
+    Executa uma simulação completa para um dado cenário.
+    """
+    batch = simulate_batch(
+        total_leads,
+        rates["response"],
+        rates["qualification"],
+        rates["booking"],
+        pricing_tables,
+        minimum_billing,
+        ticket_medio,
+        taxa_conversao_vendas,
+        comissao_vendas,
+    )
+    result = batch[0]
+    result.total_leads = total_leads
+    return result
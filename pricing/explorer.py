@@ -0,0 +1,180 @@
+"""
+Exploração em streaming do espaço de cenários.
+
+O produto cartesiano das faixas de entrada (volume e taxas) é percorrido de
+forma preguiçosa, em blocos de tamanho fixo, e cada bloco é avaliado pelo motor
+vetorizado. Só são mantidos os k melhores cenários (heap) e estatísticas
+agregadas, então a memória não cresce com o tamanho do espaço.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from pricing.engine import simulate_batch
+from pricing.schedules import compile_pricing
+
+# Entradas que podem variar no espaço de cenários
+AXES = ("total_leads", "response", "qualification", "booking")
+
+# Colunas guardadas para cada cenário do top-k
+KEPT_COLUMNS = ("total_cost", "num_booked", "num_vendas", "cpa")
+
+
+def _roi_ltv(batch, ltv_valor):
+    cost = batch.column("total_cost")
+    revenue = batch.column("num_vendas") * ltv_valor
+    return np.divide(
+        revenue - cost, cost, out=np.full_like(cost, -np.inf), where=cost > 0
+    ) * 100
+
+
+# Objetivos de ordenação: maior valor = melhor cenário
+OBJECTIVES = {
+    "roi_ltv": _roi_ltv,
+    "num_vendas": lambda batch, ltv_valor: batch.column("num_vendas"),
+    "num_booked": lambda batch, ltv_valor: batch.column("num_booked"),
+    "cpa": lambda batch, ltv_valor: np.where(
+        batch.column("num_booked") > 0, -batch.column("cpa"), -np.inf
+    ),
+}
+
+
+def iter_scenario_chunks(axes, chunk_size=65536):
+    """
+    Percorre o produto cartesiano de `axes` (nome -> valores) em blocos.
+
+    Cada bloco é um dicionário nome -> array 1-D com até `chunk_size` cenários;
+    nenhum bloco depende do tamanho total do espaço.
+    """
+    names = list(axes)
+    values = [np.asarray(axes[name], dtype=float) for name in names]
+    shape = tuple(len(v) for v in values)
+    total = int(np.prod(shape, dtype=np.int64))
+    for start in range(0, total, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, total))
+        coords = np.unravel_index(flat, shape)
+        yield {name: v[c] for name, v, c in zip(names, values, coords)}
+
+
+@dataclass
+class _RunningStats:
+    """Contagem, mínimo, máximo e média de uma coluna, atualizados por bloco."""
+
+    count: int = 0
+    total: float = 0.0
+    minimum: float = np.inf
+    maximum: float = -np.inf
+
+    def update(self, values):
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.total += float(values.sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+
+@dataclass
+class ExplorationResult:
+    """Top-k cenários (melhor primeiro) e estatísticas do espaço explorado."""
+
+    objective: str
+    top: list
+    evaluated: int
+    feasible: int
+    elapsed: float
+    cost_stats: _RunningStats = field(default_factory=_RunningStats)
+    score_stats: _RunningStats = field(default_factory=_RunningStats)
+
+    @property
+    def scenarios_per_second(self):
+        return self.evaluated / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.top)
+
+
+def explore(
+    axes,
+    pricing,
+    objective="roi_ltv",
+    k=50,
+    max_cost=None,
+    minimum_billing=0.0,
+    ticket_medio=0.0,
+    taxa_conversao_vendas=0.0,
+    comissao_vendas=0.0,
+    ltv_valor=0.0,
+    chunk_size=65536,
+):
+    """
+    Avalia todo o produto cartesiano de `axes` e retorna os `k` melhores cenários.
+
+    `axes` mapeia nomes de `AXES` para os valores a percorrer; entradas ausentes
+    devem ser escalares em `axes` também (ex.: `{"booking": 0.3}`). Cenários com
+    custo total acima de `max_cost` são descartados antes do ranking.
+    """
+    pricing = compile_pricing(pricing)
+    score_fn = OBJECTIVES[objective]
+    grid_axes = {name: np.atleast_1d(axes[name]) for name in AXES}
+
+    heap = []  # (score, sequência, linha): heap mínimo com os k melhores
+    sequence = 0
+    result = ExplorationResult(
+        objective=objective, top=[], evaluated=0, feasible=0, elapsed=0.0
+    )
+    start = time.perf_counter()
+
+    for chunk in iter_scenario_chunks(grid_axes, chunk_size):
+        batch = simulate_batch(
+            chunk["total_leads"],
+            chunk["response"],
+            chunk["qualification"],
+            chunk["booking"],
+            pricing,
+            minimum_billing,
+            ticket_medio,
+            taxa_conversao_vendas,
+            comissao_vendas,
+        )
+        score = score_fn(batch, ltv_valor)
+        cost = batch.column("total_cost")
+        feasible = np.isfinite(score)
+        if max_cost is not None:
+            feasible &= cost <= max_cost
+
+        result.evaluated += len(batch)
+        result.feasible += int(feasible.sum())
+        result.cost_stats.update(cost[feasible])
+        result.score_stats.update(score[feasible])
+
+        # Só os k melhores de cada bloco podem entrar no heap global
+        candidates = np.flatnonzero(feasible)
+        if candidates.size > k:
+            best = np.argpartition(-score[candidates], k - 1)[:k]
+            candidates = candidates[best]
+        for idx in candidates:
+            entry_score = float(score[idx])
+            if len(heap) == k and entry_score <= heap[0][0]:
+                continue
+            row = {name: float(chunk[name][idx]) for name in AXES}
+            row.update({col: float(batch.column(col)[idx]) for col in KEPT_COLUMNS})
+            row["score"] = entry_score
+            sequence += 1
+            if len(heap) < k:
+                heapq.heappush(heap, (entry_score, sequence, row))
+            else:
+                heapq.heapreplace(heap, (entry_score, sequence, row))
+
+    result.elapsed = time.perf_counter() - start
+    result.top = [row for _, _, row in sorted(heap, key=lambda e: (-e[0], e[1]))]
+    return result
@@ -0,0 +1,142 @@
+"""
+Figuras do Plotly como dicionários, com cache do JSON por conteúdo.
+
+Montar `go.Figure`/`go.Scatter` valida cada propriedade, e o Streamlit ainda
+revalida os dicionários que recebe. Aqui as figuras são montadas como
+dicionários simples (o formato JSON do Plotly), serializadas uma vez e
+guardadas num cache (`ResultCache` da sessão) com chave = hash do construtor
+e de todos os seus argumentos: arrays dos resultados e estilo. Numa execução
+com os mesmos números, a figura sai pronta do cache; `as_figure` entrega o
+dicionário ao `st.plotly_chart` sem uma segunda validação.
+
+Os construtores devem depender só dos argumentos (e de constantes do módulo).
+"""
+
+import base64
+import hashlib
+import json
+
+import numpy as np
+
+_PREBUILT_FIGURE = None
+_DEFAULT_TEMPLATE = None
+
+
+def _update(digest, part):
+    if isinstance(part, (np.ndarray, np.generic)) and part.dtype != object:
+        array = np.ascontiguousarray(part)
+        digest.update(f"{array.dtype}{array.shape}".encode())
+        digest.update(array.tobytes())
+    elif isinstance(part, dict):
+        digest.update(b"{")
+        for key in sorted(part, key=repr):
+            _update(digest, key)
+            _update(digest, part[key])
+        digest.update(b"}")
+    elif isinstance(part, (list, tuple)):
+        digest.update(b"[")
+        for item in part:
+            _update(digest, item)
+        digest.update(b"]")
+    elif callable(part):
+        digest.update(f"{part.__module__}.{part.__qualname__}".encode())
+    else:
+        digest.update(repr(part).encode())
+
+
+def figure_key(*parts):
+    """Hash estável de arrays, números, textos, contêineres e funções."""
+    digest = hashlib.sha1()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+# Arrays numéricos vão como typed arrays do plotly.js (base64), como no Plotly
+_TYPED_ARRAYS = {
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+
+
+def _typed_array(array):
+    if array.dtype.kind in "iu" and array.size and array.dtype.itemsize > 4:
+        # plotly.js não lê inteiros de 64 bits: menor tipo que comporta os valores
+        signed = array.dtype.kind == "i"
+        for small in ("int8", "int16", "int32") if signed else ("uint8", "uint16", "uint32"):
+            info = np.iinfo(small)
+            if info.min <= array.min() and array.max() <= info.max:
+                array = array.astype(small)
+                break
+    code = _TYPED_ARRAYS.get(str(array.dtype))
+    if code is None or array.size == 0:
+        return array.tolist()
+    spec = {
+        "dtype": code,
+        "bdata": base64.b64encode(np.ascontiguousarray(array)).decode("ascii"),
+    }
+    if array.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in array.shape)
+    return spec
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return _typed_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Valor não serializável na figura: {type(obj).__name__}")
+
+
+def figure_json(spec):
+    """Serializa a figura (arrays NumPy numéricos viram typed arrays em base64)."""
+    return json.dumps(spec, separators=(",", ":"), default=_json_default)
+
+
+def cached_figure(cache, build, *args, **kwargs):
+    """
+    JSON de `build(*args, **kwargs)`, reaproveitado do `cache` enquanto o
+    construtor e os argumentos forem os mesmos.
+    """
+    key = ("figura", figure_key(build, args, kwargs))
+    return cache.get_or_compute(key, lambda: figure_json(build(*args, **kwargs)))
+
+
+def as_figure(spec, xaxis_type=None):
+    """
+    Figura para `st.plotly_chart` a partir do dicionário ou JSON `spec`;
+    `xaxis_type` (ex.: "log") substitui o tipo do eixo x.
+
+    O Streamlit revalida dicionários montando um `go.Figure` completo, mas
+    trata figuras do Plotly como já validadas e só chama `to_dict()`; este
+    embrulho devolve o próprio dicionário. Como no `go.Figure`, entra o
+    template padrão do Plotly (que o tema do Streamlit ajusta no navegador).
+    """
+    global _PREBUILT_FIGURE, _DEFAULT_TEMPLATE
+    if _PREBUILT_FIGURE is None:
+        import plotly.io as pio
+        from plotly.basedatatypes import BaseFigure
+
+        class PrebuiltFigure(BaseFigure):
+            def __init__(self, spec):
+                object.__setattr__(self, "_spec", spec)
+
+            def to_dict(self):
+                return self._spec
+
+        _PREBUILT_FIGURE = PrebuiltFigure
+        _DEFAULT_TEMPLATE = pio.templates[pio.templates.default].to_plotly_json()
+    if isinstance(spec, str):
+        spec = json.loads(spec)
+    layout = spec.setdefault("layout", {})
+    if "template" not in layout:
+        layout["template"] = _DEFAULT_TEMPLATE
+    if xaxis_type is not None:
+        layout["xaxis"] = {**layout.get("xaxis", {}), "type": xaxis_type}
+    return _PREBUILT_FIGURE(spec)
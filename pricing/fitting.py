@@ -0,0 +1,271 @@
+"""
+Ajuste automático de tabelas de preços escalonadas a partir de metas.
+
+Dado um conjunto de metas (CPA máximo, receita mensal mínima/máxima em volumes
+específicos), busca pontos de quebra e preços para um número fixo de faixas.
+A busca usa o método da entropia cruzada: a cada iteração milhares de tabelas
+candidatas são avaliadas de uma vez pelo plano padrão (`pricing.plan`), com as
+tabelas em lote (`ScheduleBatch`), e a distribuição de amostragem é reajustada
+em torno das melhores.
+"""
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from pricing.engine import funnel_volumes
+from pricing.plan import plan_for
+from pricing.schedules import STAGES, ScheduleBatch, compile_pricing, schedule_to_frame
+
+
+@dataclass(frozen=True)
+class PriceTarget:
+    """Meta de preço para um volume de leads disparados (None = sem restrição)."""
+
+    total_leads: float
+    max_cpa: float = None
+    min_cpa: float = None
+    min_cost: float = None  # Receita mensal mínima da Sailer
+    max_cost: float = None
+
+
+@dataclass
+class FitResult:
+    """Resultado do ajuste: tabelas prontas para os editores e relatório das metas."""
+
+    tables: dict
+    pricing: object
+    report: pd.DataFrame
+    feasible: bool
+    evaluated: int
+
+
+def _target_array(targets, attr):
+    return np.array(
+        [np.nan if getattr(t, attr) is None else float(getattr(t, attr)) for t in targets]
+    )
+
+
+def _violation(value, bound, upper):
+    """Violação relativa (0 quando a meta é atendida ou ausente)."""
+    gap = (value - bound) if upper else (bound - value)
+    rel = np.maximum(gap, 0.0) / np.maximum(np.abs(bound), 1e-9)
+    return np.where(np.isnan(bound), 0.0, rel)
+
+
+def fit_tier_tables(
+    targets,
+    base_pricing,
+    rates,
+    stages=STAGES,
+    n_tiers=4,
+    monotonic=True,
+    minimum_billing=0.0,
+    ticket_medio=0.0,
+    taxa_conversao_vendas=0.0,
+    comissao_vendas=0.0,
+    batch_size=4096,
+    iterations=40,
+    elite_frac=0.05,
+    seed=0,
+):
+    """
+    Busca tabelas com `n_tiers` faixas para as etapas em `stages` que atendam
+    às metas em `targets` (lista de `PriceTarget`).
+
+    As etapas não ajustadas mantêm as tabelas de `base_pricing`. Com
+    `monotonic=True` os preços nunca sobem com o volume. Entre candidatos que
+    atendem às metas, prefere o mais próximo da receita das tabelas atuais.
+    """
+    base = compile_pricing(base_pricing)
+    rng = np.random.default_rng(seed)
+
+    leads = np.array([float(t.total_leads) for t in targets])
+    num_replies, num_no_replies, num_qualified, num_booked = funnel_volumes(
+        leads, rates["response"], rates["qualification"], rates["booking"]
+    )
+    quantities = {"leads": num_replies, "qualified": num_qualified, "booked": num_booked}
+
+    # Fatura pelo plano padrão; as etapas não ajustadas mantêm as tabelas de `base`
+    plan = plan_for(base)
+    volumes = {
+        "num_no_replies": num_no_replies,
+        "num_replies": num_replies,
+        "num_qualified": num_qualified,
+        "num_booked": num_booked,
+        "num_vendas": num_booked * taxa_conversao_vendas,
+    }
+    plan_params = {
+        "ticket_medio": ticket_medio,
+        "comissao_vendas": comissao_vendas,
+        "minimum_billing": minimum_billing,
+    }
+    base_total = plan.evaluate(volumes, plan_params).total
+
+    bounds = {
+        "max_cpa": _target_array(targets, "max_cpa"),
+        "min_cpa": _target_array(targets, "min_cpa"),
+        "min_cost": _target_array(targets, "min_cost"),
+        "max_cost": _target_array(targets, "max_cost"),
+    }
+
+    # Espaço de parâmetros: por etapa, (n_tiers - 1) quebras + n_tiers preços
+    layout = []
+    mu, sigma = [], []
+    for stage in stages:
+        schedule = getattr(base, stage)
+        vmax = max(float(quantities[stage].max()) * 1.5, float(n_tiers))
+        pmax = 2.0 * float(np.nanmax(schedule.prices)) if schedule.num_tiers else 10.0
+        breaks = vmax * np.arange(1, n_tiers) / n_tiers
+        # Começa pelos preços atuais nos pontos médios das novas faixas
+        mids = np.concatenate([[0.0], breaks]) + vmax / (2 * n_tiers)
+        start_prices = schedule.marginal(mids) if schedule.num_tiers else mids * 0 + 1
+        layout.append((stage, vmax, pmax))
+        mu.extend(breaks)
+        mu.extend(np.clip(start_prices, 0.01, pmax))
+        sigma.extend([vmax / n_tiers] * (n_tiers - 1))
+        sigma.extend([pmax / 4] * n_tiers)
+    mu, sigma = np.array(mu), np.array(sigma)
+
+    def decode(params):
+        """Parâmetros brutos -> (mins, maxs, prices) válidos por etapa, shape (K, T)."""
+        decoded, offset = {}, 0
+        k = len(params)
+        for stage, vmax, pmax in layout:
+            raw_breaks = params[:, offset : offset + n_tiers - 1]
+            raw_prices = params[:, offset + n_tiers - 1 : offset + 2 * n_tiers - 1]
+            offset += 2 * n_tiers - 1
+
+            # Quebras inteiras, estritamente crescentes, dentro de [1, vmax]
+            steps = np.arange(n_tiers - 1)
+            breaks = np.sort(np.clip(np.round(raw_breaks), 1, vmax), axis=1)
+            breaks = np.maximum.accumulate(breaks - steps, axis=1) + steps
+            prices = np.clip(np.round(raw_prices, 2), 0.01, pmax)
+            if monotonic:
+                prices = -np.sort(-prices, axis=1)
+
+            mins = np.concatenate([np.zeros((k, 1)), breaks], axis=1)
+            maxs = np.concatenate([breaks, np.full((k, 1), np.inf)], axis=1)
+            decoded[stage] = (mins, maxs, prices)
+        return decoded
+
+    def encode(decoded):
+        return np.concatenate(
+            [
+                np.concatenate([mins[:, 1:], prices], axis=1)
+                for mins, _, prices in (decoded[stage] for stage, _, _ in layout)
+            ],
+            axis=1,
+        )
+
+    def evaluate(decoded):
+        # Candidatos mantêm modo, teto e piso da tabela atual da etapa; shape (K, metas)
+        batches = {}
+        for stage, (mins, maxs, prices) in decoded.items():
+            schedule = getattr(base, stage)
+            batches[stage] = ScheduleBatch(
+                mins=mins[:, None, :],
+                maxs=maxs[:, None, :],
+                prices=prices[:, None, :],
+                all_units=schedule.all_units,
+                cap=schedule.cap,
+                floor=schedule.floor,
+            )
+        candidates = plan.with_pricing(replace(base, **batches))
+        total = candidates.evaluate(volumes, plan_params).total
+        cpa = np.divide(
+            total,
+            num_booked,
+            out=np.zeros_like(total),
+            where=num_booked > 0,
+        )
+        violation = (
+            _violation(cpa, bounds["max_cpa"], upper=True)
+            + _violation(cpa, bounds["min_cpa"], upper=False)
+            + _violation(total, bounds["max_cost"], upper=True)
+            + _violation(total, bounds["min_cost"], upper=False)
+        ).sum(axis=1)
+        drift = (((total - base_total) / np.maximum(base_total, 1.0)) ** 2).mean(axis=1)
+        # Qualquer candidato que atende às metas vence os que não atendem
+        score = np.where(
+            violation > 0, 1e-3 + violation, 1e-3 * np.minimum(drift, 1.0)
+        )
+        return violation, score, total, cpa
+
+    n_elite = max(2, int(batch_size * elite_frac))
+    best = None
+    evaluated = 0
+    for _ in range(iterations):
+        params = mu + sigma * rng.standard_normal((batch_size, len(mu)))
+        params[0] = mu  # Mantém a média atual sempre entre os candidatos
+        decoded = decode(params)
+        violation, score, total, cpa = evaluate(decoded)
+        evaluated += batch_size
+
+        order = np.argsort(score)
+        top = order[0]
+        if best is None or score[top] < best["score"]:
+            best = {
+                "score": score[top],
+                "violation": violation[top],
+                "tiers": {s: tuple(a[top] for a in v) for s, v in decoded.items()},
+                "total": total[top],
+                "cpa": cpa[top],
+            }
+
+        elite = encode(decoded)[order[:n_elite]]
+        mu = elite.mean(axis=0)
+        sigma = 0.7 * elite.std(axis=0) + 0.15 * sigma
+
+    tables, fitted = {}, base
+    for stage, (mins, maxs, prices) in best["tiers"].items():
+        tables[stage] = schedule_to_frame(mins, maxs, prices)
+        fitted = replace(
+            fitted,
+            **{
+                stage: replace(
+                    getattr(base, stage),
+                    mins=mins.copy(),
+                    maxs=maxs.copy(),
+                    prices=prices.copy(),
+                )
+            },
+        )
+
+    base_cpa = np.divide(
+        base_total, num_booked, out=np.zeros_like(base_total), where=num_booked > 0
+    )
+    report_rows = []
+    labels = {
+        "max_cpa": ("CPA máximo", base_cpa, best["cpa"], True),
+        "min_cpa": ("CPA mínimo", base_cpa, best["cpa"], False),
+        "max_cost": ("Receita máxima", base_total, best["total"], True),
+        "min_cost": ("Receita mínima", base_total, best["total"], False),
+    }
+    for key, (label, current, achieved, upper) in labels.items():
+        for i, bound in enumerate(bounds[key]):
+            if np.isnan(bound):
+                continue
+            report_rows.append(
+                {
+                    "Leads": int(leads[i]),
+                    "Meta": label,
+                    "Alvo (R$)": bound,
+                    "Atual (R$)": current[i],
+                    "Ajustado (R$)": achieved[i],
+                    "Atendida": bool(
+                        achieved[i] <= bound + 1e-6
+                        if upper
+                        else achieved[i] >= bound - 1e-6
+                    ),
+                }
+            )
+
+    return FitResult(
+        tables=tables,
+        pricing=fitted,
+        report=pd.DataFrame(report_rows),
+        feasible=bool(best["violation"] == 0),
+        evaluated=evaluated,
+    )
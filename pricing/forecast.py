@@ -0,0 +1,193 @@
+"""
+Série mensal prevista de volume e taxas do funil (sazonalidade).
+
+Em vez do mesmo `target_total_leads` todo mês, a projeção pode usar uma série
+de N meses (digitada no app ou lida de um CSV) com o volume de leads e, se
+quiser, as taxas e a cobrança mínima de cada mês. Células vazias seguem os
+valores da barra lateral. A série inteira é simulada numa única chamada
+vetorizada (eixo 0 = mês) e vai direto para `project_months(monthly=True)`.
+"""
+
+import csv
+import io
+import re
+
+import numpy as np
+import pandas as pd
+
+# Colunas da tabela da série, no formato do editor do app
+FORECAST_COLUMNS = {
+    "mes": "Mês",
+    "total_leads": "Leads",
+    "response": "Resposta (%)",
+    "qualification": "Qualificação (%)",
+    "booking": "Avanço (%)",
+    "minimum_billing": "Cobrança Mínima (R$)",
+}
+
+# Nomes aceitos nos cabeçalhos do CSV (sem acento e em minúsculas)
+_CSV_ALIASES = {
+    "mes": ("mes", "month", "periodo"),
+    "total_leads": ("leads", "total_leads", "volume", "disparos"),
+    "response": ("resposta (%)", "resposta", "response", "taxa de resposta"),
+    "qualification": (
+        "qualificacao (%)",
+        "qualificacao",
+        "qualification",
+        "taxa de qualificacao",
+    ),
+    "booking": ("avanco (%)", "avanco", "agendamento", "booking", "taxa de avanco"),
+    "minimum_billing": (
+        "cobranca minima (r$)",
+        "cobranca minima",
+        "minimo",
+        "minimum_billing",
+    ),
+}
+
+_RATE_FIELDS = ("response", "qualification", "booking")
+
+# Separador decimal -> separador de milhar e exemplo para as mensagens
+NUMBER_FORMATS = {",": (".", "1.234,5"), ".": (",", "1,234.5")}
+
+
+def _plain(text):
+    """Cabeçalho sem acentos, espaços extras e maiúsculas."""
+    table = str.maketrans("áàâãéêíóôõúç", "aaaaeeiooouc")
+    return " ".join(str(text).strip().lower().translate(table).split())
+
+
+def empty_forecast(total_leads, months=12):
+    """Série com o mesmo volume todo mês e as taxas em branco (seguem a barra lateral)."""
+    frame = pd.DataFrame(
+        {label: np.nan for label in FORECAST_COLUMNS.values()}, index=range(months)
+    )
+    frame[FORECAST_COLUMNS["mes"]] = np.arange(1, months + 1)
+    frame[FORECAST_COLUMNS["total_leads"]] = float(total_leads)
+    return frame
+
+
+def _read_text(source):
+    # Arquivo enviado no app (BytesIO): o conteúdo todo, mesmo já lido antes
+    if hasattr(source, "getvalue"):
+        data = source.getvalue()
+    elif hasattr(source, "read"):
+        data = source.read()
+    else:
+        with open(source, "rb") as csv_file:
+            data = csv_file.read()
+    return data.decode("utf-8-sig") if isinstance(data, bytes) else data
+
+
+def _separator(text):
+    try:
+        return csv.Sniffer().sniff(text[:4096], delimiters=";,\t").delimiter
+    except csv.Error:
+        # Uma coluna só: não há o que separar
+        return ";" if ";" in text.split("\n", 1)[0] else ","
+
+
+def _parse_numbers(values, label, decimal, guessed, volume):
+    """
+    Coluna de texto -> números na convenção `decimal`. Com a convenção deduzida
+    do separador, volumes como "4,000" (decimal de 3 casas, ou milhar na outra
+    convenção) são recusados em vez de adivinhados.
+    """
+    thousands, example = NUMBER_FORMATS[decimal]
+    t, d = re.escape(thousands), re.escape(decimal)
+    number = re.compile(rf"[+-]?(\d+|\d{{1,3}}({t}\d{{3}})+)({d}\d+)?")
+    ambiguous = re.compile(rf"\d{{1,3}}{d}\d{{3}}")
+    parsed = []
+    for value in values:
+        if pd.isna(value) or not str(value).strip():
+            parsed.append(np.nan)
+            continue
+        text = re.sub(r"\s|%|R\$", "", str(value))
+        if not number.fullmatch(text):
+            raise ValueError(f"{label}: {value!r} não é um número no formato {example}")
+        if volume and guessed and ambiguous.fullmatch(text):
+            raise ValueError(
+                f"{label}: {value!r} é ambíguo (milhar ou decimal?); "
+                "informe o formato dos números"
+            )
+        parsed.append(float(text.replace(thousands, "").replace(decimal, ".")))
+    return np.array(parsed, dtype=float)
+
+
+def read_forecast_csv(source, decimal=None):
+    """
+    Lê a série de um CSV (caminho ou arquivo aberto) para o formato do editor.
+
+    Aceita separador "," ou ";" e cabeçalhos em português ou inglês. Os
+    números seguem uma convenção só para o arquivo todo: `decimal` ("," para
+    1.234,5 ou "." para 1,234.5) ou, sem ele, "," com separador ";" e "." nos
+    demais. `Mês` é um rótulo (ex.: "2025-01", "jan/25"): a ordem dos meses é
+    a do arquivo, ou a numérica quando todos são números inteiros. Só a coluna
+    de leads é obrigatória; as taxas são em %.
+    """
+    if decimal is not None and decimal not in NUMBER_FORMATS:
+        raise ValueError(f"Separador decimal desconhecido: {decimal!r}")
+    text = _read_text(source)
+    sep = _separator(text)
+    guessed = decimal is None
+    if guessed:
+        decimal = "," if sep == ";" else "."
+    raw = pd.read_csv(io.StringIO(text), sep=sep, dtype=str)
+    by_plain = {_plain(column): column for column in raw.columns}
+    frame = pd.DataFrame(index=raw.index)
+    for field, label in FORECAST_COLUMNS.items():
+        column = next((by_plain[a] for a in _CSV_ALIASES[field] if a in by_plain), None)
+        if column is None:
+            frame[label] = np.nan
+        elif field == "mes":
+            months = raw[column].str.strip()
+            ordinal = months.dropna().str.fullmatch(r"\d+").all()
+            frame[label] = pd.to_numeric(months) if ordinal else months
+        else:
+            frame[label] = _parse_numbers(
+                raw[column], label, decimal, guessed, volume=field == "total_leads"
+            )
+    if frame[FORECAST_COLUMNS["total_leads"]].isna().all():
+        raise ValueError("O CSV precisa de uma coluna de leads por mês")
+    if frame[FORECAST_COLUMNS["mes"]].isna().all():
+        frame[FORECAST_COLUMNS["mes"]] = np.arange(1, len(frame) + 1)
+    return frame.reset_index(drop=True)
+
+
+def forecast_inputs(frame, response, qualification, booking, minimum_billing):
+    """
+    Arrays por mês para `simulate_batch` a partir da tabela da série.
+
+    Linhas sem leads são descartadas; células vazias de taxa e de cobrança
+    mínima usam os valores informados (taxas em 0-1). Retorna um dicionário
+    com `mes`, `total_leads`, `response`, `qualification`, `booking` e
+    `minimum_billing`, todos com shape (meses,).
+    """
+    leads_label = FORECAST_COLUMNS["total_leads"]
+    frame = frame[frame[leads_label].notna()]
+    if frame.empty:
+        raise ValueError("A série mensal não tem nenhum mês com leads")
+    # Meses numerados seguem a numeração; rótulos, a ordem das linhas
+    if pd.api.types.is_numeric_dtype(frame[FORECAST_COLUMNS["mes"]]):
+        frame = frame.sort_values(FORECAST_COLUMNS["mes"], kind="stable")
+
+    defaults = {
+        "response": response,
+        "qualification": qualification,
+        "booking": booking,
+        "minimum_billing": minimum_billing,
+    }
+    inputs = {"mes": np.arange(1, len(frame) + 1)}
+    inputs["total_leads"] = frame[leads_label].to_numpy(dtype=float)
+    if (inputs["total_leads"] < 0).any():
+        raise ValueError("Volume de leads negativo na série mensal")
+    for field, default in defaults.items():
+        values = frame[FORECAST_COLUMNS[field]].to_numpy(dtype=float)
+        if field in _RATE_FIELDS:
+            values = values / 100
+            if ((values < 0) | (values > 1)).any():
+                raise ValueError(
+                    f"{FORECAST_COLUMNS[field]} fora de 0-100% na série mensal"
+                )
+        inputs[field] = np.where(np.isnan(values), default, values)
+    return inputs
@@ -0,0 +1,307 @@
+"""
+Leitura em blocos de exportações de eventos de leads (CRM/WhatsApp).
+
+Cada linha da exportação é um evento de um lead: disparo, resposta,
+qualificação, avanço/agendamento ou venda, com data e, opcionalmente,
+segmento. O arquivo é lido em blocos de `chunk_rows` linhas e cada bloco é
+reduzido a contagens por (mês, segmento, etapa) antes do próximo: a memória
+depende do tamanho do bloco e do número de meses × segmentos, não do tamanho
+do arquivo. As contagens viram taxas do funil por mês e segmento, usadas como
+valores calibrados no simulador.
+
+Com `pyarrow` instalado, CSV e Parquet são lidos pelo leitor em streaming
+do Arrow; sem ele, CSV é lido com `pandas.read_csv(chunksize=...)`.
+
+Eventos são contados pelo mês em que aconteceram e não são deduplicados por
+lead (exigiria guardar todos os ids); a exportação deve trazer um evento por
+lead e etapa.
+"""
+
+import csv
+import io
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Etapas do funil, em ordem, e os nomes de evento aceitos para cada uma
+FUNNEL_STAGES = ("send", "reply", "qualified", "booked", "sold")
+EVENT_ALIASES = {
+    "send": ("send", "sent", "disparo", "enviado", "envio"),
+    "reply": ("reply", "replied", "resposta", "respondeu", "respondido"),
+    "qualified": ("qualified", "qualificado", "qualificacao", "qualificação"),
+    "booked": (
+        "booked",
+        "agendado",
+        "agendamento",
+        "avanco",
+        "avanço",
+        "avancado",
+        "avançado",
+    ),
+    "sold": ("sold", "won", "venda", "vendido", "ganho"),
+}
+_EVENT_STAGE = {
+    alias: stage for stage, aliases in EVENT_ALIASES.items() for alias in aliases
+}
+
+# Colunas aceitas na exportação (cabeçalho em minúsculas)
+COLUMN_ALIASES = {
+    "event": ("event", "evento", "event_type", "tipo", "etapa"),
+    "timestamp": ("timestamp", "data", "date", "created_at", "event_time", "datahora"),
+    "segment": ("segment", "segmento", "porte"),
+}
+
+# Taxas do funil: nome -> (etapa, etapa anterior)
+FUNNEL_RATES = {
+    "response": ("reply", "send"),
+    "qualification": ("qualified", "reply"),
+    "booking": ("booked", "qualified"),
+    "sales": ("sold", "booked"),
+}
+
+ALL_SEGMENTS = "Todos"
+CHUNK_ROWS = 500_000
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _peek(source, size=65536):
+    """Primeiros bytes de um caminho ou arquivo aberto, sem consumir o arquivo."""
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        with open(source, "rb") as handle:
+            head = handle.read(size)
+    else:
+        position = source.tell()
+        head = source.read(size)
+        source.seek(position)
+    return head.decode("utf-8-sig", errors="replace") if isinstance(head, bytes) else head
+
+
+def _resolve_columns(header):
+    """Nome real de cada coluna conhecida; `segment` é opcional."""
+    by_lower = {str(column).strip().lower(): column for column in header}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        found = next((by_lower[a] for a in aliases if a in by_lower), None)
+        if found is not None:
+            columns[field] = found
+    missing = {"event", "timestamp"} - set(columns)
+    if missing:
+        raise ValueError(
+            "A exportação precisa das colunas de evento e data "
+            f"(não encontradas: {', '.join(sorted(missing))})"
+        )
+    return columns
+
+
+def _is_parquet(source):
+    name = str(getattr(source, "name", source))
+    return name.lower().endswith(".parquet")
+
+
+def _csv_chunks(source, chunk_rows, engine):
+    """Blocos (DataFrame) só com as colunas usadas, lidos do CSV."""
+    head = _peek(source)
+    first_line = head.splitlines()[0] if head else ""
+    try:
+        delimiter = csv.Sniffer().sniff(first_line, delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = ","
+    columns = _resolve_columns(next(csv.reader(io.StringIO(first_line), delimiter=delimiter)))
+
+    if engine == "pyarrow":
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+
+        # ~40 bytes por evento: blocos de aproximadamente `chunk_rows` linhas
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=max(chunk_rows * 40, 1 << 20)),
+            parse_options=pacsv.ParseOptions(delimiter=delimiter),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=list(columns.values()),
+                column_types={name: pa.string() for name in columns.values()},
+            ),
+        )
+        for batch in reader:
+            yield columns, batch.to_pandas()
+        return
+
+    for chunk in pd.read_csv(
+        source,
+        sep=delimiter,
+        usecols=list(columns.values()),
+        dtype=str,
+        chunksize=chunk_rows,
+    ):
+        yield columns, chunk
+
+
+def _parquet_chunks(source, chunk_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Ler Parquet requer o pacote pyarrow") from None
+    parquet = pq.ParquetFile(source)
+    columns = _resolve_columns(parquet.schema_arrow.names)
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=list(columns.values())):
+        yield columns, batch.to_pandas()
+
+
+def _count_chunk(chunk, columns):
+    """Contagens (mês, segmento, etapa) de um bloco e linhas descartadas."""
+    events = chunk[columns["event"]].astype(str).str.strip().str.lower()
+    stage = events.map(_EVENT_STAGE)
+    when = pd.to_datetime(chunk[columns["timestamp"]], errors="coerce", format="ISO8601")
+    if when.isna().all() and chunk[columns["timestamp"]].notna().any():
+        # Datas no formato brasileiro (dd/mm/aaaa)
+        when = pd.to_datetime(chunk[columns["timestamp"]], errors="coerce", dayfirst=True)
+    if "segment" in columns:
+        segment = chunk[columns["segment"]].fillna("").astype(str).str.strip()
+    else:
+        segment = pd.Series("", index=chunk.index)
+    valid = stage.notna() & when.notna()
+    frame = pd.DataFrame(
+        {
+            # Mês como inteiro aaaamm: bem mais barato que formatar datas
+            "mes": (when.dt.year * 100 + when.dt.month)[valid].astype(np.int64),
+            "segmento": segment[valid],
+            "etapa": stage[valid],
+        }
+    )
+    return frame.groupby(["mes", "segmento", "etapa"]).size(), int((~valid).sum())
+
+
+@dataclass
+class EventIngestion:
+    """
+    Resultado da leitura: contagens por mês e segmento (uma coluna por etapa
+    do funil), linhas lidas e descartadas, blocos e tempo de leitura.
+    """
+
+    counts: pd.DataFrame
+    rows: int
+    skipped: int
+    chunks: int
+    seconds: float
+    engine: str
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def segments(self):
+        return sorted(s for s in self.counts["segmento"].unique() if s)
+
+    def funnel(self, by=("mes", "segmento"), segment=None):
+        """
+        Contagens e taxas do funil agrupadas por `by` (colunas de `counts`;
+        vazio = total), opcionalmente só de um `segment`.
+        """
+        counts = self.counts
+        if segment not in (None, ALL_SEGMENTS):
+            counts = counts[counts["segmento"] == segment]
+        by = list(by)
+        if by:
+            table = counts.groupby(by, as_index=False)[list(FUNNEL_STAGES)].sum()
+        else:
+            table = counts[list(FUNNEL_STAGES)].sum().to_frame().T
+        for rate, (stage, previous) in FUNNEL_RATES.items():
+            table[rate] = np.divide(
+                table[stage].to_numpy(dtype=float),
+                table[previous].to_numpy(dtype=float),
+                out=np.full(len(table), np.nan),
+                where=table[previous].to_numpy() > 0,
+            )
+        return table
+
+    def calibrated_rates(self, segment=None):
+        """
+        Taxas do funil (0-1) de todo o período, para os valores da barra lateral.
+        Etapas sem nenhum evento na exportação (ex.: vendas fora do CRM) ficam NaN.
+        """
+        total = self.funnel(by=(), segment=segment).iloc[0]
+        return {
+            "sends": int(total["send"]),
+            **{
+                rate: float(total[rate]) if total[stage] > 0 else float("nan")
+                for rate, (stage, _) in FUNNEL_RATES.items()
+            },
+        }
+
+    def forecast_frame(self, segment=None):
+        """Série mensal (disparos e taxas de cada mês) no formato de `pricing.forecast`."""
+        from pricing.forecast import FORECAST_COLUMNS
+
+        table = self.funnel(by=("mes",), segment=segment)
+        frame = pd.DataFrame(
+            {
+                FORECAST_COLUMNS["mes"]: np.arange(1, len(table) + 1),
+                FORECAST_COLUMNS["total_leads"]: table["send"].to_numpy(dtype=float),
+            }
+        )
+        for rate in ("response", "qualification", "booking"):
+            frame[FORECAST_COLUMNS[rate]] = table[rate].to_numpy() * 100
+        frame[FORECAST_COLUMNS["minimum_billing"]] = np.nan
+        return frame
+
+
+def ingest_events(source, chunk_rows=CHUNK_ROWS, engine="auto"):
+    """
+    Lê uma exportação de eventos (caminho ou arquivo aberto, CSV ou Parquet)
+    em blocos e retorna um `EventIngestion`.
+
+    `engine` é "pyarrow", "pandas" ou "auto" (pyarrow se instalado). Parquet
+    sempre usa pyarrow.
+    """
+    if engine == "auto":
+        engine = "pyarrow" if _has_pyarrow() else "pandas"
+    if engine not in ("pyarrow", "pandas"):
+        raise ValueError(f"Leitor desconhecido: {engine!r}")
+    if _is_parquet(source):
+        engine = "pyarrow"
+        chunks = _parquet_chunks(source, chunk_rows)
+    else:
+        chunks = _csv_chunks(source, chunk_rows, engine)
+
+    start = time.perf_counter()
+    totals = None
+    rows = skipped = n_chunks = 0
+    for columns, chunk in chunks:
+        counts, dropped = _count_chunk(chunk, columns)
+        # Só o acumulado (meses × segmentos × etapas) sobrevive ao bloco
+        totals = counts if totals is None else totals.add(counts, fill_value=0)
+        rows += len(chunk)
+        skipped += dropped
+        n_chunks += 1
+    seconds = time.perf_counter() - start
+
+    if totals is None or totals.empty:
+        raise ValueError("Nenhum evento do funil reconhecido na exportação")
+    counts = (
+        totals.unstack("etapa", fill_value=0)
+        .reindex(columns=list(FUNNEL_STAGES), fill_value=0)
+        .astype(np.int64)
+        .reset_index()
+    )
+    counts.columns.name = None
+    counts["mes"] = (
+        (counts["mes"] // 100).astype(str) + "-" + (counts["mes"] % 100).map("{:02d}".format)
+    )
+    return EventIngestion(
+        counts=counts,
+        rows=rows,
+        skipped=skipped,
+        chunks=n_chunks,
+        seconds=seconds,
+        engine=engine,
+    )
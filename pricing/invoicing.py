@@ -0,0 +1,162 @@
+"""
+Faturamento incremental a partir de eventos de leads.
+
+O livro (`InvoiceLedger`) guarda, por conta e período (mês), as contagens dos
+eventos do funil e a fatura corrente. Respostas e agendamentos atrasados
+continuam chegando depois do fechamento do mês e, com faixas escalonadas, um
+evento a mais muda a faixa dos itens seguintes. Cada lote de eventos (ou
+correções, com contagem negativa) atualiza só os períodos afetados, e em cada
+período só as etapas do plano que dependem das contagens alteradas são
+reprecificadas (`CompiledPlan.reprice`; faixas por busca binária, O(log
+faixas)). O lote devolve as diferenças nas linhas das faturas, não o histórico
+inteiro.
+"""
+
+from dataclasses import dataclass
+
+from pricing.plan import default_plan, plan_for
+
+# Eventos do funil e as quantidades do plano que cada um altera
+EVENT_QUANTITIES = {
+    "send": ("num_no_replies",),
+    "reply": ("num_replies", "num_no_replies"),
+    "qualified": ("num_qualified",),
+    "booked": ("num_booked",),
+    "sold": ("num_vendas",),
+}
+TOTAL_LINE = "total"
+
+
+@dataclass(frozen=True)
+class InvoiceEvent:
+    """`count` eventos `stage` da conta no período (negativo = correção)."""
+
+    account: str
+    period: str
+    stage: str
+    count: int = 1
+
+
+@dataclass(frozen=True)
+class InvoiceDelta:
+    """Mudança de uma linha (ou do total) da fatura de uma conta no período."""
+
+    account: str
+    period: str
+    line: str
+    previous: float
+    current: float
+
+    @property
+    def amount(self):
+        return self.current - self.previous
+
+
+class InvoiceLedger:
+    """
+    Contagens e faturas correntes por (conta, período).
+
+    `pricing` é um `CompiledPricing` (None = tabelas do plano padrão) e
+    `params` os parâmetros do plano comuns a todas as contas; `set_params`
+    sobrepõe parâmetros de uma conta (ex.: consumo mínimo negociado).
+    """
+
+    def __init__(self, pricing=None, params=None):
+        self.plan = default_plan() if pricing is None else plan_for(pricing)
+        self.params = dict(params or {})
+        self.account_params = {}
+        self.repriced = 0
+        self._counts = {}  # (conta, período) -> {evento: contagem}
+        self._invoices = {}  # (conta, período) -> (linhas, total)
+
+    def __len__(self):
+        return len(self._invoices)
+
+    def periods(self, account=None):
+        """Chaves (conta, período) faturadas, opcionalmente de uma conta."""
+        return sorted(key for key in self._invoices if account in (None, key[0]))
+
+    def counts(self, account, period):
+        return dict(self._counts[(account, period)])
+
+    def invoice(self, account, period):
+        """Linhas da fatura corrente, com o total em `TOTAL_LINE`."""
+        lines, total = self._invoices[(account, period)]
+        return {**lines, TOTAL_LINE: total}
+
+    def apply(self, events):
+        """
+        Registra um lote de eventos (`InvoiceEvent` ou tuplas na mesma ordem)
+        e devolve a lista de `InvoiceDelta` das faturas que mudaram.
+
+        O lote é validado inteiro antes de alterar o livro: etapa desconhecida
+        ou contagem que ficaria negativa levanta ValueError.
+        """
+        net = {}
+        for event in events:
+            if not isinstance(event, InvoiceEvent):
+                event = InvoiceEvent(*event)
+            if event.stage not in EVENT_QUANTITIES:
+                raise ValueError(f"Evento desconhecido: {event.stage!r}")
+            changes = net.setdefault((event.account, event.period), {})
+            changes[event.stage] = changes.get(event.stage, 0) + event.count
+
+        for key, changes in net.items():
+            counts = self._counts.get(key, {})
+            for stage, change in changes.items():
+                if counts.get(stage, 0) + change < 0:
+                    raise ValueError(
+                        f"Correção deixaria {stage!r} negativo em {key[0]!r}/{key[1]!r}"
+                    )
+
+        deltas = []
+        for key, changes in net.items():
+            counts = self._counts.setdefault(key, dict.fromkeys(EVENT_QUANTITIES, 0))
+            changed = set()
+            for stage, change in changes.items():
+                if change:
+                    counts[stage] += change
+                    changed.update(EVENT_QUANTITIES[stage])
+            if changed or key not in self._invoices:
+                deltas.extend(self._reprice(key, changed))
+        return deltas
+
+    def set_params(self, account, **params):
+        """Sobrepõe parâmetros do plano de uma conta e reprecifica os períodos dela."""
+        self.account_params.setdefault(account, {}).update(params)
+        deltas = []
+        for key in self.periods(account):
+            deltas.extend(self._reprice(key, set(params)))
+        return deltas
+
+    def _quantities(self, key):
+        counts = self._counts[key]
+        return {
+            "num_no_replies": float(max(counts["send"] - counts["reply"], 0)),
+            "num_replies": float(counts["reply"]),
+            "num_qualified": float(counts["qualified"]),
+            "num_booked": float(counts["booked"]),
+            "num_vendas": float(counts["sold"]),
+        }
+
+    def _reprice(self, key, changed):
+        previous_lines, previous_total = self._invoices.get(key, (None, 0.0))
+        lines, total = self.plan.reprice(
+            self._quantities(key),
+            {**self.params, **self.account_params.get(key[0], {})},
+            previous_lines,
+            changed,
+        )
+        self._invoices[key] = (lines, total)
+        self.repriced += 1
+
+        account, period = key
+        previous_lines = previous_lines or {}
+        deltas = [
+            InvoiceDelta(account, period, name, previous_lines.get(name, 0.0), value)
+            for name, value in lines.items()
+            if value != previous_lines.get(name, 0.0)
+        ]
+        if total != previous_total:
+            deltas.append(InvoiceDelta(account, period, TOTAL_LINE, previous_total, total))
+        return deltas
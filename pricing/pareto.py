@@ -0,0 +1,207 @@
+"""
+Fronteira de Pareto entre custo e resultado (reuniões ou vendas).
+
+Um cenário está na fronteira se nenhum outro custa menos ou igual e entrega
+pelo menos o mesmo resultado (e, opcionalmente, o mesmo ROI sobre LTV), sendo
+estritamente melhor em algum critério. Os algoritmos são de skyline em
+O(n log n): ordenação por custo seguida de varredura (com o ROI, consultas
+numa árvore de Fenwick só para quem passa no pré-filtro das fronteiras 2D).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from pricing.engine import simulate_batch
+from pricing.explorer import AXES, OBJECTIVES, iter_scenario_chunks
+from pricing.schedules import compile_pricing
+
+
+def _front_2d(cost, benefit):
+    """Índices da fronteira custo x resultado, custo e resultado crescentes."""
+    # Custo crescente, resultado decrescente nos empates de custo
+    order = np.lexsort((-benefit, cost))
+    sorted_benefit = benefit[order]
+    best_before = np.empty_like(sorted_benefit)
+    best_before[:1] = -np.inf
+    np.maximum.accumulate(sorted_benefit[:-1], out=best_before[1:])
+    return order[sorted_benefit > best_before]
+
+
+def _range_max(values, start, stop):
+    """Máximo de `values[start:stop]` para vários intervalos (tabela esparsa)."""
+    table = [values]
+    width = 1
+    while 2 * width <= len(values):
+        prev = table[-1]
+        table.append(np.maximum(prev[:-width], prev[width:]))
+        width *= 2
+    out = np.full(len(start), -np.inf)
+    valid = stop > start
+    start, stop = start[valid], stop[valid]
+    level = np.log2(stop - start).astype(np.intp)
+    for k in np.unique(level).tolist():
+        sel = level == k
+        left, right = start[sel], stop[sel] - (1 << k)
+        out[np.flatnonzero(valid)[sel]] = np.maximum(table[k][left], table[k][right])
+    return out
+
+
+def _dominated_by(front, cost, benefit, third):
+    """
+    Marca os pontos com algum ponto de `front` (fronteira 2D custo x resultado)
+    de custo menor ou igual, resultado maior ou igual e `third` maior ou igual.
+    """
+    stop = np.searchsorted(cost[front], cost, side="right")
+    start = np.searchsorted(benefit[front], benefit, side="left")
+    return _range_max(third[front], start, stop) >= third
+
+
+def pareto_front(cost, benefit, roi=None):
+    """
+    Índices dos pontos não dominados, em ordem crescente de custo.
+
+    Minimiza `cost` e maximiza `benefit` (e `roi`, se informado). Pontos
+    repetidos aparecem uma única vez.
+    """
+    cost = np.asarray(cost, dtype=float).ravel()
+    benefit = np.asarray(benefit, dtype=float).ravel()
+    if roi is None:
+        return _front_2d(cost, benefit)
+
+    roi = np.asarray(roi, dtype=float).ravel()
+    # Pré-filtro vetorizado: descarta quem é dominado por um ponto das fronteiras
+    # 2D (custo x resultado e custo x ROI), que seguem todas como candidatas. Nos
+    # empates a fronteira 2D fica com o menor índice, então um repetido só cai
+    # se houver outro igual antes dele, como na varredura abaixo
+    by_benefit = _front_2d(cost, benefit)
+    by_roi = _front_2d(cost, roi)
+    candidate = ~(
+        _dominated_by(by_benefit, cost, benefit, roi)
+        | _dominated_by(by_roi, cost, roi, benefit)
+    )
+    candidate[by_benefit] = True
+    candidate[by_roi] = True
+    index = np.flatnonzero(candidate)
+    order = index[np.lexsort((-roi[index], -benefit[index], cost[index]))]
+
+    # Árvore de Fenwick com o maior ROI aceito por posição do resultado em ordem
+    # decrescente: "resultado >= b" vira um prefixo, consultado em O(log n)
+    levels = np.unique(benefit[order])
+    rank = np.zeros(len(cost), dtype=np.intp)
+    rank[order] = len(levels) - np.searchsorted(levels, benefit[order])
+    rank, roi = rank.tolist(), roi.tolist()
+    tree = [-np.inf] * (len(levels) + 1)
+    kept = []
+    for idx in order.tolist():
+        r = roi[idx]
+        best = -np.inf
+        pos = rank[idx]
+        while pos > 0:
+            best = max(best, tree[pos])
+            pos -= pos & -pos
+        if best >= r:
+            continue
+        kept.append(idx)
+        pos = rank[idx]
+        while pos < len(tree):
+            if tree[pos] < r:
+                tree[pos] = r
+            pos += pos & -pos
+    return np.array(kept, dtype=np.intp)
+
+
+@dataclass
+class FrontierResult:
+    """Pontos da fronteira (colunas NumPy, custo crescente) e cenários avaliados."""
+
+    points: dict
+    benefit: str
+    evaluated: int
+
+    def __len__(self):
+        return len(self.points["total_cost"])
+
+    def cheapest_for(self, level):
+        """Menor custo da fronteira que entrega pelo menos `level` de resultado."""
+        reach = self.points[self.benefit] >= level - 1e-9
+        return float(self.points["total_cost"][reach].min()) if reach.any() else None
+
+    def best_within(self, budget):
+        """Maior resultado da fronteira com custo até `budget`."""
+        within = self.points["total_cost"] <= budget + 1e-9
+        return float(self.points[self.benefit][within].max()) if within.any() else None
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.points)
+
+
+def pareto_scan(
+    axes,
+    pricing,
+    benefit="num_booked",
+    with_roi=False,
+    minimum_billing=0.0,
+    ticket_medio=0.0,
+    taxa_conversao_vendas=0.0,
+    comissao_vendas=0.0,
+    ltv_valor=0.0,
+    chunk_size=65536,
+):
+    """
+    Fronteira de Pareto sobre o produto cartesiano de `axes`, avaliado em blocos.
+
+    A fronteira de cada bloco é unida à fronteira acumulada e recalculada, então
+    só os pontos não dominados ficam em memória.
+    """
+    pricing = compile_pricing(pricing)
+    grid_axes = {name: np.atleast_1d(axes[name]) for name in AXES}
+    columns = AXES + ("total_cost", benefit) + (("roi_ltv",) if with_roi else ())
+    columns = tuple(dict.fromkeys(columns))
+    front = {name: np.empty(0) for name in columns}
+    evaluated = 0
+
+    for chunk in iter_scenario_chunks(grid_axes, chunk_size):
+        batch = simulate_batch(
+            chunk["total_leads"],
+            chunk["response"],
+            chunk["qualification"],
+            chunk["booking"],
+            pricing,
+            minimum_billing,
+            ticket_medio,
+            taxa_conversao_vendas,
+            comissao_vendas,
+        )
+        evaluated += len(batch)
+        values = {name: chunk[name] for name in AXES}
+        values["total_cost"] = batch.column("total_cost")
+        values[benefit] = batch.column(benefit)
+        if with_roi:
+            values["roi_ltv"] = OBJECTIVES["roi_ltv"](batch, ltv_valor)
+
+        # A fronteira da união é a fronteira das fronteiras parciais
+        local = pareto_front(
+            values["total_cost"],
+            values[benefit],
+            values["roi_ltv"] if with_roi else None,
+        )
+        merged = {
+            name: np.concatenate([front[name], values[name][local]])
+            for name in columns
+        }
+        keep = pareto_front(
+            merged["total_cost"],
+            merged[benefit],
+            merged["roi_ltv"] if with_roi else None,
+        )
+        front = {name: merged[name][keep] for name in columns}
+
+    order = np.argsort(front["total_cost"], kind="stable")
+    return FrontierResult(
+        points={name: front[name][order] for name in columns},
+        benefit=benefit,
+        evaluated=evaluated,
+    )
@@ -0,0 +1,453 @@
+"""
+Planos de preço declarativos, compilados num avaliador vetorizado.
+
+Um plano é uma sequência de etapas aplicadas em ordem sobre a fatura do mês,
+descrita num arquivo JSON (ver `pricing/plans/totalpass.json`):
+
+- `flat`: `price` × `quantity` (por unidade) ou valor fixo `amount`
+- `tiered`: tabela escalonada (`tiers` = [mínimo, máximo ou null, preço]),
+  com `mode`, `cap` e `floor` opcionais (ver `pricing.schedules`)
+- `allowance`: `units` inclusas de uma etapa anterior (`stage`), abatidas
+  pelo custo médio da etapa
+- `commission`: `rate` × `value` × `quantity`
+- `minimum`: completa o subtotal até `amount`
+- `discount`: `rate` do subtotal e/ou `amount` fixo, sem deixar negativo
+
+Valores numéricos podem ser "$parâmetro", resolvidos na avaliação (escalares
+ou arrays, com broadcast); `enabled` liga/desliga a etapa. O plano é
+compilado uma vez (tabelas em arrays NumPy) e avaliado com uma operação
+vetorizada por etapa, sem laço por cenário.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field, fields, replace
+from functools import cached_property
+
+import numpy as np
+
+from pricing.schedules import PRICING_MODES, STAGES, CompiledPricing, TierSchedule
+
+PLANS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plans")
+DEFAULT_PLAN_PATH = os.path.join(PLANS_DIR, "totalpass.json")
+
+STAGE_TYPES = ("flat", "tiered", "allowance", "commission", "minimum", "discount")
+
+
+@dataclass(frozen=True, eq=False)
+class PlanStage:
+    """Etapa compilada de um plano; só os campos do seu tipo são usados."""
+
+    name: str
+    kind: str
+    quantity: str = None
+    price: object = 0.0
+    amount: object = 0.0
+    schedule: TierSchedule = None
+    stage: str = None
+    units: object = 0.0
+    value: object = 1.0
+    rate: object = 0.0
+    enabled: object = True
+
+
+@dataclass
+class PlanBill:
+    """Fatura avaliada: linha de cada etapa, subtotal após cada etapa e total."""
+
+    lines: dict
+    subtotals: dict
+    total: np.ndarray
+
+    def before(self, stage_name):
+        """Subtotal que entra na etapa `stage_name`."""
+        names = list(self.subtotals)
+        index = names.index(stage_name)
+        return self.subtotals[names[index - 1]] if index else np.zeros_like(self.total)
+
+
+def _resolve(value, params):
+    """Número ou "$parâmetro"."""
+    if isinstance(value, str) and value.startswith("$"):
+        try:
+            return params[value[1:]]
+        except KeyError:
+            raise ValueError(f"Parâmetro do plano não informado: {value}") from None
+    return value
+
+
+def _flat(stage, quantities, params, lines, subtotal):
+    amount = _resolve(stage.amount, params)
+    if stage.quantity is None:
+        return np.zeros_like(subtotal) + amount
+    line = quantities[stage.quantity] * _resolve(stage.price, params)
+    return line + amount if np.any(amount) else line
+
+
+def _tiered(stage, quantities, params, lines, subtotal):
+    return stage.schedule.cost(quantities[stage.quantity])
+
+
+def _allowance(stage, quantities, params, lines, subtotal):
+    # Unidades inclusas abatidas pelo custo médio da etapa coberta
+    units = _resolve(stage.units, params)
+    if np.ndim(units) == 0 and units <= 0:
+        return 0.0
+    q = np.asarray(quantities[stage.quantity], dtype=float)
+    covered = np.clip(units, 0.0, q)
+    line = lines[stage.stage]
+    return -np.divide(
+        line * covered, q, out=np.zeros(np.broadcast(line, covered).shape), where=q > 0
+    )
+
+
+def _commission(stage, quantities, params, lines, subtotal):
+    return (
+        quantities[stage.quantity]
+        * _resolve(stage.value, params)
+        * _resolve(stage.rate, params)
+    )
+
+
+def _discount(stage, quantities, params, lines, subtotal):
+    discount = subtotal * _resolve(stage.rate, params) + _resolve(stage.amount, params)
+    return -np.minimum(discount, np.maximum(subtotal, 0.0))
+
+
+# Etapas que somam uma linha ao subtotal; `minimum` é tratada à parte
+_LINE_EVALUATORS = {
+    "flat": _flat,
+    "tiered": _tiered,
+    "allowance": _allowance,
+    "commission": _commission,
+    "discount": _discount,
+}
+
+# Etapas calculadas sobre o subtotal: sempre refeitas em `reprice`
+_SUBTOTAL_STAGES = ("minimum", "discount")
+
+
+def _stage_inputs(stage):
+    """Quantidade, parâmetros ("$nome") e etapa coberta de que a linha depende."""
+    inputs = {stage.quantity, stage.stage}
+    for value in (
+        stage.price,
+        stage.amount,
+        stage.units,
+        stage.value,
+        stage.rate,
+        stage.enabled,
+    ):
+        if isinstance(value, str) and value.startswith("$"):
+            inputs.add(value[1:])
+    inputs.discard(None)
+    return frozenset(inputs)
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledPlan:
+    """Plano compilado: etapas em ordem e valores padrão dos parâmetros."""
+
+    name: str
+    stages: tuple
+    parameters: dict = field(default_factory=dict)
+    description: str = ""
+    config: dict = field(default_factory=dict, repr=False)
+
+    @cached_property
+    def fingerprint(self):
+        """Hash das etapas (tabelas pelo fingerprint) e dos parâmetros padrão."""
+        digest = hashlib.sha1(repr(sorted(self.parameters.items())).encode())
+        for stage in self.stages:
+            values = [getattr(stage, f.name) for f in fields(stage) if f.name != "schedule"]
+            digest.update(repr(values).encode())
+            if stage.schedule is not None:
+                digest.update(stage.schedule.fingerprint.encode())
+        return digest.hexdigest()[:16]
+
+    def stage(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def evaluate(self, quantities, params=None):
+        """
+        Avalia a fatura para `quantities` (nome -> array) e `params`.
+
+        Todas as entradas são combinadas com broadcast; retorna um `PlanBill`.
+        """
+        params = {**self.parameters, **(params or {})}
+        shape = np.broadcast_shapes(
+            *(np.shape(q) for q in quantities.values()),
+            *(np.shape(v) for v in params.values()),
+        )
+        zeros = np.zeros(shape)
+        subtotal = zeros
+        lines, subtotals = {}, {}
+        for stage in self.stages:
+            if stage.kind == "minimum":
+                new_subtotal = np.maximum(subtotal, _resolve(stage.amount, params))
+                line = new_subtotal - subtotal
+            else:
+                line = _LINE_EVALUATORS[stage.kind](
+                    stage, quantities, params, lines, subtotal
+                )
+                # Linhas nulas (ex.: nada incluso) não passam pelos dados
+                if subtotal is zeros and np.shape(line) == shape:
+                    new_subtotal = line
+                elif np.ndim(line) == 0 and line == 0:
+                    new_subtotal = subtotal
+                else:
+                    new_subtotal = subtotal + line
+            enabled = _resolve(stage.enabled, params)
+            if enabled is not True:
+                line = np.where(enabled, line, 0.0)
+                new_subtotal = np.where(enabled, new_subtotal, subtotal)
+            lines[stage.name] = line
+            subtotals[stage.name] = subtotal = new_subtotal
+        return PlanBill(lines=lines, subtotals=subtotals, total=subtotal)
+
+    def derivatives(self, quantities, tangents, params=None):
+        """
+        Fatura e derivadas à direita do total, etapa por etapa, em cada direção
+        de `tangents` (direção -> {quantidade: derivada}; as ausentes não
+        variam). Os parâmetros ficam constantes. Retorna (`PlanBill`, direção
+        -> derivada do total).
+        """
+        bill = self.evaluate(quantities, params)
+        params = {**self.parameters, **(params or {})}
+        d_lines = {direction: {} for direction in tangents}
+        d_subtotal = dict.fromkeys(tangents, 0.0)
+        for stage in self.stages:
+            subtotal = bill.before(stage.name)
+            enabled = _resolve(stage.enabled, params)
+            q = quantities.get(stage.quantity)
+            if stage.kind == "tiered":
+                price = stage.schedule.marginal(q)
+            elif stage.kind == "flat":
+                price = _resolve(stage.price, params)
+            elif stage.kind == "commission":
+                price = _resolve(stage.value, params) * _resolve(stage.rate, params)
+            elif stage.kind == "allowance":
+                units = _resolve(stage.units, params)
+                covered = np.clip(units, 0.0, q)
+                line = bill.lines[stage.stage]
+            elif stage.kind == "minimum":
+                above = subtotal >= _resolve(stage.amount, params)
+            else:
+                discount = subtotal * _resolve(stage.rate, params) + _resolve(
+                    stage.amount, params
+                )
+                by_rate = discount <= np.maximum(subtotal, 0.0)
+            for direction, d_quantities in tangents.items():
+                d_q = d_quantities.get(stage.quantity, 0.0)
+                d_sub = d_subtotal[direction]
+                if stage.kind in ("tiered", "commission"):
+                    d_line = price * d_q
+                elif stage.kind == "flat":
+                    d_line = price * d_q if stage.quantity is not None else 0.0
+                elif stage.kind == "allowance":
+                    # -linha × coberto / q: abaixo das inclusas, coberto = q
+                    d_covered = np.where(q < units, d_q, 0.0)
+                    d_cover = d_lines[direction][stage.stage]
+                    d_line = -np.divide(
+                        d_cover * covered * q + line * (d_covered * q - covered * d_q),
+                        q**2,
+                        out=np.zeros(np.broadcast(line, covered, d_q, d_cover).shape),
+                        where=q > 0,
+                    )
+                elif stage.kind == "minimum":
+                    d_line = np.where(above, d_sub, 0.0) - d_sub
+                else:
+                    rate = _resolve(stage.rate, params)
+                    d_line = np.where(
+                        by_rate, -d_sub * rate, np.where(subtotal > 0, -d_sub, 0.0)
+                    )
+                if enabled is not True:
+                    d_line = np.where(enabled, d_line, 0.0)
+                d_lines[direction][stage.name] = d_line
+                d_subtotal[direction] = d_sub + d_line
+        return bill, d_subtotal
+
+    def reprice(self, quantities, params=None, previous=None, changed=()):
+        """
+        Fatura de um único cenário (quantidades escalares), refazendo só o que mudou.
+
+        `previous` são as linhas de uma avaliação anterior e `changed` os nomes
+        das quantidades e parâmetros alterados desde então: etapas que não
+        dependem deles nem de uma linha que mudou reaproveitam a linha anterior.
+        Etapas escalonadas usam `TierSchedule.cost_at` (O(log faixas)).
+        Retorna (linhas, total).
+        """
+        params = {**self.parameters, **(params or {})}
+        dirty = set(changed)
+        lines = {}
+        subtotal = 0.0
+        for stage in self.stages:
+            reuse = (
+                previous is not None
+                and stage.kind not in _SUBTOTAL_STAGES
+                and not (_stage_inputs(stage) & dirty)
+            )
+            if reuse:
+                line = previous[stage.name]
+            else:
+                if stage.kind == "minimum":
+                    line = max(subtotal, _resolve(stage.amount, params)) - subtotal
+                elif stage.kind == "tiered":
+                    line = stage.schedule.cost_at(quantities[stage.quantity])
+                else:
+                    line = _LINE_EVALUATORS[stage.kind](
+                        stage, quantities, params, lines, subtotal
+                    )
+                line = float(line) if _resolve(stage.enabled, params) else 0.0
+                if previous is None or line != previous.get(stage.name):
+                    dirty.add(stage.name)
+            lines[stage.name] = line
+            if stage.kind == "minimum" and line:
+                # Como em `evaluate`: o subtotal vira o mínimo, sem somar a diferença
+                subtotal = float(_resolve(stage.amount, params))
+            else:
+                subtotal += line
+        return lines, subtotal
+
+    def pricing(self):
+        """Tabelas do plano (escalonadas de `STAGES` e "no_reply") como `CompiledPricing`."""
+        return CompiledPricing(
+            no_reply_price=float(self.stage("no_reply").price),
+            **{name: self.stage(name).schedule for name in STAGES},
+        )
+
+    def with_pricing(self, pricing):
+        """
+        Plano com as tabelas de `pricing` (`CompiledPricing`) nas etapas de mesmo
+        nome: as escalonadas de `STAGES` e a `flat` "no_reply".
+        """
+        stages = []
+        for stage in self.stages:
+            if stage.kind == "tiered" and stage.name in STAGES:
+                stage = replace(stage, schedule=getattr(pricing, stage.name))
+            elif stage.kind == "flat" and stage.name == "no_reply":
+                stage = replace(stage, price=pricing.no_reply_price)
+            stages.append(stage)
+        return replace(self, stages=tuple(stages))
+
+
+def compile_tiers(spec):
+    """
+    Tabela escalonada no formato do JSON do plano: `tiers` = [mínimo, máximo
+    ou null, preço], com `mode`, `cap` e `floor` opcionais.
+    """
+    tiers = sorted(spec["tiers"], key=lambda tier: tier[0])
+    mode = spec.get("mode", "graduated")
+    if mode not in PRICING_MODES:
+        raise ValueError(f"Modo de cobrança desconhecido: {mode!r}")
+    return TierSchedule(
+        mins=np.array([float(t[0]) for t in tiers]),
+        maxs=np.array([np.inf if t[1] is None else float(t[1]) for t in tiers]),
+        prices=np.array([float(t[2]) for t in tiers]),
+        mode=mode,
+        cap=float(spec["cap"]) if spec.get("cap") else np.inf,
+        floor=float(spec["floor"]) if spec.get("floor") else 0.0,
+    )
+
+
+def compile_plan(config, previous=None):
+    """
+    Compila a descrição de um plano (dicionário no formato do JSON).
+
+    As tabelas escalonadas são validadas (`TierSchedule.validate`). Com
+    `previous` (plano compilado antes), as etapas escalonadas com o mesmo JSON
+    reaproveitam a tabela já compilada: só as que mudaram são recompiladas.
+    """
+    previous_specs = {}
+    if previous is not None:
+        previous_specs = {
+            spec.get("name", spec.get("type")): spec for spec in previous.config.get("stages", [])
+        }
+    stages = []
+    seen = set()
+    for spec in config["stages"]:
+        kind = spec.get("type")
+        name = spec.get("name", kind)
+        if kind not in STAGE_TYPES:
+            raise ValueError(f"Etapa {name!r}: tipo desconhecido {kind!r}")
+        if name in seen:
+            raise ValueError(f"Etapa {name!r} repetida no plano")
+        options = {
+            key: spec[key]
+            for key in ("quantity", "price", "amount", "units", "value", "rate", "enabled")
+            if key in spec
+        }
+        if kind == "tiered":
+            if previous_specs.get(name) == spec:
+                options["schedule"] = previous.stage(name).schedule
+            else:
+                try:
+                    options["schedule"] = compile_tiers(spec).validate()
+                except (KeyError, TypeError, IndexError, ValueError) as exc:
+                    raise ValueError(f"Etapa {name!r}: {exc}") from None
+        if kind in ("tiered", "commission") and "quantity" not in spec:
+            raise ValueError(f"Etapa {name!r}: 'quantity' é obrigatório")
+        if kind == "allowance":
+            covered = spec.get("stage")
+            if covered not in seen:
+                raise ValueError(
+                    f"Etapa {name!r}: 'stage' deve ser uma etapa anterior do plano"
+                )
+            # Unidades inclusas medidas na quantidade da etapa coberta
+            options["stage"] = covered
+            options["quantity"] = next(s.quantity for s in stages if s.name == covered)
+        stages.append(PlanStage(name=name, kind=kind, **options))
+        seen.add(name)
+    return CompiledPlan(
+        name=config.get("name", "Plano"),
+        stages=tuple(stages),
+        parameters=dict(config.get("parameters", {})),
+        description=config.get("description", ""),
+        config=config,
+    )
+
+
+def load_plan(path=DEFAULT_PLAN_PATH):
+    """Lê e compila um plano de um arquivo JSON."""
+    with open(path, encoding="utf-8") as plan_file:
+        return compile_plan(json.load(plan_file))
+
+
+_DEFAULT_PLAN = None
+_BOUND_PLANS = {}
+_BOUND_PLANS_MAX = 64
+# A thread de pré-cálculo também simula: o cache de planos é compartilhado
+_BOUND_PLANS_LOCK = threading.Lock()
+
+
+def default_plan():
+    """Plano TotalPass padrão, lido do arquivo uma vez por processo."""
+    global _DEFAULT_PLAN
+    if _DEFAULT_PLAN is None:
+        _DEFAULT_PLAN = load_plan(DEFAULT_PLAN_PATH)
+    return _DEFAULT_PLAN
+
+
+def set_default_plan(plan):
+    """Troca o plano padrão do processo (recarga do arquivo); descarta os planos derivados."""
+    global _DEFAULT_PLAN
+    with _BOUND_PLANS_LOCK:
+        _DEFAULT_PLAN = plan
+        _BOUND_PLANS.clear()
+
+
+def plan_for(pricing):
+    """Plano padrão com as tabelas de `pricing`, reaproveitado por fingerprint."""
+    key = pricing.fingerprint
+    with _BOUND_PLANS_LOCK:
+        plan = _BOUND_PLANS.get(key)
+        if plan is None:
+            if len(_BOUND_PLANS) >= _BOUND_PLANS_MAX:
+                _BOUND_PLANS.pop(next(iter(_BOUND_PLANS)))
+            plan = _BOUND_PLANS[key] = default_plan().with_pricing(pricing)
+    return plan
@@ -0,0 +1,131 @@
+"""
+Projeção mensal de receita, custo e lucro acumulados (POC + pós-POC).
+
+Mesma regra da projeção de 12 meses do app, em forma fechada: os clientes
+ativos, os leads inclusos no POC e os custos de cada mês são calculados para
+todos os meses e cenários de uma vez (eixo 0 = mês), e os acumulados saem de
+`cumsum`. Assim payback e break-even cabem numa grade inteira sem laço por
+célula.
+
+A fatura de cada mês vem do mesmo plano de preços de `simulate_batch`
+(`pricing.plan`), com os parâmetros do mês: leads inclusos restantes e
+consumo mínimo só depois do POC.
+
+Com `monthly=True`, os resultados já trazem um cenário por mês (eixo 0), por
+exemplo uma série sazonal de `pricing.forecast`: clientes ativos viram uma
+janela móvel das vendas dos últimos `ltv_meses` e os leads inclusos são
+abatidos pelo consumo acumulado dos meses anteriores.
+"""
+
+import numpy as np
+
+from pricing.plan import default_plan, plan_for
+
+
+def project_months(
+    results,
+    ticket_medio_mensal,
+    ltv_meses,
+    setup_fee,
+    poc_meses,
+    poc_leads_inclusos,
+    minimum_billing=0.0,
+    months=12,
+    pricing=None,
+    comissao_vendas=0.0,
+    monthly=False,
+):
+    """
+    Projeção mês a mês para um cenário ou uma grade de cenários.
+
+    `results` é um `SimulationResult` ou `SimulationBatch` (acesso por chave)
+    simulado com `pricing` (`CompiledPricing`; None = tabelas do plano padrão)
+    e `comissao_vendas`. A comissão é sobre a primeira mensalidade
+    (`ticket_medio_mensal`). Retorna um dicionário de arrays com shape
+    (meses, *grade).
+
+    Com `monthly=True`, o eixo 0 de `results` é o mês e define o horizonte
+    (`months` é ignorado); `minimum_billing` pode ser um array por mês.
+    """
+    vendas = np.asarray(results["num_vendas"], dtype=float)
+    leads = np.asarray(results["num_replies"], dtype=float)
+
+    ltv = int(ltv_meses)
+    if monthly:
+        months = vendas.shape[0]
+        mes = np.arange(1, months + 1, dtype=float).reshape(
+            (-1,) + (1,) * (vendas.ndim - 1)
+        )
+        # Clientes vendidos nos últimos `ltv` meses; leads já usados do POC
+        vendas_acumuladas = np.cumsum(vendas, axis=0)
+        clientes_ativos = vendas_acumuladas.copy()
+        if ltv > 0:
+            clientes_ativos[ltv:] -= vendas_acumuladas[:-ltv]
+        else:
+            clientes_ativos[:] = 0.0
+        leads_consumidos = np.cumsum(leads, axis=0) - leads
+    else:
+        mes = np.arange(1, months + 1, dtype=float).reshape((-1,) + (1,) * vendas.ndim)
+        # Clientes entram todo mês e saem após o LTV (em meses inteiros)
+        clientes_ativos = vendas * np.minimum(mes, ltv)
+        leads_consumidos = (mes - 1) * leads
+    receita_mensal = clientes_ativos * ticket_medio_mensal
+
+    # POC: os leads inclusos são consumidos mês a mês até acabarem; o consumo
+    # mínimo só vale depois do POC. A projeção nunca cobrou os disparos sem resposta.
+    em_poc = mes <= poc_meses
+    if monthly and np.ndim(minimum_billing):
+        minimum_billing = np.reshape(minimum_billing, mes.shape)
+    plan = default_plan() if pricing is None else plan_for(pricing)
+    bill = plan.evaluate(
+        {
+            name: np.asarray(results[name], dtype=float)
+            for name in (
+                "num_no_replies",
+                "num_replies",
+                "num_qualified",
+                "num_booked",
+                "num_vendas",
+            )
+        },
+        {
+            "cobra_disparos": False,
+            "ticket_medio": ticket_medio_mensal,
+            "comissao_vendas": comissao_vendas,
+            "leads_inclusos": np.where(
+                em_poc, np.maximum(poc_leads_inclusos - leads_consumidos, 0.0), 0.0
+            ),
+            "minimum_billing": np.where(em_poc, 0.0, minimum_billing),
+        },
+    )
+    custo_mensal = bill.total
+
+    receita_acumulada = np.cumsum(receita_mensal, axis=0)
+    custo_acumulado = setup_fee + np.cumsum(custo_mensal, axis=0)
+    return {
+        "mes": mes.reshape(-1).astype(int),
+        "clientes_ativos": clientes_ativos,
+        "receita_mensal": receita_mensal,
+        "custo_mensal": custo_mensal,
+        "receita_acumulada": receita_acumulada,
+        "custo_acumulado": custo_acumulado,
+        "lucro_acumulado": receita_acumulada - custo_acumulado,
+    }
+
+
+def breakeven_month(lucro_acumulado):
+    """Primeiro mês (1-based) com lucro acumulado positivo; NaN se não houver."""
+    positive = np.asarray(lucro_acumulado) > 0
+    first = positive.argmax(axis=0) + 1.0
+    return np.where(positive.any(axis=0), first, np.nan)
+
+
+def payback_months(receita_mensal, custo_mensal, setup_fee):
+    """Meses para o lucro mensal pagar o setup; inf se não houver lucro."""
+    lucro_mensal = np.asarray(receita_mensal, dtype=float) - custo_mensal
+    return np.divide(
+        setup_fee,
+        lucro_mensal,
+        out=np.full_like(lucro_mensal, np.inf),
+        where=lucro_mensal > 0,
+    )
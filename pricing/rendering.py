@@ -0,0 +1,194 @@
+"""
+Desenho de matrizes e curvas grandes com custo limitado no navegador.
+
+Com a grade de sensibilidade em passos finos ou varreduras de volume densas,
+mandar cada célula e cada ponto ao Plotly como JSON pesa no navegador. Aqui:
+
+- matrizes acima de `RASTER_ABOVE_CELLS` células viram uma imagem PNG gerada
+  no servidor (camada de fundo do gráfico); o hover vem de uma grade
+  amostrada de no máximo `HOVER_MAX_SIDE` × `HOVER_MAX_SIDE` células;
+- curvas acima de `LINE_MAX_POINTS` pontos viram traços WebGL (`Scattergl`)
+  com decimação mín/máx por faixa, que preserva picos e degraus.
+
+As figuras e traços saem como dicionários no formato JSON do Plotly (ver
+`pricing.figures`), sem importar o Plotly; o PIL só é importado ao gerar a
+imagem.
+"""
+
+import base64
+import io
+
+import numpy as np
+
+# Acima disso a matriz é enviada como imagem
+RASTER_ABOVE_CELLS = 1000
+# Rótulos de texto dentro das células só em matrizes pequenas (legíveis)
+TEXT_MAX_CELLS = 150
+# Lado máximo da grade de hover das matrizes rasterizadas
+HOVER_MAX_SIDE = 30
+# Lado mínimo da imagem em pixels (células ampliadas sem suavização)
+RASTER_MIN_PIXELS = 600
+# Pontos por curva acima dos quais entra a decimação mín/máx
+LINE_MAX_POINTS = 1000
+
+
+def _rgb(color):
+    """Cor '#rrggbb' ou 'rgb(r, g, b)' como tupla de floats."""
+    color = color.strip()
+    if color.startswith("#"):
+        return tuple(float(int(color[i : i + 2], 16)) for i in (1, 3, 5))
+    channels = color[color.index("(") + 1 : color.index(")")].split(",")
+    return tuple(float(c) for c in channels[:3])
+
+
+def rasterize_matrix(z, colorscale, zmin, zmax, min_pixels=RASTER_MIN_PIXELS):
+    """
+    PNG (data URL) da matriz `z` colorida pela escala do Plotly `colorscale`.
+
+    A linha 0 de `z` fica embaixo, como no `go.Heatmap`; NaN fica transparente.
+    """
+    from PIL import Image
+
+    z = np.asarray(z, dtype=float)
+    positions = np.array([stop[0] for stop in colorscale], dtype=float)
+    colors = np.array([_rgb(stop[1]) for stop in colorscale])
+    span = zmax - zmin if zmax > zmin else 1.0
+    t = np.clip((z[::-1] - zmin) / span, 0.0, 1.0)
+
+    rgba = np.empty(z.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(t, positions, colors[:, channel]).round()
+    rgba[..., 3] = np.where(np.isnan(z[::-1]), 0, 255)
+
+    image = Image.fromarray(rgba, mode="RGBA")
+    scale = max(1, -(-min_pixels // max(z.shape)))
+    if scale > 1:
+        image = image.resize(
+            (z.shape[1] * scale, z.shape[0] * scale), Image.Resampling.NEAREST
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def sample_indices(n, max_side):
+    """Até `max_side` índices igualmente espaçados em range(n), com as pontas."""
+    if n <= max_side:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_side).round().astype(int))
+
+
+def heatmap_figure(
+    z,
+    x,
+    y,
+    colorscale,
+    colorbar_title,
+    hovertemplate,
+    text=None,
+    raster_above=RASTER_ABOVE_CELLS,
+    zmid=None,
+):
+    """
+    Figura (dicionário) de heatmap de `z` (linhas = `y`, colunas = `x`).
+
+    `x` e `y` são numéricos e igualmente espaçados. Matrizes pequenas saem como
+    heatmap comum (com rótulos `text` se couberem); acima de `raster_above`
+    células, como imagem + grade de hover amostrada. O `hovertemplate` pode
+    usar %{x}, %{y}, %{z} e %{text}. Com `zmid`, a escala fica simétrica em
+    torno dele (escalas divergentes, como diferenças em torno de 0).
+    """
+    z = np.asarray(z, dtype=float)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = z[np.isfinite(z)]
+    zmin = float(finite.min()) if finite.size else 0.0
+    zmax = float(finite.max()) if finite.size else 1.0
+    if zmid is not None:
+        span = max(zmax - zmid, zmid - zmin)
+        zmin, zmax = zmid - span, zmid + span
+    heatmap = {
+        "type": "heatmap",
+        "colorscale": colorscale,
+        "zmin": zmin,
+        "zmax": zmax,
+        "colorbar": {"title": {"text": colorbar_title}},
+        "hovertemplate": hovertemplate + "<extra></extra>",
+    }
+
+    if z.size <= raster_above:
+        heatmap.update(z=z, x=x, y=y)
+        if text is not None:
+            heatmap["text"] = text
+            if z.size <= TEXT_MAX_CELLS:
+                heatmap.update(texttemplate="%{text}", textfont={"size": 9})
+        return {"data": [heatmap], "layout": {}}
+
+    # Grade de hover amostrada, invisível, por cima da imagem
+    rows = sample_indices(len(y), HOVER_MAX_SIDE)
+    cols = sample_indices(len(x), HOVER_MAX_SIDE)
+    heatmap.update(z=z[np.ix_(rows, cols)], x=x[cols], y=y[rows], opacity=0)
+    if text is not None:
+        heatmap["text"] = np.asarray(text, dtype=object)[np.ix_(rows, cols)]
+
+    dx = (x[-1] - x[0]) / max(len(x) - 1, 1)
+    dy = (y[-1] - y[0]) / max(len(y) - 1, 1)
+    x_range = [x[0] - dx / 2, x[-1] + dx / 2]
+    y_range = [y[0] - dy / 2, y[-1] + dy / 2]
+    image = {
+        "source": rasterize_matrix(z, colorscale, zmin, zmax),
+        "xref": "x",
+        "yref": "y",
+        "x": x_range[0],
+        "y": y_range[1],
+        "sizex": x_range[1] - x_range[0],
+        "sizey": y_range[1] - y_range[0],
+        "sizing": "stretch",
+        "layer": "below",
+    }
+    axis = {"showgrid": False, "zeroline": False}
+    return {
+        "data": [heatmap],
+        "layout": {
+            "images": [image],
+            "xaxis": {"range": x_range, **axis},
+            "yaxis": {"range": y_range, **axis},
+        },
+    }
+
+
+def minmax_decimate(y, max_points):
+    """
+    Índices que mantêm o mínimo e o máximo de `y` em cada faixa do eixo x.
+
+    Com `max_points // 2` faixas, a curva desenhada tem os mesmos picos, vales
+    e degraus da original; as pontas são sempre mantidas.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(max_points // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    # Ordena por faixa e, dentro dela, por valor: primeiro = mín, último = máx
+    order = np.lexsort((np.nan_to_num(y), bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+
+
+def line_trace(x, y, max_points=LINE_MAX_POINTS, **props):
+    """
+    Traço de linha (dicionário) para `x`, `y`: "scatter" se couber em
+    `max_points`, senão "scattergl" com decimação mín/máx. `props` são as
+    demais propriedades do traço, no formato JSON do Plotly.
+    """
+    if len(x) <= max_points:
+        return {"type": "scatter", "x": x, "y": y, **props}
+    keep = minmax_decimate(y, max_points)
+    return {
+        "type": "scattergl",
+        "x": np.asarray(x)[keep],
+        "y": np.asarray(y)[keep],
+        **props,
+    }
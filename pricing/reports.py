@@ -0,0 +1,443 @@
+"""
+Propostas comerciais em HTML estático, geradas sem o Streamlit.
+
+Cada perfil de prospect é um `Scenario` (`pricing.scenarios`: volume, taxas
+do funil, consumo mínimo, ticket, LTV, conversão, comissão e tabelas; sem
+tabelas = plano padrão). A proposta traz os números principais, a composição
+do custo, a projeção de 12 meses e a sensibilidade do custo ao volume, com os
+mesmos construtores de figuras do app (`pricing.charts`).
+
+Os perfis são agrupados pelas tabelas de preços e cada grupo é dividido em
+blocos, renderizados num pool de processos. Num bloco, o target e as
+varreduras de todos os perfis saem de uma chamada de `simulate_batch`, e as
+tabelas são compiladas uma vez por processo (cache por conteúdo). O Plotly.js
+e o template vão uma vez para a pasta de saída (`proposta.js`); cada HTML traz
+só os números e os dados das suas figuras.
+"""
+
+import csv
+import html
+import json
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from pricing.charts import (
+    COST_COLORS,
+    build_cost_pie,
+    build_projection_figure,
+    build_volume_figure,
+)
+from pricing.engine import simulate_batch
+from pricing.figures import figure_json
+from pricing.plan import compile_tiers, default_plan
+from pricing.projection import breakeven_month, payback_months, project_months
+from pricing.scenarios import Scenario, load_scenarios
+from pricing.schedules import STAGES, CompiledPricing
+
+# Mesmos valores da proposta do app
+SETUP_FEE = 14470.0
+POC_MESES = 3
+POC_LEADS_INCLUSOS = 2000
+PROJECTION_MONTHS = 12
+# Variações da taxa de resposta na sensibilidade (como a aba do app)
+RESPONSE_STEPS = (-0.20, -0.10, 0.0, 0.10, 0.20)
+# Varredura de volume: 0 a 2× o volume do prospect
+SWEEP_POINTS = 51
+# Perfis por tarefa do pool
+CHUNK_SIZE = 25
+ASSET_NAME = "proposta.js"
+
+_PRICINGS = {}
+
+_ASSET_SCRIPT = """
+const PROPOSTA_TEMPLATE = {template};
+function desenhar(id, figura) {{
+  figura.layout = figura.layout || {{}};
+  if (!figura.layout.template) figura.layout.template = PROPOSTA_TEMPLATE;
+  Plotly.newPlot(id, figura.data, figura.layout, {{responsive: true, displaylogo: false}});
+}}
+"""
+
+_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Proposta {name} | Sailer AI</title>
+<script src="{asset}"></script>
+<style>
+body {{
+  font-family: -apple-system, "Segoe UI", Roboto, sans-serif;
+  margin: 0 auto; max-width: 1100px; padding: 24px; color: #262730;
+}}
+h1 {{ margin-bottom: 4px; }}
+.cards {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; margin: 16px 0; }}
+.card {{ border: 1px solid #E0E0E0; border-radius: 12px; padding: 14px; }}
+.card p {{ margin: 0; font-size: 0.85rem; opacity: 0.75; }}
+.card h3 {{ margin: 6px 0 0; }}
+.grid {{ display: grid; grid-template-columns: 60% 40%; gap: 12px; align-items: center; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ padding: 6px 8px; border-bottom: 1px solid #E0E0E0; text-align: right; }}
+th:first-child, td:first-child {{ text-align: left; }}
+.nota {{ font-size: 0.85rem; opacity: 0.75; }}
+</style>
+</head>
+<body>
+<h1>🚀 Proposta Comercial | {name} + Sailer AI</h1>
+<p class="nota">Análise para <b>{leads} disparos</b> por mês com as taxas do perfil.</p>
+<h2>📊 Resultados da Simulação</h2>
+<div class="cards">{cards}</div>
+<h2>📈 Projeção {months} Meses: Receita Acumulada vs Investimento</h2>
+<div class="grid"><div id="projecao"></div><div>{summary}</div></div>
+<h2>💰 Composição do Custo Mensal</h2>
+<div class="grid"><div>{composition}</div><div id="composicao"></div></div>
+<h2>📈 Análise de Sensibilidade por Volume</h2>
+<div id="sensibilidade"></div>
+<script>
+{figures}
+</script>
+</body>
+</html>
+"""
+
+
+@dataclass
+class ReportRun:
+    """Resultado de `generate_reports`: arquivos gerados, tempo e reuso de tabelas."""
+
+    paths: list
+    seconds: float
+    workers: int
+    pricing_groups: int
+    compilations: int
+
+    @property
+    def reports_per_minute(self):
+        return len(self.paths) * 60 / self.seconds if self.seconds > 0 else 0.0
+
+
+def load_profiles(path):
+    """
+    Perfis de prospects de um JSON (formato de `cenarios.json`) ou CSV com as
+    colunas de `Scenario` (taxas em 0-1, sem `tables`: plano padrão).
+    """
+    if path.lower().endswith(".json"):
+        return list(load_scenarios(path).values())
+    numeric = {f.name for f in fields(Scenario)} - {"name", "tables"}
+    profiles = []
+    with open(path, encoding="utf-8", newline="") as profiles_file:
+        for row in csv.DictReader(profiles_file):
+            values = {
+                key: float(value) for key, value in row.items() if key in numeric and value
+            }
+            profiles.append(Scenario(name=row["name"], **values))
+    return profiles
+
+
+def pricing_key(tables):
+    """Chave das tabelas de um perfil: mesmo conteúdo, mesma compilação."""
+    return json.dumps(tables, sort_keys=True) if tables else ""
+
+
+def compiled_pricing(tables):
+    """`CompiledPricing` das tabelas (vazias = plano padrão), compilado uma vez por processo."""
+    key = pricing_key(tables)
+    pricing = _PRICINGS.get(key)
+    if pricing is None:
+        if tables:
+            pricing = CompiledPricing(
+                no_reply_price=float(tables["no_reply"]),
+                **{stage: compile_tiers(tables[stage]) for stage in STAGES},
+            )
+        else:
+            pricing = default_plan().pricing()
+        _PRICINGS[key] = pricing
+    return pricing
+
+
+def report_filename(name, taken):
+    """Nome de arquivo ASCII para o prospect, sem repetir os de `taken`."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    slug = re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "prospect"
+    filename = f"proposta-{slug}.html"
+    suffix = 2
+    while filename in taken:
+        filename = f"proposta-{slug}-{suffix}.html"
+        suffix += 1
+    taken.add(filename)
+    return filename
+
+
+def write_assets(out_dir):
+    """Grava o Plotly.js e o template padrão, compartilhados por todas as propostas."""
+    import plotly.io as pio
+    from plotly.offline import get_plotlyjs
+
+    template = pio.templates[pio.templates.default].to_plotly_json()
+    path = os.path.join(out_dir, ASSET_NAME)
+    with open(path, "w", encoding="utf-8") as asset_file:
+        asset_file.write(get_plotlyjs())
+        asset_file.write(_ASSET_SCRIPT.format(template=json.dumps(template)))
+    return path
+
+
+def _money(value):
+    return f"R$ {value:,.2f}"
+
+
+def _card(label, value, note=""):
+    note = f"<p>{html.escape(note)}</p>" if note else ""
+    return f"<div class=\"card\"><p>{label}</p><h3>{value}</h3>{note}</div>"
+
+
+def _figure_script(element_id, spec):
+    # "</" fecharia o <script> no meio dos dados
+    data = figure_json(spec).replace("</", "<\\/")
+    return f"desenhar({element_id!r}, {data});"
+
+
+def _simulate(profiles, pricing):
+    """Target, varreduras de volume por taxa de resposta e projeção do bloco."""
+
+    def column(name):
+        return np.array([float(getattr(p, name)) for p in profiles])
+
+    leads = column("total_leads")
+    response = column("response")
+    qualification = column("qualification")
+    booking = column("booking")
+    params = [
+        column(name)
+        for name in ("minimum_billing", "ticket_medio", "taxa_conversao_vendas", "comissao_vendas")
+    ]
+
+    target = simulate_batch(leads, response, qualification, booking, pricing, *params)
+
+    # (perfis, variações, volumes) numa chamada só
+    volumes = np.round(leads[:, None] * np.linspace(0.0, 2.0, SWEEP_POINTS))
+    variations = np.clip(response[:, None] + np.array(RESPONSE_STEPS), 0.0, 1.0)
+    sweeps = simulate_batch(
+        volumes[:, None, :],
+        variations[:, :, None],
+        qualification[:, None, None],
+        booking[:, None, None],
+        pricing,
+        *(param[:, None, None] for param in params),
+    )["total_cost"]
+
+    # Projeção de todos os perfis com o mesmo LTV (em meses inteiros) de uma vez
+    ltv_meses = np.floor(column("ltv_dias") / 30)
+    projection = {}
+    for ltv in np.unique(ltv_meses):
+        rows = np.flatnonzero(ltv_meses == ltv)
+        projected = project_months(
+            {name: target[name][rows] for name in target.names},
+            params[1][rows],
+            ltv,
+            SETUP_FEE,
+            POC_MESES,
+            POC_LEADS_INCLUSOS,
+            params[0][rows],
+            months=PROJECTION_MONTHS,
+            pricing=pricing,
+            comissao_vendas=params[3][rows],
+        )
+        for position, row in enumerate(rows):
+            projection[row] = {
+                key: value if key == "mes" else value[:, position]
+                for key, value in projected.items()
+            }
+    return target, volumes, variations, sweeps, projection
+
+
+def _render(profile, result, volumes, variations, sweeps, projection):
+    """HTML da proposta de um perfil."""
+    final_cost = result["total_cost"]
+    calculated_cost = result["calculated_cost"]
+    receita_mensal = result["num_vendas"] * profile.ticket_medio
+    receita_ltv = receita_mensal * profile.ltv_dias / 30
+    roi_ltv = (receita_ltv - final_cost) / final_cost * 100 if final_cost > 0 else 0
+    cpa = final_cost / result["num_booked"] if result["num_booked"] > 0 else 0
+
+    minimum_applied = final_cost > calculated_cost
+    cards = [
+        _card(
+            "📨 Respostas",
+            f"{int(result['num_replies']):,}",
+            f"{profile.response:.1%} dos disparos",
+        ),
+        _card(
+            "✅ Leads Qualificados",
+            f"{int(result['num_qualified']):,}",
+            f"{profile.qualification:.1%} das respostas",
+        ),
+        _card(
+            "📈 Leads Avançados / Reuniões",
+            f"{int(result['num_booked']):,}",
+            f"{profile.booking:.1%} dos qualificados",
+        ),
+        _card(
+            "💵 Custo Mensal",
+            _money(final_cost),
+            "Consumo mínimo aplicado" if minimum_applied else f"CPA {_money(cpa)}",
+        ),
+        _card(
+            "💰 Vendas Estimadas",
+            f"{result['num_vendas']:.1f}",
+            f"{profile.taxa_conversao_vendas:.0%} dos avançados",
+        ),
+        _card("📈 Receita Mensal", _money(receita_mensal), f"LTV total: R$ {receita_ltv:,.0f}"),
+        _card(
+            "🤝 Comissão de Vendas",
+            _money(result["cost_comissao"]),
+            f"{profile.comissao_vendas:.0%} da 1ª mensalidade",
+        ),
+        _card("📊 ROI sobre LTV", f"{roi_ltv:.1f}%", "LTV gerado vs Custo Sailer"),
+    ]
+
+    breakeven = breakeven_month(projection["lucro_acumulado"])
+    breakeven = None if np.isnan(breakeven) else int(breakeven)
+    lucro = projection["lucro_acumulado"][-1]
+    custo = projection["custo_acumulado"][-1]
+    payback = float(payback_months(receita_mensal, final_cost, SETUP_FEE))
+    summary = (
+        f"<p><b>Lucro acumulado em {PROJECTION_MONTHS} meses:</b> {_money(lucro)} "
+        f"(ROI {lucro / custo * 100 if custo > 0 else 0:.0f}%)</p><ul>"
+        f"<li>📈 Receita total: {_money(projection['receita_acumulada'][-1])}</li>"
+        f"<li>💳 Investimento Sailer: {_money(custo)} (setup {_money(SETUP_FEE)})</li>"
+        f"<li>🎯 Break-even: {'N/A' if breakeven is None else f'Mês {breakeven}'}</li>"
+        f"<li>⏱️ Payback do setup: "
+        f"{'N/A' if np.isinf(payback) else f'{payback:.1f} meses'}</li></ul>"
+    )
+
+    # Mesmos componentes do app; o ajuste do consumo mínimo só se aplicado
+    components = [
+        (
+            "Leads Processados (com resposta)",
+            f"{int(result['num_replies']):,}",
+            result["cost_replies"],
+        ),
+        ("Leads Qualificados", f"{int(result['num_qualified']):,}", result["cost_qualified"]),
+        ("Leads Avançados / Reuniões", f"{int(result['num_booked']):,}", result["cost_booked"]),
+        ("Comissão de Vendas", f"{result['num_vendas']:.1f} vendas", result["cost_comissao"]),
+    ]
+    if minimum_applied:
+        components.append(("Ajuste Consumo Mínimo", "-", final_cost - calculated_cost))
+    rows = "".join(
+        f"<tr><td>{label}</td><td>{quantity}</td><td>{_money(cost)}</td>"
+        f"<td>{cost / final_cost * 100 if final_cost > 0 else 0:.1f}%</td></tr>"
+        for label, quantity, cost in components
+    )
+    composition = (
+        "<table><tr><th>Componente</th><th>Quantidade</th><th>Custo (R$)</th>"
+        f"<th>% do Total</th></tr>{rows}</table>"
+    )
+
+    curves = {}
+    for step, rate, costs in zip(RESPONSE_STEPS, variations, sweeps):
+        if not 0.0 <= profile.response + step <= 1.0:
+            continue
+        label = "Target" if step == 0 else f"{step * 100:+.0f}pp"
+        curves[f"{label} ({rate * 100:.1f}%)"] = costs
+    figures = [
+        _figure_script(
+            "projecao",
+            build_projection_figure(
+                projection["mes"],
+                projection["receita_acumulada"],
+                projection["custo_acumulado"],
+                breakeven,
+            ),
+        ),
+        _figure_script(
+            "composicao",
+            build_cost_pie(
+                [label for label, _, _ in components],
+                np.array([cost for _, _, cost in components]),
+                COST_COLORS[: len(components)],
+            ),
+        ),
+        _figure_script(
+            "sensibilidade",
+            build_volume_figure(
+                volumes, curves, "Taxa de Resposta", profile.total_leads, final_cost
+            ),
+        ),
+    ]
+    return _PAGE.format(
+        name=html.escape(profile.name),
+        asset=ASSET_NAME,
+        leads=f"{profile.total_leads:,.0f}",
+        cards="".join(cards),
+        months=PROJECTION_MONTHS,
+        summary=summary,
+        composition=composition,
+        figures="\n".join(figures),
+    )
+
+
+def render_chunk(tables, profiles, out_dir, filenames):
+    """
+    Renderiza um bloco de perfis com as mesmas `tables` (tarefa do pool).
+    Retorna os caminhos gravados e se as tabelas foram compiladas agora.
+    """
+    compiled = pricing_key(tables) not in _PRICINGS
+    pricing = compiled_pricing(tables)
+    target, volumes, variations, sweeps, projection = _simulate(profiles, pricing)
+    paths = []
+    for row, (profile, filename) in enumerate(zip(profiles, filenames)):
+        page = _render(
+            profile, target[row], volumes[row], variations[row], sweeps[row], projection[row]
+        )
+        path = os.path.join(out_dir, filename)
+        with open(path, "w", encoding="utf-8") as report_file:
+            report_file.write(page)
+        paths.append(path)
+    return paths, compiled
+
+
+def generate_reports(profiles, out_dir, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Gera uma proposta HTML por perfil em `out_dir`, em `workers` processos
+    (None = um por CPU; 1 = no próprio processo). Retorna um `ReportRun`.
+    """
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    write_assets(out_dir)
+
+    taken = set()
+    groups = {}
+    for profile in profiles:
+        key = pricing_key(profile.tables)
+        groups.setdefault(key, []).append((profile, report_filename(profile.name, taken)))
+    tasks = []
+    for items in groups.values():
+        for i in range(0, len(items), chunk_size):
+            chunk = items[i : i + chunk_size]
+            tasks.append(
+                (
+                    chunk[0][0].tables,
+                    [profile for profile, _ in chunk],
+                    out_dir,
+                    [filename for _, filename in chunk],
+                )
+            )
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [render_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_chunk, *zip(*tasks))) if tasks else []
+    return ReportRun(
+        paths=[path for paths, _ in results for path in paths],
+        seconds=time.perf_counter() - start,
+        workers=workers,
+        pricing_groups=len(groups),
+        compilations=sum(compiled for _, compiled in results),
+    )
@@ -0,0 +1,134 @@
+"""
+Contêineres de resultados de simulação.
+
+`SimulationBatch` guarda os resultados de muitos cenários em colunas NumPy
+contíguas (struct-of-arrays): um único bloco float64 de shape (colunas,
+cenários), ou seja, 8 bytes por coluna por cenário, em vez de um dicionário por
+cenário. `SimulationResult` é o resultado de um único cenário, com `__slots__`.
+"""
+
+import numpy as np
+
+# Colunas de `run_simulation`, na mesma ordem
+RESULT_FIELDS = (
+    "total_leads",
+    "num_no_replies",
+    "num_replies",
+    "num_qualified",
+    "num_booked",
+    "num_vendas",
+    "cost_no_reply",
+    "cost_replies",
+    "cost_leads_processados",
+    "success_fees_puros",
+    "cost_qualified",
+    "cost_booked",
+    "cost_comissao",
+    "calculated_cost",
+    "total_cost",
+    "cpl",
+    "cpa",
+)
+
+
+class SimulationResult:
+    """
+    Resultado de um único cenário.
+
+    Aceita acesso por atributo (`result.total_cost`) e por chave
+    (`result["total_cost"]`), como o dicionário retornado antes. Colunas fora de
+    `RESULT_FIELDS` (ex.: derivadas) ficam em `extra`.
+    """
+
+    __slots__ = RESULT_FIELDS + ("extra",)
+
+    def __init__(self, extra=None, **values):
+        for name in RESULT_FIELDS:
+            setattr(self, name, values.pop(name))
+        self.extra = {**values, **(extra or {})}
+
+    def __getitem__(self, key):
+        if key in RESULT_FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __contains__(self, key):
+        return key in RESULT_FIELDS or key in self.extra
+
+    def keys(self):
+        return list(RESULT_FIELDS) + list(self.extra)
+
+    def as_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f"SimulationResult(total_cost={self.total_cost!r}, cpa={self.cpa!r})"
+
+
+class SimulationBatch:
+    """
+    Resultados de N cenários em colunas NumPy contíguas.
+
+    - `batch["total_cost"]` retorna a coluna com o shape da grade simulada
+      (view, sem cópia)
+    - `batch[i]` retorna um `SimulationResult`
+    - `batch[a:b]`, `batch[mask]` e `batch[indices]` retornam um novo
+      `SimulationBatch` 1-D (fatias são views; máscaras e índices copiam)
+    """
+
+    __slots__ = ("names", "data", "shape")
+
+    def __init__(self, names, data, shape=None):
+        self.names = tuple(names)
+        self.data = data
+        self.shape = (data.shape[1],) if shape is None else tuple(shape)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Monta o lote a partir de um dicionário de arrays (com broadcast entre si)."""
+        shape = np.broadcast_shapes(*(np.shape(a) for a in arrays.values()))
+        size = int(np.prod(shape, dtype=np.int64))
+        data = np.empty((len(arrays), size))
+        for row, values in zip(data, arrays.values()):
+            np.copyto(row.reshape(shape), values)
+        return cls(arrays.keys(), data, shape)
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def column(self, name):
+        """Coluna como array 1-D contíguo (view)."""
+        return self.data[self.names.index(name)]
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key).reshape(self.shape)
+        if isinstance(key, (int, np.integer)):
+            values = dict(zip(self.names, self.data[:, key].tolist()))
+            return SimulationResult(**values)
+        key = np.asarray(key) if not isinstance(key, slice) else key
+        if isinstance(key, np.ndarray) and key.dtype == bool:
+            key = key.reshape(-1)
+        return SimulationBatch(self.names, self.data[:, key])
+
+    def to_pandas(self):
+        """DataFrame que compartilha a memória do lote (sem cópia)."""
+        import pandas as pd
+
+        # data.T é F-contíguo: o pandas usa o bloco (colunas, cenários) como está
+        return pd.DataFrame(self.data.T, columns=list(self.names), copy=False)
+
+    def to_arrow(self):
+        """Tabela Arrow com buffers apontando para as colunas do lote (sem cópia)."""
+        import pyarrow as pa
+
+        return pa.table(
+            {name: pa.array(self.data[i]) for i, name in enumerate(self.names)}
+        )
@@ -0,0 +1,177 @@
+"""
+Cenários nomeados: entradas da barra lateral + tabelas de preços.
+
+Um `Scenario` guarda volume, taxas do funil, consumo mínimo, ticket, LTV,
+conversão, comissão e as tabelas (no formato do JSON do plano), para ser
+salvo na sessão e num arquivo JSON local e recarregado depois. Todos os
+cenários são avaliados juntos por `evaluate_scenarios`: as tabelas são
+empilhadas (`pricing.compare`) e o cenário i usa a linha i de cada entrada,
+numa única chamada vetorizada para o target e a varredura de volume.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field, fields
+
+import numpy as np
+
+from pricing.compare import evaluate_pricings
+from pricing.engine import funnel_volumes
+from pricing.plan import compile_tiers
+from pricing.schedules import STAGES, CompiledPricing
+
+SCENARIOS_VERSION = 1
+
+
+@dataclass
+class Scenario:
+    """
+    Entradas de uma simulação (taxas em 0-1) e as tabelas de preços:
+    `tables[etapa]` = {"tiers": [[mínimo, máximo ou None, preço]], "mode",
+    "cap", "floor"} e `tables["no_reply"]` = preço por disparo sem resposta.
+    """
+
+    name: str
+    total_leads: float
+    response: float
+    qualification: float
+    booking: float
+    minimum_billing: float = 0.0
+    ticket_medio: float = 0.0
+    ltv_dias: float = 0.0
+    taxa_conversao_vendas: float = 0.0
+    comissao_vendas: float = 0.0
+    tables: dict = field(default_factory=dict)
+
+    def pricing(self):
+        """Tabelas compiladas (`CompiledPricing`)."""
+        return CompiledPricing(
+            no_reply_price=float(self.tables["no_reply"]),
+            **{stage: compile_tiers(self.tables[stage]) for stage in STAGES},
+        )
+
+
+def tables_from_pricing(pricing):
+    """Tabelas de um `CompiledPricing` no formato de `Scenario.tables`."""
+    tables = {"no_reply": float(pricing.no_reply_price)}
+    for stage in STAGES:
+        schedule = getattr(pricing, stage)
+        tables[stage] = {
+            "tiers": [
+                [float(low), None if np.isinf(high) else float(high), float(price)]
+                for low, high, price in zip(schedule.mins, schedule.maxs, schedule.prices)
+            ],
+            "mode": schedule.mode,
+            "cap": None if np.isinf(schedule.cap) else float(schedule.cap),
+            "floor": float(schedule.floor),
+        }
+    return tables
+
+
+def load_scenarios(path):
+    """Cenários salvos em `path` (nome -> `Scenario`); arquivo ausente = nenhum."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as scenarios_file:
+        data = json.load(scenarios_file)
+    known = {f.name for f in fields(Scenario)}
+    scenarios = {}
+    for item in data.get("scenarios", []):
+        scenario = Scenario(**{key: value for key, value in item.items() if key in known})
+        scenarios[scenario.name] = scenario
+    return scenarios
+
+
+def save_scenarios(path, scenarios):
+    """Grava os cenários em `path` (escrita atômica: arquivo temporário + rename)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    data = {
+        "version": SCENARIOS_VERSION,
+        "scenarios": [asdict(scenario) for scenario in scenarios.values()],
+    }
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as scenarios_file:
+        json.dump(data, scenarios_file, ensure_ascii=False, indent=2)
+    os.replace(temporary, path)
+
+
+def evaluate_scenarios(scenarios, lead_volumes=None):
+    """
+    Avalia N cenários numa única chamada vetorizada.
+
+    Retorna um dicionário de arrays (N,) com as quantidades do funil, custo,
+    CPA, custo por venda, receita mensal e do LTV e ROI sobre o LTV de cada
+    cenário no seu volume; com `lead_volumes` (V,), inclui `sweep_cost` e
+    `sweep_cpa` (N, V): custo e CPA de cada cenário (taxas e tabelas
+    próprias) ao longo do volume.
+    """
+    scenarios = list(scenarios)
+    pricings = [scenario.pricing() for scenario in scenarios]
+
+    def column(name):
+        return np.array([float(getattr(s, name)) for s in scenarios])
+
+    inputs = {
+        name: column(name)
+        for name in (
+            "total_leads",
+            "response",
+            "qualification",
+            "booking",
+            "minimum_billing",
+            "ticket_medio",
+            "taxa_conversao_vendas",
+            "comissao_vendas",
+        )
+    }
+    params = [
+        inputs[name]
+        for name in ("minimum_billing", "ticket_medio", "taxa_conversao_vendas", "comissao_vendas")
+    ]
+    rates = [inputs[name] for name in ("response", "qualification", "booking")]
+
+    # Volume de cada cenário e, na mesma chamada, a varredura (coluna 0 = target)
+    leads = inputs["total_leads"][:, None]
+    if lead_volumes is not None:
+        leads = np.concatenate(
+            [leads, np.broadcast_to(lead_volumes, (len(scenarios), len(lead_volumes)))],
+            axis=1,
+        )
+    evaluated = evaluate_pricings(
+        pricings,
+        leads,
+        *(rate[:, None] for rate in rates),
+        *(param[:, None] for param in params),
+        paired=True,
+    )
+    costs = evaluated["total_cost"]
+
+    num_replies, _, num_qualified, num_booked = funnel_volumes(
+        inputs["total_leads"], *rates
+    )
+    num_vendas = num_booked * inputs["taxa_conversao_vendas"]
+    total_cost = costs[:, 0]
+    receita_mensal = num_vendas * inputs["ticket_medio"]
+    receita_ltv = receita_mensal * column("ltv_dias") / 30
+
+    def per(num, den):
+        return np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+
+    results = {
+        **inputs,
+        "num_replies": num_replies,
+        "num_qualified": num_qualified,
+        "num_booked": num_booked,
+        "num_vendas": num_vendas,
+        "total_cost": total_cost,
+        "cpa": per(total_cost, num_booked),
+        "custo_por_venda": per(total_cost, num_vendas),
+        "receita_mensal": receita_mensal,
+        "receita_ltv": receita_ltv,
+        "roi_ltv": per((receita_ltv - total_cost) * 100, total_cost),
+    }
+    if lead_volumes is not None:
+        results["sweep_cost"] = costs[:, 1:]
+        results["sweep_cpa"] = evaluated["cpa"][:, 1:]
+    return results
@@ -0,0 +1,490 @@
+"""
+Tabelas de preços escalonadas compiladas em arrays NumPy.
+
+Cada tabela editada na interface ('Mínimo', 'Máximo', 'Valor') é compilada uma
+única vez em arrays ordenados, que permitem calcular custo e custo marginal para
+qualquer quantidade de itens (escalar ou array) sem loops em Python.
+
+Modos de cobrança:
+
+- `graduated` (escalonado): cada item paga o preço da faixa em que cai;
+- `all_units` (volume): todos os itens pagam o preço da faixa atingida pela
+  quantidade total. O custo salta nos pontos de quebra (ex.: 300 leads a
+  5,00 = 1.500; 301 leads a 4,00 = 1.204).
+
+Qualquer modo aceita teto (`cap`) e piso (`floor`) do custo da etapa.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+STAGES = ("leads", "qualified", "booked")
+PRICING_MODES = ("graduated", "all_units")
+
+
+def tiered_cost(quantity, mins, maxs, prices):
+    """
+    Custo escalonado com faixas na última dimensão de `mins`/`maxs`/`prices`.
+
+    Aceita lotes de tabelas: com `prices` de shape (K, 1, T) e `quantity` de
+    shape (P,), o resultado tem shape (K, P).
+    """
+    q = np.asarray(quantity, dtype=float)[..., None]
+    in_tier = q > mins
+    units = np.minimum(q, maxs) - mins
+    # np.where (e não units @ prices) para ignorar faixas não atingidas,
+    # mesmo que o preço delas seja NaN (linha nova no data_editor)
+    return np.where(in_tier, units * prices, 0.0).sum(axis=-1)
+
+
+def tiered_marginal(quantity, mins, maxs, prices):
+    """Preço da faixa ativa em `quantity`; mesmas regras de shape de `tiered_cost`."""
+    q = np.asarray(quantity, dtype=float)[..., None]
+    active = (q >= mins) & (q < maxs)
+    return np.where(active, prices, 0.0).sum(axis=-1)
+
+
+def all_units_cost(quantity, mins, maxs, prices):
+    """
+    Custo por volume: `quantity` × preço da faixa que contém o último item.
+
+    O último item de `quantity` está na faixa com mín < quantity <= máx, então
+    o preço só muda depois do ponto de quebra (300 itens ainda pagam a faixa
+    0-300). Mesmas regras de shape de `tiered_cost`.
+    """
+    q = np.asarray(quantity, dtype=float)
+    reached = (q[..., None] > mins) & (q[..., None] <= maxs)
+    return q * np.where(reached, prices, 0.0).sum(axis=-1)
+
+
+def _raw_costs(quantity, mins, maxs, prices, all_units):
+    """Custo sem teto/piso em `quantity` e o limite à direita (após um salto)."""
+    graduated = tiered_cost(quantity, mins, maxs, prices)
+    if not np.any(all_units):
+        return graduated, graduated
+    q = np.asarray(quantity, dtype=float)
+    volume = all_units_cost(q, mins, maxs, prices)
+    volume_right = q * tiered_marginal(q, mins, maxs, prices)
+    return (
+        np.where(all_units, volume, graduated),
+        np.where(all_units, volume_right, graduated),
+    )
+
+
+def _has_limits(cap, floor):
+    return not (np.ndim(cap) == 0 and np.ndim(floor) == 0 and cap == np.inf and floor == 0)
+
+
+def _limited(cost, cap, floor):
+    """Aplica teto e piso; sem limites (o caso comum) devolve `cost` sem passar pelos dados."""
+    if not _has_limits(cap, floor):
+        return cost
+    return np.minimum(np.maximum(cost, floor), cap)
+
+
+def schedule_cost(quantity, mins, maxs, prices, all_units=False, cap=np.inf, floor=0.0):
+    """
+    Custo em qualquer modo de cobrança, com teto e piso.
+
+    `all_units`, `cap` e `floor` são escalares ou arrays com o shape do
+    resultado (sem a dimensão das faixas), para avaliar lotes de tabelas com
+    modos diferentes numa única chamada.
+    """
+    raw, _ = _raw_costs(quantity, mins, maxs, prices, all_units)
+    return _limited(raw, cap, floor)
+
+
+def schedule_marginal(
+    quantity, mins, maxs, prices, all_units=False, cap=np.inf, floor=0.0
+):
+    """
+    Derivada à direita do custo em `quantity`.
+
+    Nos dois modos é o preço da faixa ativa (mín <= quantidade < máx): no modo
+    volume, d(q × preço)/dq = preço dentro da faixa. O salto nos pontos de
+    quebra não é uma derivada e fica em `schedule_jump`. Onde o teto ou o piso
+    está ativo, a derivada é zero.
+    """
+    price = tiered_marginal(quantity, mins, maxs, prices)
+    if not _has_limits(cap, floor):
+        return price
+    _, raw_right = _raw_costs(quantity, mins, maxs, prices, all_units)
+    clipped = (raw_right >= cap) | (raw_right < floor)
+    return np.where(clipped, 0.0, price)
+
+
+def schedule_jump(quantity, mins, maxs, prices, all_units=False, cap=np.inf, floor=0.0):
+    """
+    Salto do custo logo após `quantity`: C(quantidade⁺) − C(quantidade).
+
+    Diferente de zero só nos pontos de quebra do modo volume (negativo quando o
+    preço cai), já limitado pelo teto e pelo piso.
+    """
+    raw, raw_right = _raw_costs(quantity, mins, maxs, prices, all_units)
+    return _limited(raw_right, cap, floor) - _limited(raw, cap, floor)
+
+
+@dataclass(frozen=True, eq=False)
+class TierSchedule:
+    """
+    Tabela de preços escalonada compilada.
+
+    No modo `graduated` (padrão) cada item é cobrado pelo preço da faixa em que
+    cai, como no loop original de `calculate_tiered_cost`; no modo `all_units`
+    todos os itens pagam o preço da faixa atingida. O custo final fica entre
+    `floor` e `cap`. As faixas ficam ordenadas por 'Mínimo'.
+    """
+
+    mins: np.ndarray
+    maxs: np.ndarray
+    prices: np.ndarray
+    mode: str = "graduated"
+    cap: float = np.inf
+    floor: float = 0.0
+
+    @property
+    def num_tiers(self):
+        return len(self.prices)
+
+    @property
+    def all_units(self):
+        return self.mode == "all_units"
+
+    @cached_property
+    def fingerprint(self):
+        """Hash estável do conteúdo da tabela (útil como chave de cache)."""
+        digest = hashlib.sha1()
+        for arr in (self.mins, self.maxs, self.prices, [self.cap, self.floor]):
+            digest.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+        digest.update(self.mode.encode())
+        return digest.hexdigest()[:16]
+
+    def validate(self):
+        """
+        Confere a tabela: ao menos uma faixa, mínimos e preços não negativos,
+        máximo acima do mínimo, faixas sem sobreposição e piso até o teto.
+        """
+        if self.num_tiers == 0:
+            raise ValueError("Tabela sem faixas")
+        if not np.all(np.isfinite(self.prices)) or np.any(self.prices < 0):
+            raise ValueError("Preços devem ser números não negativos")
+        if not np.all(np.isfinite(self.mins)) or np.any(self.mins < 0):
+            raise ValueError("Mínimos devem ser números não negativos")
+        empty = np.flatnonzero(~(self.maxs > self.mins))
+        if empty.size:
+            raise ValueError(f"Faixa {empty[0]}: o máximo deve ser maior que o mínimo")
+        overlap = np.flatnonzero(self.mins[1:] < self.maxs[:-1])
+        if overlap.size:
+            raise ValueError(f"Faixas {overlap[0]} e {overlap[0] + 1} se sobrepõem")
+        if self.floor > self.cap:
+            raise ValueError(f"Piso {self.floor:g} acima do teto {self.cap:g}")
+        return self
+
+    @property
+    def breakpoints(self):
+        """Quantidades em que o preço muda (início/fim de faixa), ordenadas."""
+        points = np.concatenate([self.mins, self.maxs])
+        return np.unique(points[np.isfinite(points) & (points > 0)])
+
+    @cached_property
+    def _pieces(self):
+        """
+        Pontos de quebra com o custo, a inclinação e o preço por volume de cada
+        trecho: o custo é linear entre dois pontos consecutivos.
+        """
+        finite_maxs = self.maxs[np.isfinite(self.maxs)]
+        points = np.unique(np.concatenate([[0.0], self.mins, finite_maxs]))
+        # Preço por volume vale em (ponto, próximo ponto]: avaliado no fim do trecho
+        ends = np.append(points[1:], points[-1] + 1.0)
+        reached = (ends[:, None] > self.mins) & (ends[:, None] <= self.maxs)
+        return (
+            points,
+            tiered_cost(points, self.mins, self.maxs, self.prices),
+            tiered_marginal(points, self.mins, self.maxs, self.prices),
+            np.where(reached, self.prices, 0.0).sum(axis=-1),
+        )
+
+    def cost_at(self, quantity):
+        """
+        Mesmo custo de `cost`, por busca binária nos pontos de quebra: O(log
+        faixas) por quantidade, para reprecificar um período por vez.
+        """
+        q = np.asarray(quantity, dtype=float)
+        points, costs, slopes, unit_prices = self._pieces
+        if self.all_units:
+            k = np.maximum(np.searchsorted(points, q, side="left") - 1, 0)
+            raw = q * unit_prices[k]
+        else:
+            k = np.maximum(np.searchsorted(points, q, side="right") - 1, 0)
+            raw = costs[k] + (q - points[k]) * slopes[k]
+        return _limited(raw, self.cap, self.floor)
+
+    def cost_crossings(self, level):
+        """Quantidades em que o custo sem teto/piso cruza `level` dentro de um trecho."""
+        points, costs, slopes, unit_prices = self._pieces
+        ends = np.append(points[1:], np.inf)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.all_units:
+                crossing = level / unit_prices
+            else:
+                crossing = points + (level - costs) / slopes
+        return np.unique(crossing[(crossing > points) & (crossing < ends)])
+
+    @property
+    def cost_breakpoints(self):
+        """
+        Pontos de quebra e quantidades em que o teto ou o piso passa a valer:
+        o custo da etapa é linear entre dois pontos consecutivos.
+        """
+        points = [self.breakpoints]
+        if np.isfinite(self.cap):
+            points.append(self.cost_crossings(self.cap))
+        if self.floor > 0:
+            points.append(self.cost_crossings(self.floor))
+        return np.unique(np.concatenate(points))
+
+    def units_in_tiers(self, quantity):
+        """Quantidade de itens em cada faixa; shape (..., num_tiers)."""
+        q = np.asarray(quantity, dtype=float)[..., None]
+        return np.where(q > self.mins, np.minimum(q, self.maxs) - self.mins, 0.0)
+
+    def price_coefficients(self, quantity):
+        """
+        d(custo sem teto/piso)/d(preço de cada faixa); shape (..., num_tiers).
+
+        O custo é linear nos preços: no modo escalonado o coeficiente é o número
+        de itens na faixa; no modo volume, a quantidade inteira na faixa atingida.
+        """
+        if not self.all_units:
+            return self.units_in_tiers(quantity)
+        q = np.asarray(quantity, dtype=float)[..., None]
+        return np.where((q > self.mins) & (q <= self.maxs), q, 0.0)
+
+    @property
+    def boundaries(self):
+        """Índices `i` em que o máximo da faixa i é o mínimo da faixa i + 1."""
+        return np.flatnonzero(self.maxs[:-1] == self.mins[1:])
+
+    def _check_boundary(self, boundary, value=None):
+        if boundary not in self.boundaries:
+            raise ValueError(f"Faixas {boundary} e {boundary + 1} não são contíguas")
+        if value is not None and not (
+            self.mins[boundary] < value < self.maxs[boundary + 1]
+        ):
+            raise ValueError(
+                f"Ponto de quebra {value:g} fora de ({self.mins[boundary]:g}, "
+                f"{self.maxs[boundary + 1]:g})"
+            )
+
+    def boundary_coefficient(self, quantity, boundary):
+        """
+        d(custo sem teto/piso)/d(ponto de quebra entre as faixas `boundary` e
+        `boundary + 1`), à direita: os itens acima do ponto passam a pagar o
+        preço da faixa de baixo. No modo volume o custo só salta (derivada zero);
+        o efeito de mover o ponto fica em `boundary_shift`.
+        """
+        self._check_boundary(boundary)
+        q = np.asarray(quantity, dtype=float)
+        if self.all_units:
+            return np.zeros(q.shape)
+        step = self.prices[boundary] - self.prices[boundary + 1]
+        return np.where(q > self.maxs[boundary], step, 0.0)
+
+    def boundary_shift(self, quantity, boundary, value):
+        """
+        Variação exata do custo sem teto/piso ao mover o ponto de quebra entre
+        as faixas `boundary` e `boundary + 1` para `value`.
+        """
+        self._check_boundary(boundary, value)
+        q = np.asarray(quantity, dtype=float)
+        point = self.maxs[boundary]
+        low, high = min(point, value), max(point, value)
+        # Itens entre o ponto antigo e o novo trocam de faixa
+        step = (self.prices[boundary] - self.prices[boundary + 1]) * np.sign(value - point)
+        if self.all_units:
+            return np.where((q > low) & (q <= high), step * q, 0.0)
+        return step * (np.clip(q, low, high) - low)
+
+    def raw_cost(self, quantity):
+        """Custo sem teto e piso (linear nos preços das faixas)."""
+        return schedule_cost(
+            quantity, self.mins, self.maxs, self.prices, self.all_units
+        )
+
+    def cost(self, quantity):
+        """Custo total da etapa para `quantity` (escalar ou array)."""
+        return schedule_cost(
+            quantity,
+            self.mins,
+            self.maxs,
+            self.prices,
+            self.all_units,
+            self.cap,
+            self.floor,
+        )
+
+    def marginal(self, quantity):
+        """
+        Custo marginal exato: preço do próximo item a partir de `quantity`.
+
+        Como o preço é constante por faixa, a derivada do custo é o preço da
+        faixa ativa (derivada à direita nos pontos de quebra), ou zero com o
+        teto/piso ativo. No modo volume os saltos ficam em `jump`.
+        """
+        return schedule_marginal(
+            quantity,
+            self.mins,
+            self.maxs,
+            self.prices,
+            self.all_units,
+            self.cap,
+            self.floor,
+        )
+
+    def jump(self, quantity):
+        """Salto do custo logo após `quantity` (só nos pontos de quebra do modo volume)."""
+        return schedule_jump(
+            quantity,
+            self.mins,
+            self.maxs,
+            self.prices,
+            self.all_units,
+            self.cap,
+            self.floor,
+        )
+
+    def increment(self, quantity, step=1.0):
+        """Custo exato de `step` itens a mais, incluindo saltos no caminho."""
+        q = np.asarray(quantity, dtype=float)
+        return self.cost(q + step) - self.cost(q)
+
+    def average(self, quantity):
+        """Custo médio por item (0 quando a quantidade é 0)."""
+        q = np.asarray(quantity, dtype=float)
+        cost = self.cost(q)
+        return np.divide(cost, q, out=np.zeros_like(cost), where=q > 0)
+
+
+@dataclass(frozen=True, eq=False)
+class ScheduleBatch:
+    """
+    Lote de tabelas avaliadas juntas, no lugar de uma `TierSchedule`.
+
+    `mins`, `maxs` e `prices` têm shape (..., faixas) e `all_units`, `cap` e
+    `floor` o shape do lote; `cost` e `marginal` seguem as regras de shape de
+    `tiered_cost` (ex.: tabelas (K, 1, T) e quantidades (P,) -> (K, P)).
+    """
+
+    mins: np.ndarray
+    maxs: np.ndarray
+    prices: np.ndarray
+    all_units: object = False
+    cap: object = np.inf
+    floor: object = 0.0
+
+    def cost(self, quantity):
+        return schedule_cost(
+            quantity, self.mins, self.maxs, self.prices, self.all_units, self.cap, self.floor
+        )
+
+    def marginal(self, quantity):
+        return schedule_marginal(
+            quantity, self.mins, self.maxs, self.prices, self.all_units, self.cap, self.floor
+        )
+
+
+def compile_schedule(tiers_df, mode="graduated", cap=None, floor=None):
+    """
+    Compila uma tabela com as colunas 'Mínimo', 'Máximo', 'Valor'.
+
+    Linhas sem 'Mínimo' são ignoradas e 'Máximo' vazio vira faixa aberta,
+    reproduzindo o comportamento do cálculo linha a linha. `mode` é um de
+    `PRICING_MODES`; `cap`/`floor` vazios (None ou 0) desligam teto e piso.
+    """
+    if mode not in PRICING_MODES:
+        raise ValueError(f"Modo de cobrança desconhecido: {mode!r}")
+    df = tiers_df[["Mínimo", "Máximo", "Valor"]].astype(float)
+    df = df[df["Mínimo"].notna()].sort_values(by="Mínimo", kind="stable")
+    return TierSchedule(
+        mins=df["Mínimo"].to_numpy(copy=True),
+        maxs=df["Máximo"].fillna(np.inf).to_numpy(copy=True),
+        prices=df["Valor"].to_numpy(copy=True),
+        mode=mode,
+        cap=float(cap) if cap else np.inf,
+        floor=float(floor) if floor else 0.0,
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledPricing:
+    """Conjunto das quatro tabelas de preços do simulador, já compiladas."""
+
+    no_reply_price: float
+    leads: TierSchedule
+    qualified: TierSchedule
+    booked: TierSchedule
+
+    @cached_property
+    def fingerprint(self):
+        return hashlib.sha1(
+            "|".join(
+                [
+                    repr(float(self.no_reply_price)),
+                    self.leads.fingerprint,
+                    self.qualified.fingerprint,
+                    self.booked.fingerprint,
+                ]
+            ).encode()
+        ).hexdigest()[:16]
+
+
+def compile_pricing(pricing_tables):
+    """
+    Compila o dicionário `pricing_tables` usado por `run_simulation`.
+
+    A chave opcional "rules" mapeia etapa -> argumentos de `compile_schedule`
+    (ex.: {"leads": {"mode": "all_units", "cap": 5000}}).
+    """
+    if isinstance(pricing_tables, CompiledPricing):
+        return pricing_tables
+    rules = pricing_tables.get("rules") or {}
+    return CompiledPricing(
+        no_reply_price=float(pricing_tables["no_reply"].iloc[0]["Valor"]),
+        leads=compile_schedule(pricing_tables["leads"], **rules.get("leads", {})),
+        qualified=compile_schedule(
+            pricing_tables["qualified"], **rules.get("qualified", {})
+        ),
+        booked=compile_schedule(pricing_tables["booked"], **rules.get("booked", {})),
+    )
+
+
+def calculate_tiered_cost(quantity, tiers_df, mode="graduated", cap=None, floor=None):
+    """
+    Calcula o custo total com base em uma tabela de preços escalonada (por faixas).
+    A tabela deve ter as colunas 'Mínimo', 'Máximo', 'Valor'.
+    """
+    if quantity == 0 and not floor:
+        return 0
+    return float(compile_schedule(tiers_df, mode, cap, floor).cost(quantity))
+
+
+def schedule_to_frame(mins, maxs, prices):
+    """
+    Monta a tabela 'Mínimo'/'Máximo'/'Valor' no formato dos editores do app.
+
+    Faixa aberta (máximo infinito) fica com 'Máximo' vazio (inteiro anulável).
+    """
+    # Import local: `import pricing` não deve carregar o pandas
+    import pandas as pd
+
+    maxs = np.asarray(maxs, dtype=float)
+    return pd.DataFrame(
+        {
+            "Mínimo": np.asarray(mins).astype(int),
+            "Máximo": pd.array(np.where(np.isinf(maxs), np.nan, maxs), dtype="Int64"),
+            "Valor": np.round(np.asarray(prices, dtype=float), 2),
+        }
+    )
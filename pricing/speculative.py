@@ -0,0 +1,185 @@
+"""
+Pré-cálculo especulativo das posições vizinhas dos sliders.
+
+Os sliders andam em passos discretos (100 leads, 0,5 p.p. nas taxas). Depois
+de cada execução, as simulações pedidas pela página são repetidas em segundo
+plano para os próximos passos dos sliders tocados por último e guardadas no
+`ResultCache` da sessão. Se o usuário continuar arrastando na mesma direção, a
+próxima execução encontra tudo no cache.
+
+O trabalho em segundo plano tem orçamento de CPU por rodada e é cancelado
+assim que uma nova execução começa.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from pricing.cache import normalize_inputs, simulation_key
+from pricing.engine import simulate_batch
+from pricing.plan import plan_for
+
+# Eixos das entradas de `simulate_batch`: (total_leads, response, qualification, booking)
+AXIS_NAMES = ("total_leads", "response", "qualification", "booking")
+
+
+def track_sliders(history, values):
+    """
+    Atualiza o histórico de sliders com os valores desta execução.
+
+    `history` guarda os últimos valores e a lista de eixos tocados, do mais
+    recente para o mais antigo, com a direção do último movimento.
+    """
+    previous = history.get("values")
+    recent = history.setdefault("recent", [])
+    if previous is not None:
+        for axis, value in values.items():
+            delta = value - previous.get(axis, value)
+            if abs(delta) > 1e-12:
+                recent[:] = [r for r in recent if r[0] != axis]
+                recent.insert(0, (axis, 1 if delta > 0 else -1))
+    history["values"] = dict(values)
+    return recent
+
+
+def neighbor_moves(recent, steps, bounds, values, depth=2):
+    """
+    Deslocamentos (eixo, delta) a pré-calcular, em ordem de prioridade.
+
+    Para o slider tocado por último: `depth` passos na direção do movimento e
+    um passo no sentido contrário; para os demais, um passo para cada lado.
+    """
+    moves = []
+    for rank, (axis, direction) in enumerate(recent):
+        if rank == 0:
+            offsets = [direction * k for k in range(1, depth + 1)] + [-direction]
+        else:
+            offsets = [direction, -direction]
+        low, high = bounds[axis]
+        for offset in offsets:
+            delta = offset * steps[axis]
+            if low - 1e-12 <= values[axis] + delta <= high + 1e-12:
+                moves.append((axis, delta))
+    return moves
+
+
+def shift_inputs(inputs, axis_index, delta):
+    """
+    Entradas de uma chamada com o slider do eixo deslocado em `delta`.
+
+    Só entradas escalares acompanham o slider (target e variações ±p.p. em
+    torno dele); grades e faixas de volume são fixas e não mudam. Retorna None
+    se a chamada não depende do eixo.
+    """
+    if inputs[axis_index].ndim != 0:
+        return None
+    shifted = list(inputs)
+    shifted[axis_index] = inputs[axis_index] + delta
+    return normalize_inputs(shifted)
+
+
+class Prefetcher:
+    """
+    Thread em segundo plano que preenche o `ResultCache` com cenários vizinhos.
+
+    `schedule(tarefas)` substitui as tarefas pendentes (cancelando a rodada
+    anterior) e `cancel()` interrompe a rodada atual entre uma tarefa e outra.
+    Cada rodada para ao atingir `cpu_budget` segundos de CPU da thread.
+    """
+
+    def __init__(self, cache, cpu_budget=0.5):
+        self.cache = cache
+        self.cpu_budget = cpu_budget
+        self.computed = 0
+        self.cancelled = 0
+        self._generation = 0
+        self._jobs = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            self.cancelled += len(self._jobs)
+            self._jobs = []
+
+    def schedule(self, jobs):
+        """Agenda `jobs`: (chave, args, kwargs) de `simulate_batch`, por prioridade."""
+        with self._lock:
+            self._generation += 1
+            self._jobs = [job for job in jobs if job[0] not in self.cache]
+            if self._jobs and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="prefetcher", daemon=True
+                )
+                self._thread.start()
+
+    def _next_job(self, generation):
+        with self._lock:
+            if generation != self._generation or not self._jobs:
+                return None
+            return self._jobs.pop(0)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                generation = self._generation
+                if not self._jobs:
+                    self._thread = None
+                    return
+            start_cpu = time.thread_time()
+            while True:
+                job = self._next_job(generation)
+                if job is None:
+                    break
+                key, args, kwargs = job
+                if key not in self.cache:
+                    try:
+                        self.cache.put(key, simulate_batch(*args, **kwargs))
+                        self.computed += 1
+                    except Exception:
+                        # Especulação nunca derruba a sessão: a execução real recalcula
+                        continue
+                if time.thread_time() - start_cpu > self.cpu_budget:
+                    # Orçamento da rodada esgotado: descarta o restante
+                    with self._lock:
+                        if generation == self._generation:
+                            self.cancelled += len(self._jobs)
+                            self._jobs = []
+                    break
+
+    def wait(self, timeout=None):
+        """Espera a rodada atual terminar (útil em testes e benchmarks)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+def speculative_jobs(calls, moves, pricing, params):
+    """
+    Tarefas de pré-cálculo: cada chamada registrada, deslocada por cada movimento.
+
+    `calls` são as chamadas da execução atual como (entradas normalizadas,
+    with_gradients); `params` são os argumentos restantes de `simulate_batch`.
+    """
+    jobs = []
+    seen = set()
+    fingerprint = plan_for(pricing).fingerprint
+    for axis, delta in moves:
+        axis_index = AXIS_NAMES.index(axis)
+        for inputs, with_gradients in calls:
+            shifted = shift_inputs(inputs, axis_index, delta)
+            # Taxas ficam entre 0 e 1; volumes, só não negativos
+            if shifted is None or np.any(shifted[axis_index] < 0):
+                continue
+            if axis_index > 0 and np.any(shifted[axis_index] > 1):
+                continue
+            key = simulation_key(fingerprint, shifted, params, with_gradients)
+            if key in seen:
+                continue
+            seen.add(key)
+            jobs.append(
+                (key, (*shifted, pricing, *params), {"with_gradients": with_gradients})
+            )
+    return jobs
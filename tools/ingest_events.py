@@ -0,0 +1,91 @@
+"""
+Leitura de exportações de eventos de leads e vazão da ingestão (linhas/s).
+
+Lê uma exportação de eventos (CSV ou Parquet) em blocos com
+`pricing.ingest.ingest_events` e imprime as taxas do funil por mês e
+segmento, as taxas calibradas do período e a vazão. Com `--generate N`,
+primeiro grava uma exportação sintética com N disparos seguindo as taxas do
+POC (59,4% resposta, 22,6% qualificação, 33,3% agendamento).
+
+Uso:
+    python tools/ingest_events.py eventos.csv [--chunk-rows 500000]
+                                  [--engine auto|pyarrow|pandas]
+    python tools/ingest_events.py /tmp/eventos.csv --generate 2000000
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pricing.ingest import CHUNK_ROWS, ingest_events  # noqa: E402
+
+# Taxas do POC (716 disparos) usadas na exportação sintética
+POC_RATES = {"reply": 0.594, "qualified": 0.226, "booked": 0.333, "sold": 0.166}
+SEGMENTS = ("SMB", "Mid-Market")
+
+
+def generate_events(path, sends, months=12, seed=0):
+    """Grava uma exportação sintética com `sends` disparos e os eventos seguintes."""
+    rng = np.random.default_rng(seed)
+    lead = np.arange(sends)
+    start = np.datetime64("2025-01-01")
+    day = start + rng.integers(0, months * 30, sends).astype("timedelta64[D]")
+    segment = np.asarray(SEGMENTS)[rng.integers(0, len(SEGMENTS), sends)]
+    frames = [
+        pd.DataFrame({"lead_id": lead, "event": "send", "timestamp": day, "segment": segment})
+    ]
+    alive = np.ones(sends, dtype=bool)
+    for event, rate in POC_RATES.items():
+        alive &= rng.random(sends) < rate
+        day = day + rng.integers(0, 3, sends).astype("timedelta64[D]")
+        frames.append(
+            pd.DataFrame(
+                {
+                    "lead_id": lead[alive],
+                    "event": event,
+                    "timestamp": day[alive],
+                    "segment": segment[alive],
+                }
+            )
+        )
+    events = pd.concat(frames, ignore_index=True)
+    events.to_csv(path, index=False)
+    return len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--engine", default="auto", choices=("auto", "pyarrow", "pandas"))
+    parser.add_argument("--generate", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    if args.generate:
+        rows = generate_events(args.path, args.generate)
+        size_mb = os.path.getsize(args.path) / 1e6
+        print(f"Exportação sintética: {rows:,} eventos ({size_mb:.0f} MB) em {args.path}")
+
+    result = ingest_events(args.path, chunk_rows=args.chunk_rows, engine=args.engine)
+    with pd.option_context("display.width", 120, "display.max_rows", 200):
+        print(result.funnel().round(3).to_string(index=False))
+    rates = result.calibrated_rates()
+    print(
+        f"\nCalibrado: {rates['sends']:,} disparos | resposta {rates['response']:.1%} | "
+        f"qualificação {rates['qualification']:.1%} | agendamento {rates['booking']:.1%} | "
+        f"vendas {rates['sales']:.1%}"
+    )
+    print(
+        f"{result.rows:,} linhas em {result.chunks} blocos ({result.skipped:,} descartadas) | "
+        f"{result.seconds:.2f} s | {result.rows_per_second:,.0f} linhas/s ({result.engine})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Teste de carga com várias sessões simultâneas do app.
+
+Sobe um servidor `streamlit run` local e conecta N clientes websocket ao mesmo
+processo, como N prospects abrindo a demo ao mesmo tempo. Cada cliente
+reproduz uma sequência realista de interações (arrastar sliders passo a passo
+e editar uma tabela de preços), enviando o estado dos widgets como o navegador
+envia. Para cada nível de concorrência são relatados os percentis de latência
+por rerun (envio do estado até o fim do script), o tempo de CPU e o crescimento
+de memória residente (RSS) do servidor por sessão, e o maior nível que cabe no
+orçamento de p95 (teto de concorrência).
+
+CPU e RSS são lidos de /proc (Linux); em outros sistemas aparecem como n/d.
+
+Uso:
+    python tools/load_test.py [--app app.py] [--sessions 1,2,4,8] [--repeat 1]
+                              [--think-ms 0] [--p95-budget-ms 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LEADS_SLIDER = "Quantidade de Leads a serem processados"
+RESPONSE_SLIDER = "Taxa de Resposta (%)"
+QUALIFICATION_SLIDER = "Taxa de Qualificação (% de Respostas)"
+BOOKING_SLIDER = "Taxa de Avanço/Agendamento (%)"
+
+# Sequência de interações de uma demo. Sliders: (rótulo, passo, quantidade de
+# passos), com um rerun por passo, como ao arrastar no navegador. Tabelas:
+# (chave do editor, linhas editadas no formato do `st.data_editor`).
+SCENARIO = [
+    ("slider", LEADS_SLIDER, 100, 5),
+    ("slider", RESPONSE_SLIDER, 0.5, 4),
+    ("slider", QUALIFICATION_SLIDER, -0.5, 3),
+    ("table", "leads_editor", {"0": {"Valor": 4.50}}),
+    ("slider", BOOKING_SLIDER, 0.5, 3),
+    ("table", "leads_editor", {"0": {"Valor": 4.50}, "3": {"Valor": 2.25}}),
+]
+
+
+class Session:
+    """Cliente websocket que se comporta como uma aba do navegador."""
+
+    def __init__(self, url, seed):
+        self.url = url
+        self.rng = random.Random(seed)
+        self.sliders = {}  # rótulo -> [id, valor, mínimo, máximo]
+        self.editors = {}  # chave -> id
+        self.states = {}  # id -> (tipo, valor) enviados a cada rerun
+        self.errors = 0
+
+    async def rerun(self, ws):
+        """Envia o estado dos widgets e espera o fim do script; retorna a latência (s)."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for widget_id, (kind, value) in self.states.items():
+            widget = msg.rerun_script.widget_states.widgets.add()
+            widget.id = widget_id
+            if kind == "double_array":
+                widget.double_array_value.data[:] = value
+            else:
+                widget.string_value = value
+        start = time.perf_counter()
+        await ws.send(msg.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await ws.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                return time.perf_counter() - start
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._track(forward.delta.new_element)
+
+    def _track(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "slider":
+            slider = element.slider
+            current = self.sliders.get(slider.label)
+            value = current[1] if current else slider.default[0]
+            self.sliders[slider.label] = [slider.id, value, slider.min, slider.max]
+        elif kind == "dataframe" and element.dataframe.id:
+            key = element.dataframe.id.rsplit("-", 1)[-1]
+            self.editors[key] = element.dataframe.id
+        elif kind == "exception":
+            self.errors += 1
+
+    def set_slider(self, label, value):
+        slider = self.sliders[label]
+        slider[1] = min(max(value, slider[2]), slider[3])
+        self.states[slider[0]] = ("double_array", [slider[1]])
+
+    def edit_table(self, key, edited_rows):
+        state = {"edited_rows": edited_rows, "added_rows": [], "deleted_rows": []}
+        self.states[self.editors[key]] = ("string", json.dumps(state))
+
+    async def play(self, repeat, think, ready, release):
+        """Abre a sessão, reproduz o cenário `repeat` vezes e espera as demais."""
+        async with websockets.connect(self.url, max_size=None) as ws:
+            first_run = await self.rerun(ws)
+            # Sessões partem de pontos diferentes para não repetirem o mesmo cenário
+            self.set_slider(LEADS_SLIDER, self.rng.randrange(500, 4000, 100))
+            self.set_slider(RESPONSE_SLIDER, self.rng.randrange(60, 140) / 2)
+            latencies = []
+            for _ in range(repeat):
+                for step in SCENARIO:
+                    if step[0] == "slider":
+                        _, label, delta, count = step
+                        for _ in range(count):
+                            self.set_slider(label, self.sliders[label][1] + delta)
+                            latencies.append(await self.rerun(ws))
+                            await asyncio.sleep(think)
+                    else:
+                        self.edit_table(step[1], step[2])
+                        latencies.append(await self.rerun(ws))
+                        await asyncio.sleep(think)
+            # Mantém a conexão aberta até todas terminarem, para medir o RSS
+            ready.release()
+            await release.wait()
+        return {"first_run": first_run, "latencies": latencies, "errors": self.errors}
+
+
+def server_cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        return None
+
+
+def server_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return None
+
+
+def start_server(app_path):
+    """Sobe `streamlit run` numa porta livre e espera o health check."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", app_path,
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server, f"ws://127.0.0.1:{port}/_stcore/stream"
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("O servidor Streamlit não respondeu ao health check")
+
+
+async def run_level(url, pid, sessions, repeat, think):
+    """Roda `sessions` sessões simultâneas e agrega as medições."""
+    ready = asyncio.Semaphore(0)
+    release = asyncio.Event()
+    rss_before = server_rss_mb(pid)
+    cpu_before = server_cpu_seconds(pid)
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(Session(url, seed).play(repeat, think, ready, release))
+        for seed in range(sessions)
+    ]
+    for _ in range(sessions):
+        await ready.acquire()
+    elapsed = time.perf_counter() - start
+    rss_after = server_rss_mb(pid)
+    cpu_after = server_cpu_seconds(pid)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    latencies = sorted(l for r in results for l in r["latencies"]) or [0.0]
+    return {
+        "sessions": sessions,
+        "throughput": len(latencies) / elapsed,
+        "first_run": statistics.median(r["first_run"] for r in results),
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1],
+        "cpu": None if cpu_before is None else (cpu_after - cpu_before) / sessions,
+        "rss": rss_after,
+        "rss_growth": None if rss_before is None else (rss_after - rss_before) / sessions,
+        "errors": sum(r["errors"] for r in results),
+    }
+
+
+def percentile(sorted_values, pct):
+    """Percentil por interpolação linear de uma lista já ordenada."""
+    pos = (len(sorted_values) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def _fmt(value, unit, width, digits=0):
+    if value is None:
+        return f"{'n/d':>{width}}"
+    return f"{value:>{width - len(unit)}.{digits}f}{unit}"
+
+
+async def main_async(args):
+    app_path = os.path.abspath(args.app)
+    levels = [int(n) for n in args.sessions.split(",")]
+    reruns = args.repeat * sum(s[3] if s[0] == "slider" else 1 for s in SCENARIO)
+    server, url = start_server(app_path)
+    try:
+        # Aquece o servidor (imports do app, Plotly) antes de medir
+        await run_level(url, server.pid, 1, 0, 0)
+        print(
+            f"{reruns} reruns por sessão | orçamento p95 {args.p95_budget_ms:.0f} ms | "
+            f"servidor pid {server.pid}"
+        )
+        print(
+            f"{'sessões':>7} {'reruns/s':>9} {'1ª exec':>8} {'p50':>7} {'p90':>7} "
+            f"{'p95':>7} {'p99':>7} {'máx':>7} {'CPU/sessão':>11} {'RSS':>8} "
+            f"{'ΔRSS/sessão':>12}"
+        )
+        ceiling = 0
+        for sessions in levels:
+            level = await run_level(
+                url, server.pid, sessions, args.repeat, args.think_ms / 1000
+            )
+            print(
+                f"{level['sessions']:>7} {level['throughput']:>9.2f} "
+                + _fmt(level["first_run"] * 1000, "ms", 8)
+                + " "
+                + " ".join(
+                    _fmt(level[key] * 1000, "ms", 7)
+                    for key in ("p50", "p90", "p95", "p99", "max")
+                )
+                + " "
+                + _fmt(level["cpu"], "s", 11, 2)
+                + " "
+                + _fmt(level["rss"], "MB", 8)
+                + " "
+                + _fmt(level["rss_growth"], "MB", 12, 1)
+                + (f"  ⚠️ {level['errors']} exceções" if level["errors"] else "")
+            )
+            if level["p95"] * 1000 <= args.p95_budget_ms:
+                ceiling = max(ceiling, sessions)
+    finally:
+        server.terminate()
+        server.wait()
+    return ceiling
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--sessions", default="1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--think-ms", type=float, default=0.0)
+    parser.add_argument("--p95-budget-ms", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    ceiling = asyncio.run(main_async(args))
+    if ceiling:
+        print(f"Teto de concorrência (p95 ≤ {args.p95_budget_ms:.0f} ms): {ceiling} sessões")
+    else:
+        print(f"❌ Nenhum nível de concorrência atende p95 ≤ {args.p95_budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
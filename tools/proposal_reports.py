@@ -0,0 +1,95 @@
+"""
+Geração em lote de propostas HTML estáticas e vazão (propostas/min).
+
+Lê os perfis de prospects (JSON no formato de `cenarios.json` ou CSV com as
+colunas de `Scenario`) e grava uma proposta por perfil com
+`pricing.reports.generate_reports`, num pool de processos. Com
+`--generate N`, primeiro grava N perfis sintéticos (volumes e taxas em torno
+do POC, com algumas variações das tabelas de preços).
+
+Uso:
+    python tools/proposal_reports.py prospects.csv [--out propostas]
+                                     [--workers 4] [--chunk-size 25]
+    python tools/proposal_reports.py /tmp/prospects.json --generate 500
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pricing.plan import default_plan  # noqa: E402
+from pricing.reports import CHUNK_SIZE, generate_reports, load_profiles  # noqa: E402
+from pricing.scenarios import Scenario, save_scenarios, tables_from_pricing  # noqa: E402
+
+# Descontos sobre as tabelas padrão nos perfis sintéticos (0 = tabelas padrão)
+DISCOUNTS = (0.0, 0.10, 0.20)
+
+
+def generate_profiles(path, count, seed=0):
+    """Grava `count` perfis sintéticos em `path` (JSON)."""
+    rng = np.random.default_rng(seed)
+    base = tables_from_pricing(default_plan().pricing())
+    variants = []
+    for discount in DISCOUNTS:
+        tables = {"no_reply": base["no_reply"]}
+        for stage in ("leads", "qualified", "booked"):
+            tiers = [
+                [low, high, round(price * (1 - discount), 2)]
+                for low, high, price in base[stage]["tiers"]
+            ]
+            tables[stage] = dict(base[stage], tiers=tiers)
+        variants.append(tables if discount else {})
+    profiles = {}
+    for i in range(count):
+        name = f"Prospect {i + 1:04d}"
+        profiles[name] = Scenario(
+            name=name,
+            total_leads=float(rng.integers(5, 200) * 100),
+            response=float(rng.uniform(0.3, 0.7)),
+            qualification=float(rng.uniform(0.1, 0.4)),
+            booking=float(rng.uniform(0.2, 0.5)),
+            minimum_billing=float(rng.choice([0.0, 5000.0, 10000.0])),
+            ticket_medio=float(rng.uniform(300, 900)),
+            ltv_dias=float(rng.integers(90, 365)),
+            taxa_conversao_vendas=float(rng.uniform(0.1, 0.3)),
+            comissao_vendas=float(rng.choice([0.0, 0.5])),
+            tables=variants[i % len(variants)],
+        )
+    save_scenarios(path, profiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--out", default="propostas")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--generate", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_profiles(args.path, args.generate)
+        print(f"{args.generate:,} perfis sintéticos em {args.path}")
+
+    profiles = load_profiles(args.path)
+    run = generate_reports(profiles, args.out, workers=args.workers, chunk_size=args.chunk_size)
+    size_mb = sum(os.path.getsize(path) for path in run.paths) / 1e6
+    print(
+        f"{len(run.paths):,} propostas em {args.out} "
+        f"({size_mb:.1f} MB + Plotly.js compartilhado) | "
+        f"{run.seconds:.2f} s com {run.workers} processo(s) | "
+        f"{run.reports_per_minute:,.0f} propostas/min"
+    )
+    print(
+        f"{run.pricing_groups} conjunto(s) de tabelas distintos | "
+        f"{run.compilations} compilação(ões) para {len(run.paths):,} perfis"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark de partida a frio do app.
+
+Mede, em processos Python novos:
+
+1. O tempo de import dos módulos carregados antes das primeiras métricas
+   (via `python -X importtime`), comparado com um orçamento em milissegundos.
+2. O tempo até a primeira pintura (`st.title`), até a primeira métrica da área
+   principal (`st.metric`) e o tempo total da primeira execução do script,
+   usando o `AppTest` do Streamlit.
+
+Uso:
+    python tools/startup_benchmark.py [--app app.py] [--runs 5] [--budget-ms 250]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que o app importa antes de exibir as primeiras métricas
+EARLY_IMPORTS = ["pricing"]
+# Módulos que não podem ser carregados por `EARLY_IMPORTS`
+DEFERRED_MODULES = [
+    "pandas",
+    "plotly",
+    "pricing.allocation",
+    "pricing.compare",
+    "pricing.explorer",
+    "pricing.fitting",
+    "pricing.ingest",
+    "pricing.pareto",
+    "pricing.rendering",
+    "pricing.reports",
+    "pricing.scenarios",
+]
+
+_CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+import streamlit
+
+marks = {}
+
+def mark(name, func):
+    def wrapper(*args, **kwargs):
+        marks.setdefault(name, time.perf_counter())
+        return func(*args, **kwargs)
+    return wrapper
+
+streamlit.title = mark("first_paint", streamlit.title)
+streamlit.metric = mark("first_metric", streamlit.metric)
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+end = time.perf_counter()
+print(json.dumps({
+    "first_paint": marks.get("first_paint", end) - start,
+    "first_metric": marks.get("first_metric", end) - start,
+    "total": end - start,
+    "error": bool(at.exception),
+}))
+"""
+
+
+def import_time_ms(modules, repeat=5):
+    """Menor tempo cumulativo (ms) de import de `modules` em `repeat` processos novos."""
+    code = "; ".join(f"import {m}" for m in modules)
+    timings = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        total_us = 0
+        for line in proc.stderr.splitlines():
+            match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$", line)
+            # Apenas módulos de nível superior (sem indentação) somam no total
+            if match:
+                total_us += int(match.group(1))
+        timings.append(total_us / 1000)
+    return min(timings)
+
+
+def loaded_modules(modules):
+    """Quais de `DEFERRED_MODULES` são carregados ao importar `modules`."""
+    code = (
+        "; ".join(f"import {m}" for m in modules)
+        + f"; import sys; print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return proc.stdout.strip()
+
+
+def cold_run(app_path):
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, app_path],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _stats(values):
+    return f"mediana {statistics.median(values):.0f} ms | mínimo {min(values):.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    early_ms = import_time_ms(EARLY_IMPORTS)
+    print(
+        f"Import de {', '.join(EARLY_IMPORTS)}: {early_ms:.1f} ms "
+        f"(orçamento {args.budget_ms:.0f} ms)"
+    )
+    print(f"Módulos adiados carregados cedo: {loaded_modules(EARLY_IMPORTS)}")
+
+    runs = [cold_run(os.path.abspath(args.app)) for _ in range(args.runs)]
+    if any(r["error"] for r in runs):
+        print("⚠️  O app gerou exceção durante o benchmark")
+    paint = [r["first_paint"] * 1000 for r in runs]
+    first = [r["first_metric"] * 1000 for r in runs]
+    total = [r["total"] * 1000 for r in runs]
+    print(f"Tempo até a primeira pintura:  {_stats(paint)}")
+    print(f"Tempo até a primeira métrica:  {_stats(first)}")
+    print(f"Primeira execução completa:    {_stats(total)}")
+
+    if early_ms > args.budget_ms:
+        print("❌ Orçamento de import excedido")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()